@@ -0,0 +1,351 @@
+"""In-process CSR adjacency index for neighbor expansion.
+
+Node ids are interned to dense integers and the ``edges`` table is loaded
+once per snapshot into array-backed CSR offsets and neighbor lists for both
+directions. Neighbor expansion then becomes in-memory lookups followed by one
+batched fetch of the chosen edge and node rows.
+
+``ADJACENCY_INDEX=off`` disables the index; graphs with more edges than
+``ADJACENCY_MAX_EDGES`` keep using the SQL expansion path. So do
+degree-ranked expansions from a seed with more than ``ADJACENCY_HUB_DEGREE``
+edges: the ``edge_ranks`` indexes read ``budget`` rows per seed where the
+index would rank every edge of the hub.
+
+In-process writes (the gRPC upserts) patch the loaded index through
+``note_write`` instead of forcing a reload: upserted edges are appended as
+extra slots and the slots they replace are masked. Once more than
+``ADJACENCY_MAX_PATCHED_EDGES`` edges (or a tenth of the loaded ones) are
+patched in, the next read reloads the CSR from ``edges``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from array import array
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from .snapshot import snapshot_version
+
+logger = logging.getLogger("mcp.adjacency")
+
+ADJACENCY_MODE = os.getenv("ADJACENCY_INDEX", "on").lower()
+MAX_EDGES = int(os.getenv("ADJACENCY_MAX_EDGES", "2000000"))
+MAX_PATCHED_EDGES = int(os.getenv("ADJACENCY_MAX_PATCHED_EDGES", "10000"))
+HUB_DEGREE = int(os.getenv("ADJACENCY_HUB_DEGREE", "1000"))
+
+# (rowid, id, source, target) of an upserted edge
+EdgeRow = tuple[int, str, str, str]
+
+
+def _csr(keys: array, n: int) -> tuple[array, array]:
+    """Counting sort of edge slots by key; returns (offsets, slots)."""
+    offsets = array("q", bytes(8 * (n + 1)))
+    for k in keys:
+        offsets[k + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+    fill = array("q", offsets)
+    slots = array("i", bytes(4 * len(keys)))
+    for slot, k in enumerate(keys):
+        slots[fill[k]] = slot
+        fill[k] += 1
+    return offsets, slots
+
+
+class AdjacencyIndex:
+    def __init__(
+        self,
+        node_ids: list[str],
+        edge_ids: list[str],
+        edge_rowids: array,
+        edge_src: array,
+        edge_dst: array,
+    ) -> None:
+        self.node_ids = node_ids
+        self.node_index = {nid: i for i, nid in enumerate(node_ids)}
+        self.edge_ids = edge_ids
+        self.edge_rowids = edge_rowids
+        self.edge_src = edge_src
+        self.edge_dst = edge_dst
+        n = len(node_ids)
+        self.out_offsets, self.out_slots = _csr(edge_src, n)
+        self.in_offsets, self.in_slots = _csr(edge_dst, n)
+        # Patches since the load: slots appended per node, replaced slots, degree changes
+        self.base_nodes = n
+        self.base_edges = len(edge_ids)
+        self._added_out: dict[int, list[int]] = {}
+        self._added_in: dict[int, list[int]] = {}
+        self._dead: set[int] = set()
+        self._degree_delta: dict[int, int] = {}
+        self._slot_by_id: dict[str, int] | None = None
+
+    @classmethod
+    def load(cls, conn: sqlite3.Connection) -> AdjacencyIndex:
+        node_index: dict[str, int] = {}
+        node_ids: list[str] = []
+        edge_ids: list[str] = []
+        rowids = array("q")
+        src = array("i")
+        dst = array("i")
+
+        def intern(nid: str) -> int:
+            i = node_index.get(nid)
+            if i is None:
+                i = node_index[nid] = len(node_ids)
+                node_ids.append(nid)
+            return i
+
+        cur = conn.execute("SELECT rowid, id, source, target FROM edges ORDER BY rowid")
+        while True:
+            rows = cur.fetchmany(10000)
+            if not rows:
+                break
+            for rowid, eid, s, t in rows:
+                rowids.append(rowid)
+                edge_ids.append(eid)
+                src.append(intern(s))
+                dst.append(intern(t))
+        return cls(node_ids, edge_ids, rowids, src, dst)
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_ids) - len(self._dead)
+
+    @property
+    def patched_edges(self) -> int:
+        return len(self.edge_ids) - self.base_edges
+
+    def degree(self, i: int) -> int:
+        base = 0
+        if i < self.base_nodes:
+            base = (self.out_offsets[i + 1] - self.out_offsets[i]) + (
+                self.in_offsets[i + 1] - self.in_offsets[i]
+            )
+        return base + self._degree_delta.get(i, 0)
+
+    def _intern(self, nid: str) -> int:
+        i = self.node_index.get(nid)
+        if i is None:
+            i = len(self.node_ids)
+            self.node_ids.append(nid)
+            self.node_index[nid] = i
+        return i
+
+    def _bump(self, i: int, by: int) -> None:
+        self._degree_delta[i] = self._degree_delta.get(i, 0) + by
+
+    def apply_edges(self, rows: Iterable[EdgeRow]) -> None:
+        """Patch upserted ``(rowid, id, source, target)`` edges in without rebuilding the CSR.
+
+        An edge that is new or whose endpoints changed gets a fresh slot; the
+        slot it replaces is masked. Data-only updates change nothing here.
+        """
+        if self._slot_by_id is None:
+            self._slot_by_id = {eid: slot for slot, eid in enumerate(self.edge_ids)}
+        for rowid, eid, source, target in rows:
+            s, t = self._intern(source), self._intern(target)
+            old = self._slot_by_id.get(eid)
+            if old is not None:
+                if (self.edge_rowids[old], self.edge_src[old], self.edge_dst[old]) == (rowid, s, t):
+                    continue
+                self._dead.add(old)
+                self._bump(self.edge_src[old], -1)
+                self._bump(self.edge_dst[old], -1)
+            # Fill the slot before publishing it to concurrent readers
+            slot = len(self.edge_ids)
+            self.edge_ids.append(eid)
+            self.edge_rowids.append(rowid)
+            self.edge_src.append(s)
+            self.edge_dst.append(t)
+            self._added_out.setdefault(s, []).append(slot)
+            self._added_in.setdefault(t, []).append(slot)
+            self._bump(s, 1)
+            self._bump(t, 1)
+            self._slot_by_id[eid] = slot
+
+    def max_degree(self, seed_ids: Iterable[str]) -> int:
+        """Return the largest degree among the seeds that are in the index (0 if none)."""
+        found = (self.node_index.get(nid) for nid in seed_ids)
+        return max((self.degree(i) for i in found if i is not None), default=0)
+
+    def incident_slots(self, seed_ids: set[str]) -> Iterator[int]:
+        """Yield edge slots touching any seed, outgoing before incoming."""
+        dead = self._dead
+        seen: set[int] = set()
+        for nid in sorted(seed_ids):
+            i = self.node_index.get(nid)
+            if i is None:
+                continue
+            groups: list[Iterable[int]] = []
+            if i < self.base_nodes:
+                groups += [
+                    self.out_slots[self.out_offsets[i] : self.out_offsets[i + 1]],
+                    self.in_slots[self.in_offsets[i] : self.in_offsets[i + 1]],
+                ]
+            groups += [self._added_out.get(i, ()), self._added_in.get(i, ())]
+            for group in groups:
+                for slot in group:
+                    if slot not in seen and slot not in dead:
+                        seen.add(slot)
+                        yield slot
+
+    def top_edges(self, seed_ids: set[str], budget: int, ranking: str = "degree") -> list[int]:
+        """Return the rowids of up to ``budget`` edges incident to the seeds.
+
+        With ``ranking="degree"`` edges are ordered by the summed degree of
+        their endpoints, ties broken by edge id, matching the SQL path. A
+        bounded heap keeps the ``budget`` best, so a hub seed costs one pass
+        over its edges rather than a sort of them; ``"none"`` stops after
+        ``budget`` edges.
+        """
+        budget = max(0, int(budget))
+        if not budget:
+            return []
+        slots = self.incident_slots(seed_ids)
+        if ranking == "none":
+            return [self.edge_rowids[s] for s in islice(slots, budget)]
+        src, dst, ids = self.edge_src, self.edge_dst, self.edge_ids
+        degrees: dict[int, int] = {}
+
+        def degree(i: int) -> int:
+            d = degrees.get(i)
+            if d is None:
+                d = degrees[i] = self.degree(i)
+            return d
+
+        best = heapq.nsmallest(
+            budget, slots, key=lambda s: (-(degree(src[s]) + degree(dst[s])), ids[s])
+        )
+        return [self.edge_rowids[s] for s in best]
+
+    def memory_bytes(self) -> int:
+        arrays = (
+            self.edge_rowids,
+            self.edge_src,
+            self.edge_dst,
+            self.out_offsets,
+            self.out_slots,
+            self.in_offsets,
+            self.in_slots,
+        )
+        total = sum(a.itemsize * len(a) for a in arrays)
+        total += sys.getsizeof(self.node_ids) + sys.getsizeof(self.edge_ids)
+        total += sum(sys.getsizeof(s) for s in self.node_ids)
+        total += sum(sys.getsizeof(s) for s in self.edge_ids)
+        total += sys.getsizeof(self.node_index)
+        return total
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "nodes": self.node_count,
+            "edges": self.edge_count,
+            "patched_edges": self.patched_edges,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+_indexes: dict[Path, tuple[tuple[int, ...] | None, AdjacencyIndex | None, str]] = {}
+_build_lock = threading.Lock()
+
+
+def get_adjacency(db_path: Path, conn: sqlite3.Connection) -> AdjacencyIndex | None:
+    """Return the adjacency index for the current snapshot, or None for SQL expansion.
+
+    The index is (re)loaded once per snapshot version. While one request
+    loads it, concurrent requests fall back to SQL instead of waiting.
+    """
+    if ADJACENCY_MODE in {"0", "off", "false", "no"}:
+        return None
+    key = Path(db_path)
+    version = snapshot_version(key)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    if not _build_lock.acquire(blocking=False):
+        return None
+    try:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        index: AdjacencyIndex | None = None
+        try:
+            (count,) = conn.execute("SELECT COUNT(*) FROM edges").fetchone()
+            if count > MAX_EDGES:
+                reason = f"edges {count} > ADJACENCY_MAX_EDGES {MAX_EDGES}, using SQL"
+            else:
+                index = AdjacencyIndex.load(conn)
+                reason = "ok"
+        except sqlite3.DatabaseError as exc:
+            reason = str(exc)
+        _indexes[key] = (version, index, reason)
+        logger.info(
+            "adjacency_loaded",
+            extra={"db_path": str(key), "reason": reason, **(index.stats() if index else {})},
+        )
+        return index
+    finally:
+        _build_lock.release()
+
+
+def note_write(
+    db_path: Path, before: tuple[int, ...] | None, edges: Iterable[EdgeRow] = ()
+) -> None:
+    """Carry the loaded index across an in-process write instead of reloading it.
+
+    ``before`` is the snapshot version read before the write began and
+    ``edges`` the ``(rowid, id, source, target)`` rows it upserted; call it
+    after the commit and ``mark_changed``. An index loaded for another
+    version, or one that is being reloaded, is left for the next read to
+    reload.
+    """
+    key = Path(db_path)
+    cached = _indexes.get(key)
+    if cached is None or cached[0] != before:
+        return
+    if not _build_lock.acquire(blocking=False):
+        return
+    try:
+        cached = _indexes.get(key)
+        if cached is None or cached[0] != before:
+            return
+        _, index, reason = cached
+        rows = list(edges)
+        if rows:
+            if index is None:
+                # SQL mode may no longer apply; let the next read decide
+                del _indexes[key]
+                return
+            index.apply_edges(rows)
+            if index.patched_edges > max(MAX_PATCHED_EDGES, index.base_edges // 10):
+                del _indexes[key]
+                logger.info(
+                    "adjacency_reload_due",
+                    extra={"db_path": str(key), "patched_edges": index.patched_edges},
+                )
+                return
+        _indexes[key] = (snapshot_version(key), index, reason)
+    finally:
+        _build_lock.release()
+
+
+def adjacency_stats(db_path: Path) -> dict[str, Any] | None:
+    cached = _indexes.get(Path(db_path))
+    if cached is None:
+        return None
+    _, index, reason = cached
+    out: dict[str, Any] = {"enabled": index is not None, "message": reason}
+    if index is not None:
+        out.update(index.stats())
+    return out
@@ -0,0 +1,148 @@
+"""Inverted-file (IVF) approximate nearest-neighbor index over the vector sidecar.
+
+Export clusters the unit vectors with spherical k-means into ``nlist``
+lists (about ``sqrt(n)``) and writes three ``.npy`` sidecars next to the
+snapshot:
+
+- ``<db>.ivf_centroids.npy``: float32 ``(nlist, dim)`` unit centroids
+- ``<db>.ivf_offsets.npy``: int64 ``(nlist + 1,)`` list boundaries in ``order``
+- ``<db>.ivf_order.npy``: int64 matrix row indices grouped by list
+
+A query scores the centroids, keeps the ``nprobe`` closest lists and scores
+only their rows, so it reads about ``nprobe / nlist`` of the matrix. More
+probes trade latency for recall; probing every list is an exact search.
+Recall at a fixed ``nprobe`` falls as ``nlist`` grows, so the default probes
+a fixed fraction of the lists rather than a fixed count.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+IVF_MIN_VECTORS = int(os.getenv("VECTOR_IVF_MIN_VECTORS", "20000"))
+# 0 probes NPROBE_FRACTION of the lists. Recall@10 against exact search from
+# scripts/bench_ann_recall.py on 256-dim clustered vectors:
+#   30k vectors, 173 lists:  nprobe 8: 0.62, 16: 0.75, 22 (1/8): 0.81 (3x)
+#   100k vectors, 316 lists: nprobe 8: 0.79, 16: 0.85, 40 (1/8): 0.94 (2.2x)
+DEFAULT_NPROBE = int(os.getenv("VECTOR_NPROBE", "0"))
+NPROBE_FRACTION = float(os.getenv("VECTOR_NPROBE_FRACTION", "0.125"))
+_BLOCK_ROWS = 65536
+
+
+def ivf_paths(db_path: Path) -> tuple[Path, Path, Path]:
+    db_path = Path(db_path)
+    return tuple(  # type: ignore[return-value]
+        db_path.with_name(f"{db_path.name}.ivf_{part}.npy")
+        for part in ("centroids", "offsets", "order")
+    )
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the closest (highest dot product) centroid of every vector."""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        block = np.asarray(vectors[start : start + _BLOCK_ROWS], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def train_centroids(
+    vectors: np.ndarray, nlist: int, *, iters: int = 10, sample_size: int = 0, seed: int = 0
+) -> np.ndarray:
+    """Spherical k-means on a sample of ``vectors``; returns ``(nlist, dim)`` unit centroids."""
+    rng = np.random.default_rng(seed)
+    n = len(vectors)
+    sample_size = min(n, sample_size or max(64 * nlist, 10000))
+    sample = np.asarray(vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(iters):
+        labels = assign(sample, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(sample[order], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids[filled] = sums / np.where(norms > 0, norms, 1)
+        # Empty lists restart from random sample points
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+    return centroids.astype(np.float32)
+
+
+class IvfIndex:
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, order: np.ndarray) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.order = order
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int = 0, *, seed: int = 0) -> IvfIndex:
+        """Cluster ``vectors`` (unit rows) into ``nlist`` lists, ``sqrt(n)`` by default."""
+        n = len(vectors)
+        nlist = max(1, min(n, nlist or round(n**0.5)))
+        centroids = train_centroids(vectors, nlist, seed=seed)
+        labels = assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+        return cls(centroids, offsets, order)
+
+    @classmethod
+    def load(cls, db_path: Path, rows: int, dim: int) -> IvfIndex | None:
+        """Memory-map the sidecars; None when missing or built for another matrix."""
+        paths = ivf_paths(db_path)
+        if not all(p.exists() for p in paths):
+            return None
+        try:
+            centroids, offsets, order = (np.load(p, mmap_mode="r") for p in paths)
+        except ValueError:
+            return None
+        if (
+            centroids.ndim != 2
+            or centroids.shape[1] != dim
+            or offsets.shape != (len(centroids) + 1,)
+            or order.shape != (rows,)
+            or int(offsets[-1]) != rows
+        ):
+            return None
+        return cls(np.asarray(centroids), np.asarray(offsets), order)
+
+    def write(self, db_path: Path) -> None:
+        """Save the sidecars under temporary names and rename them into place."""
+        for path, arr in zip(
+            ivf_paths(db_path), (self.centroids, self.offsets, self.order), strict=True
+        ):
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as fh:
+                np.save(fh, arr)
+            os.replace(tmp, path)
+
+    @staticmethod
+    def remove(db_path: Path) -> None:
+        for path in ivf_paths(db_path):
+            path.unlink(missing_ok=True)
+
+    @property
+    def nlist(self) -> int:
+        return int(len(self.centroids))
+
+    @property
+    def default_nprobe(self) -> int:
+        """``VECTOR_NPROBE`` if set, else ``NPROBE_FRACTION`` of the lists."""
+        return DEFAULT_NPROBE or max(1, math.ceil(self.nlist * NPROBE_FRACTION))
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Return the sorted matrix rows of the ``nprobe`` lists closest to ``query``."""
+        nprobe = max(1, nprobe)
+        if nprobe >= self.nlist:
+            return np.arange(len(self.order), dtype=np.int64)
+        lists = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        rows = np.concatenate([self.order[self.offsets[i] : self.offsets[i + 1]] for i in lists])
+        # Ascending rows read the memory-mapped matrix front to back
+        return np.sort(rows)
@@ -0,0 +1,160 @@
+"""Bounded in-process cache of encoded query results.
+
+Entries are keyed by the snapshot path, a transport tag (``"json"`` for HTTP
+bodies, ``"grpc"`` for protobuf results) and the normalized ``QueryOpts``.
+Each path remembers the version its entries were built from
+(``result_version``: the snapshot version plus the vector sidecar's size and
+mtime); the first lookup that sees a newer one (after an export, an upsert
+or new sidecars) drops every entry for that path. Eviction is
+least-recently-used, bounded by both entry count and encoded size.
+
+A single entry may use at most ``max_entry_bytes``
+(``QUERY_CACHE_ENTRY_BYTES``, default 1/32 of the byte budget), so a
+streamed result is only buffered for the cache while it stays that small.
+``QUERY_CACHE_ENTRIES=0`` disables the cache.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from pathlib import Path
+from typing import Any
+
+from .embeddings import sidecar_version
+from .query import QueryOpts
+from .snapshot import ensure_snapshot
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_ENTRIES", "1024"))
+DEFAULT_MAX_BYTES = int(os.getenv("QUERY_CACHE_BYTES", str(32 * 1024 * 1024)))
+DEFAULT_MAX_ENTRY_BYTES = int(os.getenv("QUERY_CACHE_ENTRY_BYTES", str(DEFAULT_MAX_BYTES // 32)))
+
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_freeze(v) for v in value]
+        return tuple(sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items)
+    return value
+
+
+def query_key(opts: QueryOpts) -> tuple[Hashable, ...]:
+    """Return a hashable key for ``opts``; options that cannot change the result are folded."""
+    values = dataclasses.asdict(opts)
+    if not values["expand_neighbors"]:
+        values["neighbor_budget"] = 0
+        values["neighbor_ranking"] = ""
+    return tuple(_freeze(values[f.name]) for f in dataclasses.fields(opts))
+
+
+def result_version(db_path: Path) -> tuple[int, ...]:
+    """Return the version cached results for ``db_path`` are checked against.
+
+    Hybrid and similarity results also depend on the vector sidecars, which
+    export rewrites next to the database, so their size and mtime are part of it.
+    """
+    return (*ensure_snapshot(db_path).version, *sidecar_version(db_path))
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        max_entry_bytes: int = DEFAULT_MAX_ENTRY_BYTES,
+    ) -> None:
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_entry_bytes = min(self.max_bytes, max(0, int(max_entry_bytes)))
+        self._entries: OrderedDict[tuple[Hashable, ...], tuple[Any, int]] = OrderedDict()
+        self._versions: dict[Path, tuple[int, ...]] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def _sync_version(self, path: Path, version: tuple[int, ...]) -> None:
+        # Caller holds the lock
+        if self._versions.get(path) == version:
+            return
+        self._versions[path] = version
+        stale = [k for k in self._entries if k[0] == path]
+        for k in stale:
+            _, size = self._entries.pop(k)
+            self._bytes -= size
+        if stale:
+            self._invalidations += 1
+
+    def get(self, db_path: Path, version: tuple[int, ...], key: tuple[Hashable, ...]) -> Any:
+        """Return the cached value or None; ``version`` is the current snapshot version."""
+        if not self.enabled:
+            return None
+        path = Path(db_path)
+        with self._lock:
+            self._sync_version(path, version)
+            entry = self._entries.get((path, *key))
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end((path, *key))
+            self._hits += 1
+            return entry[0]
+
+    def put(
+        self,
+        db_path: Path,
+        version: tuple[int, ...],
+        key: tuple[Hashable, ...],
+        value: Any,
+        size: int,
+    ) -> None:
+        if not self.enabled or size > self.max_entry_bytes:
+            return
+        path = Path(db_path)
+        full_key = (path, *key)
+        with self._lock:
+            self._sync_version(path, version)
+            old = self._entries.pop(full_key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[full_key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,413 @@
+"""Node embeddings and top-k cosine similarity search.
+
+Vectors come from a deterministic local embedder: words and in-word
+character trigrams of a node's ``name`` and ``about`` are hashed into
+``EMBEDDING_DIM`` signed buckets and L2-normalized, so builds and tests
+need no model or network. Only node data is embedded; markdown nodes keep
+their front matter there, not the document body. The pipeline stores them
+in ``node_embeddings``; export writes them to two ``.npy`` sidecars next to
+the snapshot:
+
+- ``<db>.vectors.npy``: float32 matrix, one unit vector per row
+- ``<db>.vector_rows.npy``: int64 ``node_embeddings.pos`` of each matrix row
+
+The runtime memory-maps both once per snapshot version and scores a query
+as one matrix-vector product per block of ``VECTOR_SCAN_BLOCK_ROWS`` rows,
+keeping the best ``k`` with ``argpartition``, so a scan over a million
+nodes runs in NumPy without per-row Python work or loading the matrix.
+Large snapshots also get an IVF index (``app/ann.py``), and searches then
+score only the rows of the closest lists.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .ann import IVF_MIN_VECTORS, IvfIndex
+from .indexes import table_exists
+from .snapshot import snapshot_version
+
+logger = logging.getLogger("mcp.embeddings")
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "256"))
+EMBEDDING_FIELDS = ("name", "about")
+EMBEDDINGS_TABLE = "node_embeddings"
+SCAN_BLOCK_ROWS = int(os.getenv("VECTOR_SCAN_BLOCK_ROWS", "65536"))
+SIMILAR_MAX_K = 100
+_WORD = re.compile(r"\w+")
+
+
+class VectorsUnavailable(RuntimeError):
+    """The snapshot has no vector sidecar; run the pipeline export."""
+
+
+class UnknownNode(LookupError):
+    """The node to compare against has no embedding."""
+
+
+def _bucket(feature: str, dim: int) -> tuple[int, float]:
+    h = zlib.crc32(feature.encode())
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+
+def embed_text(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Return the unit-length hashing-trick vector of ``text`` (zeros if it has no words)."""
+    vec = np.zeros(dim, dtype=np.float32)
+    for word in _WORD.findall(text.lower()):
+        i, sign = _bucket(f"w:{word}", dim)
+        vec[i] += sign
+        # Trigrams make related word forms ("graph", "graphs") land close
+        padded = f"<{word}>"
+        for j in range(len(padded) - 2):
+            i, sign = _bucket(f"t:{padded[j : j + 3]}", dim)
+            vec[i] += 0.5 * sign
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def node_text(data: dict[str, Any]) -> str:
+    """Return the embedded text of a node: its ``EMBEDDING_FIELDS`` joined by newlines."""
+    parts = []
+    for name in EMBEDDING_FIELDS:
+        value = data.get(name)
+        if value:
+            parts.append(value if isinstance(value, str) else json.dumps(value))
+    return "\n".join(parts)
+
+
+def build_embeddings(
+    conn: sqlite3.Connection, dim: int = EMBEDDING_DIM, batch_size: int = 1000
+) -> int:
+    """(Re)fill ``node_embeddings`` with one float32 vector blob per node; returns the count.
+
+    ``pos`` is the vector's position key: export writes matrix rows in
+    ``pos`` order together with the ``pos`` values.
+    """
+    cur = conn.cursor()
+    cur.execute(f"DROP TABLE IF EXISTS {EMBEDDINGS_TABLE};")
+    cur.execute(
+        f"""
+        CREATE TABLE {EMBEDDINGS_TABLE} (
+            pos     INTEGER PRIMARY KEY,
+            id      TEXT NOT NULL UNIQUE,
+            dim     INTEGER NOT NULL,
+            vector  BLOB NOT NULL
+        );
+        """
+    )
+    src = conn.cursor()
+    src.execute("SELECT id, json(data) FROM nodes ORDER BY id")
+    count = 0
+    while rows := src.fetchmany(batch_size):
+        batch = []
+        for node_id, data in rows:
+            parsed = json.loads(data) if data else {}
+            text = node_text(parsed if isinstance(parsed, dict) else {})
+            batch.append((node_id, dim, embed_text(text, dim).tobytes()))
+        cur.executemany(f"INSERT INTO {EMBEDDINGS_TABLE} (id, dim, vector) VALUES (?, ?, ?)", batch)
+        count += len(batch)
+    conn.commit()
+    return count
+
+
+def update_embeddings(
+    conn: sqlite3.Connection, ids: Iterable[str], dim: int = EMBEDDING_DIM
+) -> int:
+    """Re-embed the nodes ``ids`` in ``node_embeddings`` without committing.
+
+    Changed nodes keep their ``pos``, new nodes are appended and ids no
+    longer in ``nodes`` are dropped. Returns the number of vectors written.
+    """
+    wanted = json.dumps(sorted(set(ids)))
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        DELETE FROM {EMBEDDINGS_TABLE}
+        WHERE id IN (SELECT value FROM json_each(?))
+          AND id NOT IN (SELECT id FROM nodes)
+        """,
+        (wanted,),
+    )
+    batch = []
+    for node_id, data in cur.execute(
+        "SELECT n.id, json(n.data) FROM json_each(?) AS j JOIN nodes n ON n.id = j.value",
+        (wanted,),
+    ).fetchall():
+        parsed = json.loads(data) if data else {}
+        text = node_text(parsed if isinstance(parsed, dict) else {})
+        batch.append((node_id, dim, embed_text(text, dim).tobytes()))
+    cur.executemany(
+        f"""
+        INSERT INTO {EMBEDDINGS_TABLE} (id, dim, vector) VALUES (?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET dim = excluded.dim, vector = excluded.vector
+        """,
+        batch,
+    )
+    return len(batch)
+
+
+def sidecar_paths(db_path: Path) -> tuple[Path, Path]:
+    db_path = Path(db_path)
+    return (
+        db_path.with_name(db_path.name + ".vectors.npy"),
+        db_path.with_name(db_path.name + ".vector_rows.npy"),
+    )
+
+
+def export_vectors(
+    conn: sqlite3.Connection,
+    db_path: Path,
+    batch_size: int = 10000,
+    *,
+    ivf_min_vectors: int = IVF_MIN_VECTORS,
+) -> int:
+    """Write the ``node_embeddings`` vectors of ``conn`` as sidecars of ``db_path``.
+
+    Rows stream from SQLite into a memory-mapped ``.npy`` file, so memory
+    stays bounded by ``batch_size``. With at least ``ivf_min_vectors``
+    vectors an IVF index is built over them too (``app/ann.py``). Files are
+    written under temporary names and renamed into place, the matrix last,
+    so the runtime reloads once everything is there. Returns the number of
+    vectors written.
+    """
+    matrix_path, rows_path = sidecar_paths(db_path)
+    if not table_exists(conn, EMBEDDINGS_TABLE):
+        for path in (matrix_path, rows_path):
+            path.unlink(missing_ok=True)
+        IvfIndex.remove(db_path)
+        return 0
+    count, dim = conn.execute(f"SELECT COUNT(*), MAX(dim) FROM {EMBEDDINGS_TABLE}").fetchone()
+    dim = int(dim or EMBEDDING_DIM)
+    tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+    tmp_rows = rows_path.with_name(rows_path.name + ".tmp")
+    matrix = np.lib.format.open_memmap(tmp_matrix, mode="w+", dtype=np.float32, shape=(count, dim))
+    rows = np.lib.format.open_memmap(tmp_rows, mode="w+", dtype=np.int64, shape=(count,))
+    cur = conn.execute(f"SELECT pos, vector FROM {EMBEDDINGS_TABLE} ORDER BY pos")
+    start = 0
+    while batch := cur.fetchmany(batch_size):
+        end = start + len(batch)
+        rows[start:end] = [r for r, _ in batch]
+        matrix[start:end] = np.frombuffer(b"".join(v for _, v in batch), dtype=np.float32).reshape(
+            len(batch), dim
+        )
+        start = end
+    matrix.flush()
+    rows.flush()
+    if count and count >= ivf_min_vectors:
+        ivf = IvfIndex.build(matrix)
+        ivf.write(db_path)
+        logger.info("vectors_ivf_built", extra={"vectors": count, "lists": ivf.nlist})
+    else:
+        IvfIndex.remove(db_path)
+    del matrix, rows
+    os.replace(tmp_rows, rows_path)
+    os.replace(tmp_matrix, matrix_path)
+    return count
+
+
+class VectorIndex:
+    """Memory-mapped unit vectors of one snapshot and their ``node_embeddings.pos`` keys."""
+
+    def __init__(
+        self, matrix: np.ndarray, positions: np.ndarray, ivf: IvfIndex | None = None
+    ) -> None:
+        self.matrix = matrix
+        self.positions = positions
+        self.ivf = ivf
+
+    @classmethod
+    def load(cls, db_path: Path) -> VectorIndex:
+        matrix_path, rows_path = sidecar_paths(db_path)
+        matrix = np.load(matrix_path, mmap_mode="r")
+        rows = np.load(rows_path, mmap_mode="r")
+        if matrix.ndim != 2 or rows.shape != (matrix.shape[0],):
+            raise ValueError("vector sidecars do not match")
+        return cls(matrix, rows, IvfIndex.load(db_path, len(rows), matrix.shape[1]))
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.matrix.shape[0])
+
+    def vector_at(self, pos: int) -> np.ndarray | None:
+        i = int(np.searchsorted(self.positions, pos))
+        if i < len(self) and int(self.positions[i]) == pos:
+            return np.asarray(self.matrix[i])
+        return None
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        *,
+        exclude_pos: int | None = None,
+        nprobe: int = 0,
+    ) -> list[tuple[int, float]]:
+        """Return up to ``k`` ``(pos, cosine)`` pairs, best first.
+
+        With an IVF index only the ``nprobe`` closest lists are scored
+        (``IvfIndex.default_nprobe`` when 0); without one, or when ``nprobe``
+        covers every list, the whole matrix is scanned.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        want = k + (exclude_pos is not None)
+        if self.ivf is not None:
+            nprobe = nprobe or self.ivf.default_nprobe
+        if self.ivf is not None and nprobe < self.ivf.nlist:
+            rows = self.ivf.candidates(query, nprobe)
+            scores = self.matrix[rows] @ query
+            top = np.argpartition(scores, -want)[-want:] if len(scores) > want else slice(None)
+            return self._ranked(rows[top], scores[top], k, exclude_pos)
+        best_idx = np.empty(0, dtype=np.int64)
+        best_score = np.empty(0, dtype=np.float32)
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            scores = self.matrix[start : start + SCAN_BLOCK_ROWS] @ query
+            if len(scores) > want:
+                top = np.argpartition(scores, -want)[-want:]
+            else:
+                top = np.arange(len(scores))
+            best_idx = np.concatenate([best_idx, top + start])
+            best_score = np.concatenate([best_score, scores[top]])
+            if len(best_idx) > want:
+                keep = np.argpartition(best_score, -want)[-want:]
+                best_idx, best_score = best_idx[keep], best_score[keep]
+        return self._ranked(best_idx, best_score, k, exclude_pos)
+
+    def _ranked(
+        self, idx: np.ndarray, scores: np.ndarray, k: int, exclude_pos: int | None
+    ) -> list[tuple[int, float]]:
+        # Best first; ties by position so results are stable
+        order = np.lexsort((self.positions[idx], -scores))
+        out = [(int(self.positions[idx[j]]), float(scores[j])) for j in order]
+        return [(r, s) for r, s in out if r != exclude_pos][:k]
+
+    def stats(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "vectors": len(self),
+            "dim": self.dim,
+            "bytes": int(self.matrix.nbytes),
+        }
+        if self.ivf is not None:
+            out.update(ivf_lists=self.ivf.nlist, nprobe=self.ivf.default_nprobe)
+        return out
+
+
+_indexes: dict[Path, tuple[tuple[int, ...] | None, VectorIndex | None, str]] = {}
+_lock = threading.Lock()
+
+
+def sidecar_version(db_path: Path) -> tuple[int, ...]:
+    """Return the vector matrix sidecar's ``(size, mtime_ns)``, or ``()`` without one."""
+    matrix_path, _ = sidecar_paths(db_path)
+    try:
+        st = matrix_path.stat()
+    except OSError:
+        return ()
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _version(db_path: Path) -> tuple[int, ...] | None:
+    version = snapshot_version(db_path)
+    sidecar = sidecar_version(db_path)
+    if not sidecar:
+        return version
+    return (*(version or ()), *sidecar)
+
+
+def get_vectors(db_path: Path) -> VectorIndex | None:
+    """Return the memory-mapped vectors of the current snapshot, or None without sidecars."""
+    key = Path(db_path)
+    version = _version(key)
+    cached = _indexes.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        index: VectorIndex | None = None
+        try:
+            index = VectorIndex.load(key)
+            reason = "ok"
+        except (OSError, ValueError) as exc:
+            reason = str(exc)
+        _indexes[key] = (version, index, reason)
+    logger.info(
+        "vectors_loaded",
+        extra={"db_path": str(key), "reason": reason, **(index.stats() if index else {})},
+    )
+    return index
+
+
+def vector_stats(db_path: Path) -> dict[str, Any] | None:
+    cached = _indexes.get(Path(db_path))
+    if cached is None:
+        return None
+    _, index, reason = cached
+    out: dict[str, Any] = {"enabled": index is not None, "message": reason}
+    if index is not None:
+        out.update(index.stats())
+    return out
+
+
+def similar(
+    conn: sqlite3.Connection,
+    index: VectorIndex | None,
+    *,
+    node_id: str | None = None,
+    text: str | None = None,
+    k: int = 10,
+    nprobe: int = 0,
+) -> list[dict[str, Any]]:
+    """Return the ``k`` nodes most similar to a node or a text as ``{id, type, data, score}``.
+
+    Comparing against a node leaves that node out of its own results;
+    ``nprobe`` tunes recall against latency when the snapshot has an IVF index.
+    Raises ``VectorsUnavailable`` without sidecars and ``UnknownNode`` for a
+    node without an embedding.
+    """
+    if index is None:
+        raise VectorsUnavailable("vector sidecars missing; run export-sqlite")
+    k = max(1, min(int(k or 10), SIMILAR_MAX_K))
+    exclude: int | None = None
+    if node_id is not None:
+        found = conn.execute(
+            f"SELECT pos FROM {EMBEDDINGS_TABLE} WHERE id = ?", (node_id,)
+        ).fetchone()
+        query = index.vector_at(found[0]) if found else None
+        if query is None:
+            raise UnknownNode(f"no embedding for node {node_id!r}")
+        exclude = found[0]
+    else:
+        query = embed_text(text or "", index.dim)
+        if not query.any():
+            return []
+    hits = index.search(query, k, exclude_pos=exclude, nprobe=nprobe)
+    scores = dict(hits)
+    rows = conn.execute(
+        f"""
+        SELECT e.pos, n.id, n.type, json(n.data)
+        FROM json_each(?) AS j
+        CROSS JOIN {EMBEDDINGS_TABLE} AS e ON e.pos = j.value
+        JOIN nodes AS n ON n.id = e.id
+        ORDER BY j.key
+        """,
+        (json.dumps([r for r, _ in hits]),),
+    ).fetchall()
+    return [
+        {"id": r[1], "type": r[2], "data": json.loads(r[3] or "{}"), "score": scores[r[0]]}
+        for r in rows
+    ]
@@ -0,0 +1,158 @@
+"""Compile free-form search text into a valid FTS5 MATCH expression.
+
+Supported syntax:
+
+- bare words, matched as quoted terms (``graph`` -> ``"graph"``)
+- ``"quoted phrases"``; an unterminated quote runs to the end of the text
+- prefixes with a trailing ``*`` (``gra*`` -> ``"gra"*``)
+- ``AND`` / ``OR`` in upper case between terms; adjacent terms are ANDed
+- exclusions with ``NOT term`` or ``-term``
+
+Everything else, including stray quotes, parentheses, colons and lower-case
+operators, is treated as text, so no user input can produce an FTS5 syntax
+error. Compiled expressions are cached.
+
+Fuzzy search compiles to the trigram table instead: each word of three or
+more characters matches rows that share at least two of its trigrams (an OR
+of trigram pairs), and candidates are kept only when they share at least
+``FUZZY_MIN_SIMILARITY`` of each word's trigrams.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from itertools import combinations
+
+_CHUNK = re.compile(r'"([^"]*)("?)(\*?)|(\S+)')
+_WORD = re.compile(r"\w")
+_OPERATORS = {"AND", "OR", "NOT"}
+_WORDS = re.compile(r"\w+")
+
+FUZZY_MIN_SIMILARITY = float(os.getenv("FUZZY_MIN_SIMILARITY", "0.6"))
+# Longer words match any one of a subset of their trigrams instead of pairs
+_MAX_TRIGRAM_PAIRS = 45
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _term(text: str, prefix: bool) -> str | None:
+    text = text.strip()
+    if not _WORD.search(text):
+        return None
+    return _quote(text) + ("*" if prefix else "")
+
+
+@lru_cache(maxsize=4096)
+def compile_fts_query(text: str) -> str | None:
+    """Return the FTS5 expression for ``text``, or None when it has no searchable terms."""
+    items: list[str] = []  # terms and AND/OR in order
+    excluded: list[str] = []
+    negate = False
+    for m in _CHUNK.finditer(text or ""):
+        phrase, _, star, bare = m.groups()
+        if bare is None:
+            term = _term(phrase, bool(star))
+        elif bare in _OPERATORS:
+            if bare == "NOT":
+                negate = True
+            else:
+                items.append(bare)
+            continue
+        else:
+            if bare.startswith("-") and len(bare) > 1:
+                negate = True
+            bare = bare.strip("()-")
+            term = _term(bare.rstrip("*"), bare.endswith("*"))
+        if term is None:
+            continue
+        if negate:
+            excluded.append(term)
+            negate = False
+        else:
+            items.append(term)
+
+    # Drop dangling operators; of consecutive ones the last wins
+    out: list[str] = []
+    for item in items:
+        if item in _OPERATORS:
+            if out and out[-1] in _OPERATORS:
+                out[-1] = item
+            elif out:
+                out.append(item)
+        else:
+            out.append(item)
+    if out and out[-1] in _OPERATORS:
+        out.pop()
+    if not out:
+        return None
+    expr = " ".join(out)
+    if excluded:
+        # NOT binds tighter than AND/OR, so group the positive part
+        expr = f"({expr})" + "".join(f" NOT {t}" for t in excluded)
+    return expr
+
+
+def trigrams(text: str) -> set[str]:
+    """Return the three-character sequences of ``text``, case and accent folded like the index."""
+    text = "".join(
+        c for c in unicodedata.normalize("NFKD", text.lower()) if not unicodedata.combining(c)
+    )
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+@lru_cache(maxsize=4096)
+def fuzzy_words(text: str) -> tuple[frozenset[str], ...]:
+    """Return the trigram sets of the words in ``text`` long enough to index."""
+    return tuple(frozenset(trigrams(w)) for w in _WORDS.findall(text or "") if len(w) >= 3)
+
+
+def _min_shared(grams: frozenset[str], threshold: float) -> int:
+    # Same comparison as fuzzy_match, so rounding never drops a match
+    return next(k for k in range(len(grams) + 1) if k >= threshold * len(grams))
+
+
+def _word_trigram_query(grams: frozenset[str], threshold: float) -> str:
+    """Return an expression matched by every row with ``threshold`` of ``grams``, and few others.
+
+    A row sharing ``m`` of the ``n`` trigrams shares at least two of any
+    ``n - m + 2`` of them, so an OR of those pairs never loses a match, and
+    unlike an OR of single trigrams it skips rows that only share one
+    common trigram.
+    """
+    ordered = sorted(grams)
+    spare = len(ordered) - _min_shared(grams, threshold)
+    if spare + 1 >= len(ordered):
+        return "(" + " OR ".join(_quote(t) for t in ordered) + ")"
+    pairs = list(combinations(ordered[: spare + 2], 2))
+    if len(pairs) > _MAX_TRIGRAM_PAIRS:
+        # Still exact: a match shares at least one of any n - m + 1 trigrams
+        return "(" + " OR ".join(_quote(t) for t in ordered[: spare + 1]) + ")"
+    return "(" + " OR ".join(f"({_quote(a)} AND {_quote(b)})" for a, b in pairs) + ")"
+
+
+@lru_cache(maxsize=4096)
+def compile_trigram_query(text: str, threshold: float = FUZZY_MIN_SIMILARITY) -> str | None:
+    """Return the trigram-table expression for ``text``, or None when no word is long enough.
+
+    Words are ANDed. Each matches rows that share enough of its trigrams to
+    possibly pass ``threshold``, so a word with a typo still finds rows that
+    share part of it while rows sharing one common trigram are never read;
+    ``fuzzy_match`` then drops candidates that share too little.
+    """
+    words = fuzzy_words(text)
+    if not words:
+        return None
+    return " AND ".join(_word_trigram_query(grams, threshold) for grams in words)
+
+
+def fuzzy_match(
+    words: tuple[frozenset[str], ...], haystack: str, threshold: float = FUZZY_MIN_SIMILARITY
+) -> bool:
+    """Return True when ``haystack`` has at least ``threshold`` of every word's trigrams."""
+    present = trigrams(haystack)
+    return all(len(grams & present) >= threshold * len(grams) for grams in words)
@@ -0,0 +1,63 @@
+"""Set-based hyperedge upserts shared by the pipeline writer and the gRPC service.
+
+Callers flatten hyperedges into two row lists, one for ``hyperedges`` and one
+for ``hyperedge_entities``, and write each list with a single ``executemany``
+per batch. Replace mode first clears the batch's existing participants with
+one ``DELETE`` driven by a JSON array of hyperedge ids.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from collections.abc import Iterable
+
+HYPEREDGE_BATCH = int(os.getenv("HYPEREDGE_BATCH", "1000"))
+
+# (id, type, data json)
+HyperedgeRow = tuple[str, str, str]
+# (hyperedge_id, entity_id, role, ordinal, data json)
+ParticipantRow = tuple[str, str, str, int, str]
+
+_UPSERT_HYPEREDGES = """
+    INSERT INTO hyperedges (id, type, data)
+    VALUES (?, ?, json(?))
+    ON CONFLICT(id) DO UPDATE SET
+        type = excluded.type,
+        data = excluded.data;
+"""
+_UPSERT_PARTICIPANTS = """
+    INSERT INTO hyperedge_entities (hyperedge_id, entity_id, role, ordinal, data)
+    VALUES (?, ?, ?, ?, json(?))
+    ON CONFLICT(hyperedge_id, entity_id, role, ordinal) DO UPDATE SET
+        data = excluded.data;
+"""
+_CLEAR_PARTICIPANTS = """
+    DELETE FROM hyperedge_entities
+    WHERE hyperedge_id IN (SELECT value FROM json_each(?));
+"""
+
+
+def write_hyperedge_batch(
+    conn: sqlite3.Connection,
+    hyperedges: list[HyperedgeRow],
+    participants: list[ParticipantRow],
+    *,
+    replace_ids: Iterable[str] = (),
+) -> int:
+    """Upsert one flattened batch; returns the number of participant rows cleared.
+
+    ``replace_ids`` lose their current participants before the batch is
+    written, so the batch's participants become the complete set. The caller
+    owns the transaction.
+    """
+    cleared = 0
+    ids = list(replace_ids)
+    if ids:
+        cleared = conn.execute(_CLEAR_PARTICIPANTS, (json.dumps(ids),)).rowcount
+    if hyperedges:
+        conn.executemany(_UPSERT_HYPEREDGES, hyperedges)
+    if participants:
+        conn.executemany(_UPSERT_PARTICIPANTS, participants)
+    return cleared
@@ -0,0 +1,553 @@
+"""Derived search structures stored next to the graph tables.
+
+The pipeline builds these at snapshot time; the runtime only checks that they
+exist and builds them once for older snapshots that predate them.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+FTS_TABLE = "nodes_fts"
+FTS_TRIGGERS = ("nodes_ai", "nodes_au", "nodes_ad")
+TRIGRAM_TABLE = "nodes_trigram"
+TRIGRAM_TRIGGERS = ("nodes_trigram_ai", "nodes_trigram_au", "nodes_trigram_ad")
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_RESERVED_FIELDS = {"id", "rank", "rowid", FTS_TABLE, TRIGRAM_TABLE}
+
+
+@dataclass(frozen=True)
+class FtsField:
+    """One searchable FTS column and its BM25 weight.
+
+    ``type`` reads the node type column; any other name is read from the
+    node's JSON data (``$.<name>``).
+    """
+
+    name: str
+    weight: float = 1.0
+
+
+DEFAULT_FTS_FIELDS = (
+    FtsField("name", 10.0),
+    FtsField("about", 3.0),
+    FtsField("type", 1.0),
+)
+
+
+def table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?",
+        (name,),
+    ).fetchone()
+    return row is not None
+
+
+def _trigger_has(conn: sqlite3.Connection, trigger: str, statement: str) -> bool:
+    """Return True when ``trigger`` exists and its SQL contains ``statement``.
+
+    Tells derived tables built by an older layout apart, so they count as
+    missing and get rebuilt.
+    """
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (trigger,)
+    ).fetchone()
+    return row is not None and statement in row[0]
+
+
+def _rowid_keyed(conn: sqlite3.Connection, trigger: str) -> bool:
+    # Older snapshots keyed FTS rows by the unindexed id column, so each node
+    # update or delete scanned the whole table
+    return _trigger_has(conn, trigger, "rowid = OLD.rowid")
+
+
+def fts_columns(conn: sqlite3.Connection) -> list[str]:
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({FTS_TABLE})")]
+
+
+def fts_fields(conn: sqlite3.Connection) -> list[FtsField] | None:
+    """Return the fields and weights the existing FTS table was built with.
+
+    Lets the runtime rebuild an outdated table over the snapshot's own search
+    fields, which only the pipeline's schema knows. None when there is no
+    per-field table to read them from.
+    """
+    names = fts_columns(conn)[1:]
+    if not names or names == ["content"]:
+        return None
+    try:
+        row = conn.execute(f"SELECT v FROM {FTS_TABLE}_config WHERE k = 'rank'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    weights: list[float] = []
+    if row is not None:
+        match = re.fullmatch(r"bm25\(([^)]*)\)", str(row[0]).strip())
+        try:
+            weights = [float(w) for w in match.group(1).split(",")][1:] if match else []
+        except ValueError:
+            weights = []
+    if len(weights) != len(names):
+        weights = [1.0] * len(names)
+    return [FtsField(name, weight) for name, weight in zip(names, weights, strict=True)]
+
+
+def fts_present(conn: sqlite3.Connection) -> bool:
+    """Return True when the per-field FTS table and its sync triggers all exist.
+
+    The original single ``content`` column layout counts as missing so it
+    gets rebuilt with per-field columns and BM25 weights, as do tables whose
+    rows are not keyed to ``nodes.rowid``.
+    """
+    names = {
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?)",
+            (FTS_TABLE, *FTS_TRIGGERS),
+        )
+    }
+    if names != {FTS_TABLE, *FTS_TRIGGERS}:
+        return False
+    return fts_columns(conn) != ["id", "content"] and _rowid_keyed(conn, FTS_TRIGGERS[1])
+
+
+def _valid_fields(fields: Iterable[FtsField]) -> list[FtsField]:
+    out: list[FtsField] = []
+    seen: set[str] = set()
+    for f in fields:
+        if not _FIELD_NAME.match(f.name) or f.name.lower() in _RESERVED_FIELDS:
+            raise ValueError(f"invalid FTS field name {f.name!r}")
+        if f.name not in seen:
+            seen.add(f.name)
+            out.append(f)
+    if not out:
+        raise ValueError("at least one FTS field is required")
+    return out
+
+
+def _field_expr(field: FtsField, row: str = "") -> str:
+    if field.name == "type":
+        return f"{row}type"
+    return f"coalesce(json_extract({row}data, '$.{field.name}'), '')"
+
+
+def build_fts(conn: sqlite3.Connection, fields: Iterable[FtsField] = DEFAULT_FTS_FIELDS) -> None:
+    """(Re)create the FTS table, backfill it and install the sync triggers.
+
+    Each field becomes its own FTS column and the per-column weights are
+    stored as the table's persistent ``rank`` function, so ``ORDER BY rank``
+    returns BM25-ranked matches. Every row shares its node's rowid, so the
+    update and delete triggers remove it with a rowid lookup.
+    """
+    cols = _valid_fields(fields)
+    names = ", ".join(f.name for f in cols)
+    new_values = ", ".join(_field_expr(f, "NEW.") for f in cols)
+    cur = conn.cursor()
+    # Full refresh; also replaces older layouts
+    for trigger in FTS_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    cur.execute(f"DROP TABLE IF EXISTS {FTS_TABLE};")
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE {FTS_TABLE}
+        USING fts5(id UNINDEXED, {names}, tokenize='porter');
+        """
+    )
+    # Column 0 is the unindexed id, its weight is irrelevant
+    weights = ", ".join(["0.0", *(repr(float(f.weight)) for f in cols)])
+    cur.execute(
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) VALUES ('rank', ?)",
+        (f"bm25({weights})",),
+    )
+    cur.execute(
+        f"""
+        INSERT INTO {FTS_TABLE} (rowid, id, {names})
+        SELECT rowid, id, {", ".join(_field_expr(f) for f in cols)}
+        FROM nodes;
+        """
+    )
+    # Keep in sync after build
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_ai AFTER INSERT ON nodes BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, id, {names})
+            VALUES (NEW.rowid, NEW.id, {new_values});
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_au AFTER UPDATE ON nodes BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = OLD.rowid;
+            INSERT INTO {FTS_TABLE} (rowid, id, {names})
+            VALUES (NEW.rowid, NEW.id, {new_values});
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_ad AFTER DELETE ON nodes BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = OLD.rowid;
+        END;
+        """
+    )
+    conn.commit()
+
+
+def trigram_present(conn: sqlite3.Connection) -> bool:
+    """Return True when the trigram table for fuzzy search and its triggers exist."""
+    names = {
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?)",
+            (TRIGRAM_TABLE, *TRIGRAM_TRIGGERS),
+        )
+    }
+    return names == {TRIGRAM_TABLE, *TRIGRAM_TRIGGERS} and _rowid_keyed(conn, TRIGRAM_TRIGGERS[1])
+
+
+def build_trigram(
+    conn: sqlite3.Connection, fields: Iterable[FtsField] = DEFAULT_FTS_FIELDS
+) -> None:
+    """(Re)create the trigram-tokenized twin of the FTS table for fuzzy search.
+
+    It has the same columns and BM25 weights as ``nodes_fts`` but indexes
+    every three-character sequence, so substrings of any word and trigram
+    overlap between misspelled words are answered from the index. It is
+    optional: roughly three times the size of ``nodes_fts``, so the runtime
+    only uses it when the pipeline built it.
+    """
+    cols = _valid_fields(fields)
+    names = ", ".join(f.name for f in cols)
+    new_values = ", ".join(_field_expr(f, "NEW.") for f in cols)
+    cur = conn.cursor()
+    for trigger in TRIGRAM_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    cur.execute(f"DROP TABLE IF EXISTS {TRIGRAM_TABLE};")
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE {TRIGRAM_TABLE}
+        USING fts5(id UNINDEXED, {names}, tokenize='trigram remove_diacritics 1');
+        """
+    )
+    weights = ", ".join(["0.0", *(repr(float(f.weight)) for f in cols)])
+    cur.execute(
+        f"INSERT INTO {TRIGRAM_TABLE} ({TRIGRAM_TABLE}, rank) VALUES ('rank', ?)",
+        (f"bm25({weights})",),
+    )
+    cur.execute(
+        f"""
+        INSERT INTO {TRIGRAM_TABLE} (rowid, id, {names})
+        SELECT rowid, id, {", ".join(_field_expr(f) for f in cols)}
+        FROM nodes;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_trigram_ai AFTER INSERT ON nodes BEGIN
+            INSERT INTO {TRIGRAM_TABLE} (rowid, id, {names})
+            VALUES (NEW.rowid, NEW.id, {new_values});
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_trigram_au AFTER UPDATE ON nodes BEGIN
+            DELETE FROM {TRIGRAM_TABLE} WHERE rowid = OLD.rowid;
+            INSERT INTO {TRIGRAM_TABLE} (rowid, id, {names})
+            VALUES (NEW.rowid, NEW.id, {new_values});
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_trigram_ad AFTER DELETE ON nodes BEGIN
+            DELETE FROM {TRIGRAM_TABLE} WHERE rowid = OLD.rowid;
+        END;
+        """
+    )
+    conn.commit()
+
+
+def attribute_expr(name: str, row: str = "") -> str:
+    """Return the ``json_extract`` expression for a node data attribute.
+
+    Queries must use exactly this text for SQLite to match it to the
+    expression index built by ``build_attribute_indexes``.
+    """
+    if not _FIELD_NAME.match(name):
+        raise ValueError(f"invalid attribute name {name!r}")
+    return f"json_extract({row}data, '$.{name}')"
+
+
+def build_attribute_indexes(conn: sqlite3.Connection, names: Iterable[str]) -> None:
+    """Create an expression index on ``nodes`` for each data attribute (idempotent).
+
+    The pipeline passes the primary-key fields declared per entity in the
+    graph schema, so equality filters on them probe an index.
+    """
+    cur = conn.cursor()
+    for name in dict.fromkeys(names):
+        cur.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_nodes_attr_{name} ON nodes({attribute_expr(name)});"
+        )
+    conn.commit()
+
+
+SUGGEST_TABLE = "nodes_suggest"
+SUGGEST_TRIGGERS = ("nodes_suggest_ai", "nodes_suggest_au", "nodes_suggest_ad")
+# First of these present in a node's data becomes its label; the id otherwise
+SUGGEST_LABEL_FIELDS = ("name", "title")
+
+
+def suggest_present(conn: sqlite3.Connection) -> bool:
+    """Return True when the prefix-indexed suggest table and its triggers exist."""
+    names = {
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?)",
+            (SUGGEST_TABLE, *SUGGEST_TRIGGERS),
+        )
+    }
+    return names == {SUGGEST_TABLE, *SUGGEST_TRIGGERS} and _rowid_keyed(conn, SUGGEST_TRIGGERS[1])
+
+
+def _label_expr(row: str = "") -> str:
+    fields = ", ".join(f"json_extract({row}data, '$.{f}')" for f in SUGGEST_LABEL_FIELDS)
+    return f"coalesce({fields}, {row}id)"
+
+
+def build_suggest(conn: sqlite3.Connection) -> None:
+    """(Re)create the typeahead table: one label per node with FTS5 prefix indexes.
+
+    ``prefix='2 3 4'`` stores 2-, 3- and 4-character prefixes of every label
+    token, so ``"gra"*`` style queries read one index range instead of
+    scanning the term list.
+    """
+    cur = conn.cursor()
+    for trigger in SUGGEST_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {trigger};")
+    cur.execute(f"DROP TABLE IF EXISTS {SUGGEST_TABLE};")
+    cur.execute(
+        f"""
+        CREATE VIRTUAL TABLE {SUGGEST_TABLE} USING fts5(
+            id UNINDEXED, type UNINDEXED, label,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        );
+        """
+    )
+    cur.execute(
+        f"""
+        INSERT INTO {SUGGEST_TABLE} (rowid, id, type, label)
+        SELECT rowid, id, type, {_label_expr()} FROM nodes;
+        """
+    )
+    new_row = f"(NEW.rowid, NEW.id, NEW.type, {_label_expr('NEW.')})"
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_suggest_ai AFTER INSERT ON nodes BEGIN
+            INSERT INTO {SUGGEST_TABLE} (rowid, id, type, label) VALUES {new_row};
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_suggest_au AFTER UPDATE ON nodes BEGIN
+            DELETE FROM {SUGGEST_TABLE} WHERE rowid = OLD.rowid;
+            INSERT INTO {SUGGEST_TABLE} (rowid, id, type, label) VALUES {new_row};
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER nodes_suggest_ad AFTER DELETE ON nodes BEGIN
+            DELETE FROM {SUGGEST_TABLE} WHERE rowid = OLD.rowid;
+        END;
+        """
+    )
+    conn.commit()
+
+
+NODE_STATS_TABLE = "node_stats"
+NODE_STATS_TRIGGERS = ("edges_stats_ai", "edges_stats_ad", "edges_stats_au")
+EDGE_RANKS_TABLE = "edge_ranks"
+
+# Rank of edge NEW from the current degrees of its endpoints
+_NEW_EDGE_RANK = """
+    INSERT INTO edge_ranks (id, source, target, rank)
+    VALUES (
+        NEW.id, NEW.source, NEW.target,
+        coalesce((SELECT degree FROM node_stats WHERE id = NEW.source), 0)
+        + coalesce((SELECT degree FROM node_stats WHERE id = NEW.target), 0)
+    )
+    ON CONFLICT(id) DO UPDATE SET
+        source = excluded.source, target = excluded.target, rank = excluded.rank;
+"""
+
+
+def _shift_ranks(node: str, delta: int) -> str:
+    """SQL that moves the rank of every edge at ``node`` by ``delta`` (a degree change).
+
+    A self-loop matches both statements, as its rank counts the degree twice.
+    """
+    return f"""
+        UPDATE edge_ranks SET rank = rank + ({delta}) WHERE source = {node};
+        UPDATE edge_ranks SET rank = rank + ({delta}) WHERE target = {node};
+    """
+
+
+def node_stats_present(conn: sqlite3.Connection) -> bool:
+    """Return True when the degree and edge rank tables and their triggers exist.
+
+    Triggers that do not re-rank the other edges at a changed node (an older
+    layout whose ranks went stale after writes) count as missing.
+    """
+    wanted = {NODE_STATS_TABLE, EDGE_RANKS_TABLE, *NODE_STATS_TRIGGERS}
+    names = {
+        r[0]
+        for r in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ({qs})".format(
+                qs=",".join("?" * len(wanted))
+            ),
+            tuple(wanted),
+        )
+    }
+    return names == wanted and _trigger_has(conn, NODE_STATS_TRIGGERS[0], "UPDATE edge_ranks")
+
+
+def build_node_stats(conn: sqlite3.Connection) -> None:
+    """Materialize per-node degrees and per-edge ranks from ``edges`` and keep them current.
+
+    ``node_stats.degree`` counts every edge where the node is source or
+    target, the same measure the degree-based neighbor ranking uses.
+    ``edge_ranks.rank`` is the sum of an edge's endpoint degrees, indexed
+    per endpoint so the top-k edges of a node are an index range scan. The
+    triggers keep both exact: when an edge changes a node's degree, every
+    other edge at that node is re-ranked through the same indexes, so a
+    write costs the degree of its endpoints.
+    """
+    cur = conn.cursor()
+    # Recreate the triggers so older snapshots pick up the edge rank upkeep
+    for name in NODE_STATS_TRIGGERS:
+        cur.execute(f"DROP TRIGGER IF EXISTS {name};")
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS node_stats (
+            id          TEXT PRIMARY KEY,
+            out_degree  INTEGER NOT NULL DEFAULT 0,
+            in_degree   INTEGER NOT NULL DEFAULT 0,
+            degree      INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+        """
+    )
+    # Full refresh
+    cur.execute("DELETE FROM node_stats;")
+    cur.execute(
+        """
+        INSERT INTO node_stats (id, out_degree, in_degree, degree)
+        SELECT id, SUM(o), SUM(i), SUM(o) + SUM(i)
+        FROM (
+            SELECT source AS id, 1 AS o, 0 AS i FROM edges
+            UNION ALL
+            SELECT target AS id, 0 AS o, 1 AS i FROM edges
+        )
+        GROUP BY id;
+        """
+    )
+    # Indexes are created after the fill, which is cheaper than maintaining them
+    cur.execute(f"DROP TABLE IF EXISTS {EDGE_RANKS_TABLE};")
+    cur.execute(
+        """
+        CREATE TABLE edge_ranks (
+            id      TEXT PRIMARY KEY,
+            source  TEXT NOT NULL,
+            target  TEXT NOT NULL,
+            rank    INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO edge_ranks (id, source, target, rank)
+        SELECT e.id, e.source, e.target, coalesce(s.degree, 0) + coalesce(t.degree, 0)
+        FROM edges e
+        LEFT JOIN node_stats s ON s.id = e.source
+        LEFT JOIN node_stats t ON t.id = e.target
+        WHERE e.id IS NOT NULL AND e.source IS NOT NULL AND e.target IS NOT NULL;
+        """
+    )
+    cur.execute("CREATE INDEX edge_ranks_by_source ON edge_ranks(source, rank DESC, id);")
+    cur.execute("CREATE INDEX edge_ranks_by_target ON edge_ranks(target, rank DESC, id);")
+    # Keep in sync as edges change
+    cur.execute(
+        f"""
+        CREATE TRIGGER edges_stats_ai AFTER INSERT ON edges BEGIN
+            INSERT INTO node_stats (id, out_degree, in_degree, degree)
+            VALUES (NEW.source, 1, 0, 1)
+            ON CONFLICT(id) DO UPDATE SET
+                out_degree = out_degree + 1, degree = degree + 1;
+            INSERT INTO node_stats (id, out_degree, in_degree, degree)
+            VALUES (NEW.target, 0, 1, 1)
+            ON CONFLICT(id) DO UPDATE SET
+                in_degree = in_degree + 1, degree = degree + 1;
+            {_shift_ranks("NEW.source", 1)}
+            {_shift_ranks("NEW.target", 1)}
+            {_NEW_EDGE_RANK}
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER edges_stats_ad AFTER DELETE ON edges BEGIN
+            UPDATE node_stats SET out_degree = out_degree - 1, degree = degree - 1
+            WHERE id = OLD.source;
+            UPDATE node_stats SET in_degree = in_degree - 1, degree = degree - 1
+            WHERE id = OLD.target;
+            DELETE FROM edge_ranks WHERE id = OLD.id;
+            {_shift_ranks("OLD.source", -1)}
+            {_shift_ranks("OLD.target", -1)}
+        END;
+        """
+    )
+    cur.execute(
+        f"""
+        CREATE TRIGGER edges_stats_au
+        AFTER UPDATE OF source, target ON edges BEGIN
+            UPDATE node_stats SET out_degree = out_degree - 1, degree = degree - 1
+            WHERE id = OLD.source;
+            UPDATE node_stats SET in_degree = in_degree - 1, degree = degree - 1
+            WHERE id = OLD.target;
+            DELETE FROM edge_ranks WHERE id = OLD.id;
+            {_shift_ranks("OLD.source", -1)}
+            {_shift_ranks("OLD.target", -1)}
+            INSERT INTO node_stats (id, out_degree, in_degree, degree)
+            VALUES (NEW.source, 1, 0, 1)
+            ON CONFLICT(id) DO UPDATE SET
+                out_degree = out_degree + 1, degree = degree + 1;
+            INSERT INTO node_stats (id, out_degree, in_degree, degree)
+            VALUES (NEW.target, 0, 1, 1)
+            ON CONFLICT(id) DO UPDATE SET
+                in_degree = in_degree + 1, degree = degree + 1;
+            {_shift_ranks("NEW.source", 1)}
+            {_shift_ranks("NEW.target", 1)}
+            {_NEW_EDGE_RANK}
+        END;
+        """
+    )
+    conn.commit()
+
+
+DERIVED_TRIGGERS = (*FTS_TRIGGERS, *TRIGRAM_TRIGGERS, *SUGGEST_TRIGGERS, *NODE_STATS_TRIGGERS)
+
+
+def drop_derived_triggers(conn: sqlite3.Connection) -> None:
+    """Drop the triggers that keep the derived tables in step with ``nodes`` and ``edges``.
+
+    Used before bulk loads; the ``build_*`` functions refill the tables and
+    recreate the triggers afterwards.
+    """
+    for trigger in DERIVED_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger};")
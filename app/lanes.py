@@ -0,0 +1,132 @@
+"""Bounded executors that keep blocking SQLite work off the event loop.
+
+The gRPC service runs every database call on one of two lanes: ``read`` for
+queries and health checks, ``write`` for upserts. Each lane has its own
+thread pool, so a large upsert can occupy the write lane without starving
+queries, and each lane tracks its queue depth. A lane is also a
+``concurrent.futures.Executor``, so synchronous code can hand it side work
+such as the vector scan of a hybrid query.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import weakref
+from collections.abc import Callable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_READ_WORKERS = int(os.getenv("GRPC_DB_READ_WORKERS", "4"))
+DEFAULT_WRITE_WORKERS = int(os.getenv("GRPC_DB_WRITE_WORKERS", "1"))
+
+
+class Lane(Executor):
+    def __init__(self, name: str, workers: int) -> None:
+        self.name = name
+        self.workers = max(1, int(workers))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix=f"db-{name}"
+        )
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._max_queued = 0
+
+    def _run(self, fn: Callable[..., T], args: tuple[Any, ...]) -> T:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    def _enqueue(self) -> None:
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+    def _dequeue_cancelled(self, future: Future[Any]) -> None:
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future[T]:
+        self._enqueue()
+        call = functools.partial(fn, **kwargs) if kwargs else fn
+        try:
+            future = self._executor.submit(self._run, call, args)
+        except RuntimeError:
+            with self._lock:
+                self._queued -= 1
+            raise
+        # A job cancelled before it started never reaches _run
+        future.add_done_callback(self._dequeue_cancelled)
+        return future
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        self._enqueue()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, self._run, fn, args)
+        except RuntimeError:
+            # Executor shut down before the job started
+            with self._lock:
+                self._queued -= 1
+            raise
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "active": self._active,
+                "completed": self._completed,
+                "max_queued": self._max_queued,
+            }
+
+    def shutdown(self, wait: bool = False, *, cancel_futures: bool = True) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+
+class DbLanes:
+    """Separate read and write lanes for database work."""
+
+    def __init__(
+        self,
+        read_workers: int = DEFAULT_READ_WORKERS,
+        write_workers: int = DEFAULT_WRITE_WORKERS,
+    ) -> None:
+        self.read = Lane("read", read_workers)
+        self.write = Lane("write", write_workers)
+        _live.add(self)
+
+    async def run_read(self, fn: Callable[..., T], *args: Any) -> T:
+        return await self.read.run(fn, *args)
+
+    async def run_write(self, fn: Callable[..., T], *args: Any) -> T:
+        return await self.write.run(fn, *args)
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {"read": self.read.stats(), "write": self.write.stats()}
+
+    def shutdown(self) -> None:
+        self.read.shutdown()
+        self.write.shutdown()
+        _live.discard(self)
+
+
+_live: weakref.WeakSet[DbLanes] = weakref.WeakSet()
+
+
+def lane_stats() -> list[dict[str, dict[str, int]]]:
+    """Return per-lane metrics for every live ``DbLanes`` in this process."""
+    return [lanes.stats() for lanes in list(_live)]
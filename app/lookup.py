@@ -0,0 +1,114 @@
+"""Fetch nodes, edges and hyperedges by id.
+
+Each call binds the whole id list as one JSON array and joins it through
+``json_each`` onto the primary key, so a batch costs one statement and one
+index probe per id no matter how many ids it holds. Results keep the order
+of the requested ids; unknown ids are skipped and duplicates returned once.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+from typing import Any
+
+from .indexes import table_exists
+from .query import data_decoder, edge_json, json_string, node_json
+
+MAX_IDS = int(os.getenv("MCP_LOOKUP_MAX_IDS", "1000"))
+
+
+def _id_array(ids: list[str]) -> str:
+    return json.dumps(list(dict.fromkeys(str(i) for i in ids)))
+
+
+def get_nodes(
+    conn: sqlite3.Connection, ids: list[str], *, raw: bool = False
+) -> list[dict[str, Any]]:
+    decode = data_decoder(raw)
+    # CROSS JOIN keeps json_each as the outer loop: one primary-key probe per id
+    rows = conn.execute(
+        """
+        SELECT n.id, n.type, json(n.data) AS data
+        FROM json_each(?) AS j
+        CROSS JOIN nodes AS n ON n.id = j.value
+        ORDER BY j.key
+        """,
+        (_id_array(ids),),
+    ).fetchall()
+    return [{"id": r[0], "type": r[1], "data": decode(r[2])} for r in rows]
+
+
+def get_edges(
+    conn: sqlite3.Connection, ids: list[str], *, raw: bool = False
+) -> list[dict[str, Any]]:
+    decode = data_decoder(raw)
+    rows = conn.execute(
+        """
+        SELECT e.id, e.type, e.source, e.target, json(e.data) AS data
+        FROM json_each(?) AS j
+        CROSS JOIN edges AS e ON e.id = j.value
+        ORDER BY j.key
+        """,
+        (_id_array(ids),),
+    ).fetchall()
+    return [
+        {"id": r[0], "type": r[1], "source": r[2], "target": r[3], "data": decode(r[4])}
+        for r in rows
+    ]
+
+
+def get_hyperedges(
+    conn: sqlite3.Connection, ids: list[str], *, raw: bool = False
+) -> list[dict[str, Any]]:
+    """Return hyperedges with their participants ordered by ``ordinal``."""
+    if not table_exists(conn, "hyperedges"):
+        return []
+    decode = data_decoder(raw)
+    id_array = _id_array(ids)
+    rows = conn.execute(
+        """
+        SELECT h.id, h.type, json(h.data) AS data
+        FROM json_each(?) AS j
+        CROSS JOIN hyperedges AS h ON h.id = j.value
+        ORDER BY j.key
+        """,
+        (id_array,),
+    ).fetchall()
+    out = {r[0]: {"id": r[0], "type": r[1], "data": decode(r[2]), "participants": []} for r in rows}
+    if out and table_exists(conn, "hyperedge_entities"):
+        for hid, entity_id, role, ordinal, data in conn.execute(
+            """
+            SELECT p.hyperedge_id, p.entity_id, p.role, p.ordinal, json(p.data)
+            FROM json_each(?) AS j
+            CROSS JOIN hyperedge_entities AS p ON p.hyperedge_id = j.value
+            ORDER BY j.key, p.ordinal, p.role, p.entity_id
+            """,
+            (id_array,),
+        ):
+            out[hid]["participants"].append(
+                {"entity_id": entity_id, "role": role, "ordinal": ordinal, "data": decode(data)}
+            )
+    return list(out.values())
+
+
+def _hyperedge_json(h: dict[str, Any]) -> str:
+    participants = ",".join(
+        f'{{"entity_id":{json_string(p["entity_id"])},"role":{json_string(p["role"])},'
+        f'"ordinal":{int(p["ordinal"] or 0)},"data":{p["data"]}}}'
+        for p in h["participants"]
+    )
+    return (
+        f'{{"id":{json_string(h["id"])},"type":{json_string(h["type"])},"data":{h["data"]},'
+        f'"participants":[{participants}]}}'
+    )
+
+
+_ENCODERS = {"nodes": node_json, "edges": edge_json, "hyperedges": _hyperedge_json}
+
+
+def encode_lookup_json(kind: str, rows: list[dict[str, Any]]) -> bytes:
+    """Encode raw lookup rows as ``{"<kind>": [...]}`` with ``data`` spliced in."""
+    encode = _ENCODERS[kind]
+    return f'{{"{kind}":[{",".join(encode(r) for r in rows)}]}}'.encode()
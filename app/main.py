@@ -4,16 +4,37 @@ AI assistants: see `.vibe/AI_DEV_INSTRUCTIONS.md` and `.vibe/API_SPEC.md`.
 """
 
 import asyncio
+import itertools
+import json
 import logging
 import os
-import sqlite3
+from collections.abc import Callable, Generator
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from starlette.types import Receive, Scope, Send
 
-from .query import QueryOpts, run_query
+from .adjacency import adjacency_stats, get_adjacency
+from .cache import query_key, result_cache, result_version
+from .embeddings import UnknownNode, VectorsUnavailable, get_vectors, similar, vector_stats
+from .lanes import Lane, lane_stats
+from .lookup import MAX_IDS, encode_lookup_json, get_edges, get_hyperedges, get_nodes
+from .pool import PoolTimeout, pool_stats, read_connection
+from .query import (
+    InvalidQuery,
+    QueryOpts,
+    encode_graph_json,
+    encode_ndjson_lines,
+    iter_query,
+    run_batch,
+    run_query,
+)
+from .snapshot import ensure_snapshot, open_readonly
+from .suggest import suggest
 
 LOGGER_NAME = "mcp"
 DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -41,14 +62,44 @@ def get_logger(name=LOGGER_NAME, level=DEFAULT_LOG_LEVEL):
 logger = get_logger()
 
 DB_PATH = Path(__file__).parent / "db" / "data.db"
+NDJSON = "application/x-ndjson"
+STREAM_CHUNK_SIZE = int(os.getenv("HTTP_STREAM_CHUNK_SIZE", "100"))
+BATCH_MAX_QUERIES = int(os.getenv("MCP_BATCH_MAX_QUERIES", "50"))
+HYBRID_VECTOR_WORKERS = int(os.getenv("HYBRID_VECTOR_WORKERS", "4"))
 
-app = FastAPI(title="FastMCP API")
+# Runs the vector scans of hybrid queries next to their FTS query; created and
+# shut down by the lifespan, without it hybrid queries scan on the request thread
+_vector_lane: Lane | None = None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Check or build search structures once, before the first request
+    state = ensure_snapshot(DB_PATH)
+    # "message" is a reserved LogRecord attribute, so it is logged under another key
+    details = state.as_dict()
+    details["snapshot_message"] = details.pop("message")
+    logger.info("snapshot_ready", extra=details)
+    if state.ready:
+        with read_connection(DB_PATH) as conn:
+            get_adjacency(DB_PATH, conn)
+        get_vectors(DB_PATH)
+    global _vector_lane
+    lane = _vector_lane = Lane("hybrid-vectors", HYBRID_VECTOR_WORKERS)
+    try:
+        yield
+    finally:
+        # Requests still running fall back to scanning on their own thread
+        _vector_lane = None
+        lane.shutdown()
+
+
+app = FastAPI(title="FastMCP API", lifespan=lifespan)
 
 
 def connect():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Open a standalone read-only connection; request handlers use the pool."""
+    return open_readonly(DB_PATH)
 
 
 class Query(BaseModel):
@@ -57,6 +108,11 @@ class Query(BaseModel):
     expand_neighbors: bool = False
     neighbor_budget: int = 0
     neighbor_ranking: str = "degree"  # "degree" or "none"
+    cursor: str | None = None  # next_cursor from the previous page
+    fuzzy: bool = False  # substring / typo-tolerant match via the trigram index
+    types: list[str] = []  # restrict to these node types
+    where: dict[str, str | int | float | bool] = {}  # data attribute equality filters
+    mode: str = "lexical"  # "lexical" or "hybrid" (FTS and vector candidates fused)
 
 
 class GraphNode(BaseModel):
@@ -76,38 +132,198 @@ class GraphEdge(BaseModel):
 class GraphResponse(BaseModel):
     nodes: list[GraphNode]
     edges: list[GraphEdge]
+    next_cursor: str | None = None
+
+
+class HyperedgeParticipant(BaseModel):
+    entity_id: str
+    role: str = ""
+    ordinal: int = 0
+    data: dict[str, Any]
+
+
+class GraphHyperedge(BaseModel):
+    id: str
+    type: str
+    data: dict[str, Any]
+    participants: list[HyperedgeParticipant]
+
+
+class IdsRequest(BaseModel):
+    ids: list[str]
+
+
+class NodesResponse(BaseModel):
+    nodes: list[GraphNode]
+
+
+class EdgesResponse(BaseModel):
+    edges: list[GraphEdge]
+
+
+class HyperedgesResponse(BaseModel):
+    hyperedges: list[GraphHyperedge]
+
+
+class Suggestion(BaseModel):
+    id: str
+    type: str
+    label: str
+
+
+class SuggestResponse(BaseModel):
+    suggestions: list[Suggestion]
+
+
+class SimilarQuery(BaseModel):
+    id: str | None = None  # compare against this node's embedding
+    text: str | None = None  # or against the embedding of this text
+    k: int = 10
+    nprobe: int = 0  # IVF lists to scan; 0 uses the index default, higher is slower but exacter
+
+
+class ScoredNode(GraphNode):
+    score: float
+
+
+class SimilarResponse(BaseModel):
+    nodes: list[ScoredNode]
+
+
+class BatchQuery(BaseModel):
+    queries: list[Query]
+
+
+class BatchResponse(BaseModel):
+    results: list[GraphResponse]
+
+
+def _opts(payload: Query) -> QueryOpts:
+    return QueryOpts(
+        term=payload.query,
+        limit=payload.limit,
+        expand_neighbors=payload.expand_neighbors,
+        neighbor_budget=payload.neighbor_budget,
+        neighbor_ranking=payload.neighbor_ranking,
+        cursor=payload.cursor or None,
+        fuzzy=payload.fuzzy,
+        types=list(payload.types),
+        where=dict(payload.where),
+        mode=payload.mode,
+    )
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "snapshot": ensure_snapshot(DB_PATH).as_dict(),
+        "pool": pool_stats(DB_PATH),
+        "lanes": lane_stats(),
+        "adjacency": adjacency_stats(DB_PATH),
+        "vectors": vector_stats(DB_PATH),
+        "cache": result_cache.stats(),
+    }
 
 
-@app.post("/mcp/query")
-def mcp_query(payload: Query) -> GraphResponse:
+class _ClosingStream(StreamingResponse):
+    """Streaming response that closes its generator however the response ends.
+
+    Starlette stops iterating when the client disconnects but leaves the
+    generator suspended, so its pooled connection would stay checked out until
+    the generator is collected.
+    """
+
+    def __init__(self, lines: Generator[bytes], first: bytes) -> None:
+        super().__init__(itertools.chain([first], lines), media_type=NDJSON)
+        self._lines = lines
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._lines.close()
+
+
+def _stream_ndjson(opts: QueryOpts) -> Generator[bytes]:
+    counts = {"node_count": 0, "edge_count": 0}
+    with read_connection(DB_PATH) as conn:
+        adjacency = get_adjacency(DB_PATH, conn) if opts.expand_neighbors else None
+        for chunk in iter_query(
+            conn,
+            opts,
+            adjacency=adjacency,
+            raw=True,
+            chunk_size=STREAM_CHUNK_SIZE,
+            vectors=get_vectors(DB_PATH) if opts.mode == "hybrid" else None,
+            executor=_vector_lane,
+        ):
+            counts["node_count"] += len(chunk["nodes"])
+            counts["edge_count"] += len(chunk["edges"])
+            try:
+                yield encode_ndjson_lines(chunk)
+            except GeneratorExit:
+                logger.info("mcp_query_stream_closed", extra=counts)
+                raise
+    logger.info("mcp_query_stream_ok", extra=counts)
+
+
+def _ndjson_response(opts: QueryOpts) -> StreamingResponse:
+    lines = _stream_ndjson(opts)
+    try:
+        # Run up to the first rows here so pool and query errors still map to a status
+        first = next(lines, b"")
+    except InvalidQuery as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except PoolTimeout as exc:
+        logger.warning("mcp_query_pool_timeout")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.exception("mcp_query_error")
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return _ClosingStream(lines, first)
+
+
+@app.post(
+    "/mcp/query",
+    response_model=GraphResponse,
+    responses={200: {"content": {NDJSON: {}}}},
+)
+def mcp_query(payload: Query, accept: Annotated[str | None, Header()] = None) -> Response:
+    """Search the graph.
+
+    With ``Accept: application/x-ndjson`` the result is streamed as one
+    ``{"node": ...}`` or ``{"edge": ...}`` object per line, in the same order
+    as the JSON response, while rows come off the cursor.
+    """
     logger.info("mcp_query_start", extra={"query": payload.query})
-    conn = None
+    opts = _opts(payload)
+    if accept and NDJSON in accept:
+        return _ndjson_response(opts)
+    version = result_version(DB_PATH)
+    key = ("json", *query_key(opts))
+    body = result_cache.get(DB_PATH, version, key)
+    if body is not None:
+        logger.info("mcp_query_cache_hit")
+        return Response(content=body, media_type="application/json")
     try:
-        conn = connect()
-        result = run_query(
-            conn,
-            QueryOpts(
-                term=payload.query,
-                limit=payload.limit,
-                expand_neighbors=payload.expand_neighbors,
-                neighbor_budget=payload.neighbor_budget,
-                neighbor_ranking=payload.neighbor_ranking,
-            ),
-        )
+        with read_connection(DB_PATH) as conn:
+            result = run_query(
+                conn,
+                opts,
+                adjacency=get_adjacency(DB_PATH, conn) if payload.expand_neighbors else None,
+                raw=True,
+                vectors=get_vectors(DB_PATH) if opts.mode == "hybrid" else None,
+                executor=_vector_lane,
+            )
+    except InvalidQuery as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except PoolTimeout as exc:
+        logger.warning("mcp_query_pool_timeout")
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
     except Exception as exc:
         logger.exception("mcp_query_error")
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    finally:
-        if conn:
-            try:
-                conn.close()
-            except Exception:
-                pass
     logger.info(
         "mcp_query_ok",
         extra={
@@ -115,10 +331,149 @@ def mcp_query(payload: Query) -> GraphResponse:
             "edge_count": len(result.get("edges", [])),
         },
     )
-    return GraphResponse(
-        nodes=[GraphNode(**n) for n in result.get("nodes", [])],
-        edges=[GraphEdge(**e) for e in result.get("edges", [])],
+    # Stored JSON text is spliced into the body; GraphResponse documents the shape
+    body = encode_graph_json(result)
+    result_cache.put(DB_PATH, version, key, body, len(body))
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/mcp/query:batch", response_model=BatchResponse)
+def mcp_query_batch(payload: BatchQuery) -> Response:
+    """Run several queries against one snapshot and return their results in order.
+
+    Queries not already cached run on one pooled connection inside one read
+    transaction; neighbor rows shared between them are fetched once.
+    """
+    logger.info("mcp_query_batch_start", extra={"query_count": len(payload.queries)})
+    if len(payload.queries) > BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"batch holds {len(payload.queries)} queries, max {BATCH_MAX_QUERIES}",
+        )
+    all_opts = [_opts(q) for q in payload.queries]
+    version = result_version(DB_PATH)
+    keys = [("json", *query_key(opts)) for opts in all_opts]
+    bodies: list[bytes | None] = [result_cache.get(DB_PATH, version, key) for key in keys]
+    pending = [i for i, body in enumerate(bodies) if body is None]
+    if pending:
+        todo = [all_opts[i] for i in pending]
+        try:
+            with read_connection(DB_PATH) as conn:
+                expand = any(opts.expand_neighbors for opts in todo)
+                hybrid = any(opts.mode == "hybrid" for opts in todo)
+                results = run_batch(
+                    conn,
+                    todo,
+                    adjacency=get_adjacency(DB_PATH, conn) if expand else None,
+                    raw=True,
+                    vectors=get_vectors(DB_PATH) if hybrid else None,
+                    executor=_vector_lane,
+                )
+        except InvalidQuery as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except PoolTimeout as exc:
+            logger.warning("mcp_query_pool_timeout")
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        except Exception as exc:
+            logger.exception("mcp_query_batch_error")
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        for i, result in zip(pending, results, strict=True):
+            body = encode_graph_json(result)
+            result_cache.put(DB_PATH, version, keys[i], body, len(body))
+            bodies[i] = body
+    logger.info(
+        "mcp_query_batch_ok",
+        extra={"query_count": len(bodies), "cached": len(bodies) - len(pending)},
     )
+    content = b'{"results":[' + b",".join(b for b in bodies if b is not None) + b"]}"
+    return Response(content=content, media_type="application/json")
+
+
+def _lookup(kind: str, fetch: Callable[..., list[dict[str, Any]]], ids: list[str]) -> Response:
+    if len(ids) > MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"request holds {len(ids)} ids, max {MAX_IDS}")
+    try:
+        with read_connection(DB_PATH) as conn:
+            rows = fetch(conn, ids, raw=True)
+    except PoolTimeout as exc:
+        logger.warning("mcp_lookup_pool_timeout", extra={"kind": kind})
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.exception("mcp_lookup_error", extra={"kind": kind})
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    logger.info("mcp_lookup_ok", extra={"kind": kind, "requested": len(ids), "found": len(rows)})
+    return Response(content=encode_lookup_json(kind, rows), media_type="application/json")
+
+
+@app.post("/mcp/nodes:get", response_model=NodesResponse)
+def mcp_get_nodes(payload: IdsRequest) -> Response:
+    """Fetch nodes by id, in request order; unknown ids are skipped."""
+    return _lookup("nodes", get_nodes, payload.ids)
+
+
+@app.post("/mcp/edges:get", response_model=EdgesResponse)
+def mcp_get_edges(payload: IdsRequest) -> Response:
+    """Fetch edges by id, in request order; unknown ids are skipped."""
+    return _lookup("edges", get_edges, payload.ids)
+
+
+@app.post("/mcp/hyperedges:get", response_model=HyperedgesResponse)
+def mcp_get_hyperedges(payload: IdsRequest) -> Response:
+    """Fetch hyperedges and their participants by id, in request order."""
+    return _lookup("hyperedges", get_hyperedges, payload.ids)
+
+
+@app.get("/mcp/suggest", response_model=SuggestResponse)
+def mcp_suggest(q: str = "", limit: int = 10) -> Response:
+    """Typeahead: nodes whose name or title starts with the typed words."""
+    version = result_version(DB_PATH)
+    key = ("suggest", q, limit)
+    body = result_cache.get(DB_PATH, version, key)
+    if body is None:
+        try:
+            with read_connection(DB_PATH) as conn:
+                rows = suggest(conn, q, limit)
+        except PoolTimeout as exc:
+            logger.warning("mcp_suggest_pool_timeout")
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        except Exception as exc:
+            logger.exception("mcp_suggest_error")
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        body = json.dumps({"suggestions": rows}, separators=(",", ":")).encode()
+        result_cache.put(DB_PATH, version, key, body, len(body))
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/mcp/similar", response_model=SimilarResponse)
+def mcp_similar(payload: SimilarQuery) -> Response:
+    """Top-k nodes by embedding cosine similarity to a node (``id``) or a ``text``."""
+    if (payload.id is None) == (payload.text is None):
+        raise HTTPException(status_code=400, detail="pass exactly one of id or text")
+    version = result_version(DB_PATH)
+    key = ("similar", payload.id, payload.text, payload.k, payload.nprobe)
+    body = result_cache.get(DB_PATH, version, key)
+    if body is None:
+        try:
+            with read_connection(DB_PATH) as conn:
+                rows = similar(
+                    conn,
+                    get_vectors(DB_PATH),
+                    node_id=payload.id,
+                    text=payload.text,
+                    k=payload.k,
+                    nprobe=payload.nprobe,
+                )
+        except UnknownNode as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except (PoolTimeout, VectorsUnavailable) as exc:
+            logger.warning("mcp_similar_unavailable", extra={"error": str(exc)})
+            raise HTTPException(status_code=503, detail=str(exc)) from exc
+        except Exception as exc:
+            logger.exception("mcp_similar_error")
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        body = json.dumps({"nodes": rows}, separators=(",", ":")).encode()
+        result_cache.put(DB_PATH, version, key, body, len(body))
+    return Response(content=body, media_type="application/json")
 
 
 # Optional: start gRPC server when running under uvicorn, if enabled by env
@@ -22,47 +22,74 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
+from google.protobuf import struct_pb2 as google_dot_protobuf_dot_struct__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tmcp.proto\x12\x03mcp\"\x14\n\x06NodeId\x12\n\n\x02id\x18\x01 \x01(\t\"\x14\n\x06\x45\x64geId\x12\n\n\x02id\x18\x01 \x01(\t\"\x19\n\x0bHyperedgeId\x12\n\n\x02id\x18\x01 \x01(\t\"\x13\n\x04Json\x12\x0b\n\x03raw\x18\x01 \x01(\t\"9\n\x04Node\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x03 \x01(\x0b\x32\t.mcp.Json\"Y\n\x04\x45\x64ge\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x0e\n\x06source\x18\x03 \x01(\t\x12\x0e\n\x06target\x18\x04 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x05 \x01(\x0b\x32\t.mcp.Json\"C\n\x0fHyperedgeEntity\x12\x11\n\tentity_id\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\t\x12\x0f\n\x07ordinal\x18\x03 \x01(\x05\"j\n\tHyperedge\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x03 \x01(\x0b\x32\t.mcp.Json\x12*\n\x0cparticipants\x18\x04 \x03(\x0b\x32\x14.mcp.HyperedgeEntity\"_\n\x0cQueryRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x18\n\x10\x65xpand_neighbors\x18\x03 \x01(\x08\x12\x17\n\x0fneighbor_budget\x18\x04 \x01(\x05\"e\n\x0bQueryResult\x12\x18\n\x05nodes\x18\x01 \x03(\x0b\x32\t.mcp.Node\x12\x18\n\x05\x65\x64ges\x18\x02 \x03(\x0b\x32\t.mcp.Edge\x12\"\n\nhyperedges\x18\x03 \x03(\x0b\x32\x0e.mcp.Hyperedge\".\n\x12UpsertNodesRequest\x12\x18\n\x05nodes\x18\x01 \x03(\x0b\x32\t.mcp.Node\".\n\x12UpsertEdgesRequest\x12\x18\n\x05\x65\x64ges\x18\x01 \x03(\x0b\x32\t.mcp.Edge\"=\n\x17UpsertHyperedgesRequest\x12\"\n\nhyperedges\x18\x01 \x03(\x0b\x32\x0e.mcp.Hyperedge\"\"\n\x03\x41\x63k\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x0f\n\rHealthRequest\"+\n\x0cHealthStatus\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\x8d\x02\n\nMcpService\x12/\n\x06Health\x12\x12.mcp.HealthRequest\x1a\x11.mcp.HealthStatus\x12.\n\x05Query\x12\x11.mcp.QueryRequest\x1a\x10.mcp.QueryResult0\x01\x12\x30\n\x0bUpsertNodes\x12\x17.mcp.UpsertNodesRequest\x1a\x08.mcp.Ack\x12\x30\n\x0bUpsertEdges\x12\x17.mcp.UpsertEdgesRequest\x1a\x08.mcp.Ack\x12:\n\x10UpsertHyperedges\x12\x1c.mcp.UpsertHyperedgesRequest\x1a\x08.mcp.Ackb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\tmcp.proto\x12\x03mcp\x1a\x1cgoogle/protobuf/struct.proto\"\x14\n\x06NodeId\x12\n\n\x02id\x18\x01 \x01(\t\"\x14\n\x06\x45\x64geId\x12\n\n\x02id\x18\x01 \x01(\t\"\x19\n\x0bHyperedgeId\x12\n\n\x02id\x18\x01 \x01(\t\"\x13\n\x04Json\x12\x0b\n\x03raw\x18\x01 \x01(\t\"9\n\x04Node\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x03 \x01(\x0b\x32\t.mcp.Json\"Y\n\x04\x45\x64ge\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x0e\n\x06source\x18\x03 \x01(\t\x12\x0e\n\x06target\x18\x04 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x05 \x01(\x0b\x32\t.mcp.Json\"C\n\x0fHyperedgeEntity\x12\x11\n\tentity_id\x18\x01 \x01(\t\x12\x0c\n\x04role\x18\x02 \x01(\t\x12\x0f\n\x07ordinal\x18\x03 \x01(\x05\"j\n\tHyperedge\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\x17\n\x04\x64\x61ta\x18\x03 \x01(\x0b\x32\t.mcp.Json\x12*\n\x0cparticipants\x18\x04 \x03(\x0b\x32\x14.mcp.HyperedgeEntity\"\xa8\x02\n\x0cQueryRequest\x12\r\n\x05query\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x18\n\x10\x65xpand_neighbors\x18\x03 \x01(\x08\x12\x17\n\x0fneighbor_budget\x18\x04 \x01(\x05\x12\x12\n\nchunk_size\x18\x05 \x01(\x05\x12\x0e\n\x06\x63ursor\x18\x06 \x01(\t\x12\r\n\x05\x66uzzy\x18\x07 \x01(\x08\x12\r\n\x05types\x18\x08 \x03(\t\x12+\n\x05where\x18\x0b \x03(\x0b\x32\x1c.mcp.QueryRequest.WhereEntry\x12\x0c\n\x04mode\x18\n \x01(\t\x1a\x44\n\nWhereEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12%\n\x05value\x18\x02 \x01(\x0b\x32\x16.google.protobuf.Value:\x02\x38\x01J\x04\x08\t\x10\n\"z\n\x0bQueryResult\x12\x18\n\x05nodes\x18\x01 \x03(\x0b\x32\t.mcp.Node\x12\x18\n\x05\x65\x64ges\x18\x02 \x03(\x0b\x32\t.mcp.Edge\x12\"\n\nhyperedges\x18\x03 \x03(\x0b\x32\x0e.mcp.Hyperedge\x12\x13\n\x0bnext_cursor\x18\x04 \x01(\t\"7\n\x11\x42\x61tchQueryRequest\x12\"\n\x07queries\x18\x01 \x03(\x0b\x32\x11.mcp.QueryRequest\"5\n\x10\x42\x61tchQueryResult\x12!\n\x07results\x18\x01 \x03(\x0b\x32\x10.mcp.QueryResult\"+\n\x0fGetNodesRequest\x12\x18\n\x03ids\x18\x01 \x03(\x0b\x32\x0b.mcp.NodeId\"+\n\x0fGetEdgesRequest\x12\x18\n\x03ids\x18\x01 \x03(\x0b\x32\x0b.mcp.EdgeId\"5\n\x14GetHyperedgesRequest\x12\x1d\n\x03ids\x18\x01 \x03(\x0b\x32\x10.mcp.HyperedgeId\"/\n\x0eSuggestRequest\x12\x0e\n\x06prefix\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\"5\n\nSuggestion\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\r\n\x05label\x18\x03 \x01(\t\"5\n\rSuggestResult\x12$\n\x0bsuggestions\x18\x01 \x03(\x0b\x32\x0f.mcp.Suggestion\"E\n\x0eSimilarRequest\x12\n\n\x02id\x18\x01 \x01(\t\x12\x0c\n\x04text\x18\x02 \x01(\t\x12\t\n\x01k\x18\x03 \x01(\x05\x12\x0e\n\x06nprobe\x18\x04 \x01(\x05\"4\n\nScoredNode\x12\x17\n\x04node\x18\x01 \x01(\x0b\x32\t.mcp.Node\x12\r\n\x05score\x18\x02 \x01(\x02\"/\n\rSimilarResult\x12\x1e\n\x05nodes\x18\x01 \x03(\x0b\x32\x0f.mcp.ScoredNode\".\n\x12UpsertNodesRequest\x12\x18\n\x05nodes\x18\x01 \x03(\x0b\x32\t.mcp.Node\".\n\x12UpsertEdgesRequest\x12\x18\n\x05\x65\x64ges\x18\x01 \x03(\x0b\x32\t.mcp.Edge\"[\n\x17UpsertHyperedgesRequest\x12\"\n\nhyperedges\x18\x01 \x03(\x0b\x32\x0e.mcp.Hyperedge\x12\x1c\n\x14replace_participants\x18\x02 \x01(\x08\"\"\n\x03\x41\x63k\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x0f\n\rHealthRequest\"+\n\x0cHealthStatus\x12\n\n\x02ok\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t2\xd8\x04\n\nMcpService\x12/\n\x06Health\x12\x12.mcp.HealthRequest\x1a\x11.mcp.HealthStatus\x12.\n\x05Query\x12\x11.mcp.QueryRequest\x1a\x10.mcp.QueryResult0\x01\x12;\n\nBatchQuery\x12\x16.mcp.BatchQueryRequest\x1a\x15.mcp.BatchQueryResult\x12\x32\n\x08GetNodes\x12\x14.mcp.GetNodesRequest\x1a\x10.mcp.QueryResult\x12\x32\n\x08GetEdges\x12\x14.mcp.GetEdgesRequest\x1a\x10.mcp.QueryResult\x12<\n\rGetHyperedges\x12\x19.mcp.GetHyperedgesRequest\x1a\x10.mcp.QueryResult\x12\x32\n\x07Suggest\x12\x13.mcp.SuggestRequest\x1a\x12.mcp.SuggestResult\x12\x32\n\x07Similar\x12\x13.mcp.SimilarRequest\x1a\x12.mcp.SimilarResult\x12\x30\n\x0bUpsertNodes\x12\x17.mcp.UpsertNodesRequest\x1a\x08.mcp.Ack\x12\x30\n\x0bUpsertEdges\x12\x17.mcp.UpsertEdgesRequest\x1a\x08.mcp.Ack\x12:\n\x10UpsertHyperedges\x12\x1c.mcp.UpsertHyperedgesRequest\x1a\x08.mcp.Ackb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'mcp_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_NODEID']._serialized_start=18
-  _globals['_NODEID']._serialized_end=38
-  _globals['_EDGEID']._serialized_start=40
-  _globals['_EDGEID']._serialized_end=60
-  _globals['_HYPEREDGEID']._serialized_start=62
-  _globals['_HYPEREDGEID']._serialized_end=87
-  _globals['_JSON']._serialized_start=89
-  _globals['_JSON']._serialized_end=108
-  _globals['_NODE']._serialized_start=110
-  _globals['_NODE']._serialized_end=167
-  _globals['_EDGE']._serialized_start=169
-  _globals['_EDGE']._serialized_end=258
-  _globals['_HYPEREDGEENTITY']._serialized_start=260
-  _globals['_HYPEREDGEENTITY']._serialized_end=327
-  _globals['_HYPEREDGE']._serialized_start=329
-  _globals['_HYPEREDGE']._serialized_end=435
-  _globals['_QUERYREQUEST']._serialized_start=437
-  _globals['_QUERYREQUEST']._serialized_end=532
-  _globals['_QUERYRESULT']._serialized_start=534
-  _globals['_QUERYRESULT']._serialized_end=635
-  _globals['_UPSERTNODESREQUEST']._serialized_start=637
-  _globals['_UPSERTNODESREQUEST']._serialized_end=683
-  _globals['_UPSERTEDGESREQUEST']._serialized_start=685
-  _globals['_UPSERTEDGESREQUEST']._serialized_end=731
-  _globals['_UPSERTHYPEREDGESREQUEST']._serialized_start=733
-  _globals['_UPSERTHYPEREDGESREQUEST']._serialized_end=794
-  _globals['_ACK']._serialized_start=796
-  _globals['_ACK']._serialized_end=830
-  _globals['_HEALTHREQUEST']._serialized_start=832
-  _globals['_HEALTHREQUEST']._serialized_end=847
-  _globals['_HEALTHSTATUS']._serialized_start=849
-  _globals['_HEALTHSTATUS']._serialized_end=892
-  _globals['_MCPSERVICE']._serialized_start=895
-  _globals['_MCPSERVICE']._serialized_end=1164
+  _globals['_QUERYREQUEST_WHEREENTRY']._loaded_options = None
+  _globals['_QUERYREQUEST_WHEREENTRY']._serialized_options = b'8\001'
+  _globals['_NODEID']._serialized_start=48
+  _globals['_NODEID']._serialized_end=68
+  _globals['_EDGEID']._serialized_start=70
+  _globals['_EDGEID']._serialized_end=90
+  _globals['_HYPEREDGEID']._serialized_start=92
+  _globals['_HYPEREDGEID']._serialized_end=117
+  _globals['_JSON']._serialized_start=119
+  _globals['_JSON']._serialized_end=138
+  _globals['_NODE']._serialized_start=140
+  _globals['_NODE']._serialized_end=197
+  _globals['_EDGE']._serialized_start=199
+  _globals['_EDGE']._serialized_end=288
+  _globals['_HYPEREDGEENTITY']._serialized_start=290
+  _globals['_HYPEREDGEENTITY']._serialized_end=357
+  _globals['_HYPEREDGE']._serialized_start=359
+  _globals['_HYPEREDGE']._serialized_end=465
+  _globals['_QUERYREQUEST']._serialized_start=468
+  _globals['_QUERYREQUEST']._serialized_end=764
+  _globals['_QUERYREQUEST_WHEREENTRY']._serialized_start=690
+  _globals['_QUERYREQUEST_WHEREENTRY']._serialized_end=758
+  _globals['_QUERYRESULT']._serialized_start=766
+  _globals['_QUERYRESULT']._serialized_end=888
+  _globals['_BATCHQUERYREQUEST']._serialized_start=890
+  _globals['_BATCHQUERYREQUEST']._serialized_end=945
+  _globals['_BATCHQUERYRESULT']._serialized_start=947
+  _globals['_BATCHQUERYRESULT']._serialized_end=1000
+  _globals['_GETNODESREQUEST']._serialized_start=1002
+  _globals['_GETNODESREQUEST']._serialized_end=1045
+  _globals['_GETEDGESREQUEST']._serialized_start=1047
+  _globals['_GETEDGESREQUEST']._serialized_end=1090
+  _globals['_GETHYPEREDGESREQUEST']._serialized_start=1092
+  _globals['_GETHYPEREDGESREQUEST']._serialized_end=1145
+  _globals['_SUGGESTREQUEST']._serialized_start=1147
+  _globals['_SUGGESTREQUEST']._serialized_end=1194
+  _globals['_SUGGESTION']._serialized_start=1196
+  _globals['_SUGGESTION']._serialized_end=1249
+  _globals['_SUGGESTRESULT']._serialized_start=1251
+  _globals['_SUGGESTRESULT']._serialized_end=1304
+  _globals['_SIMILARREQUEST']._serialized_start=1306
+  _globals['_SIMILARREQUEST']._serialized_end=1375
+  _globals['_SCOREDNODE']._serialized_start=1377
+  _globals['_SCOREDNODE']._serialized_end=1429
+  _globals['_SIMILARRESULT']._serialized_start=1431
+  _globals['_SIMILARRESULT']._serialized_end=1478
+  _globals['_UPSERTNODESREQUEST']._serialized_start=1480
+  _globals['_UPSERTNODESREQUEST']._serialized_end=1526
+  _globals['_UPSERTEDGESREQUEST']._serialized_start=1528
+  _globals['_UPSERTEDGESREQUEST']._serialized_end=1574
+  _globals['_UPSERTHYPEREDGESREQUEST']._serialized_start=1576
+  _globals['_UPSERTHYPEREDGESREQUEST']._serialized_end=1667
+  _globals['_ACK']._serialized_start=1669
+  _globals['_ACK']._serialized_end=1703
+  _globals['_HEALTHREQUEST']._serialized_start=1705
+  _globals['_HEALTHREQUEST']._serialized_end=1720
+  _globals['_HEALTHSTATUS']._serialized_start=1722
+  _globals['_HEALTHSTATUS']._serialized_end=1765
+  _globals['_MCPSERVICE']._serialized_start=1768
+  _globals['_MCPSERVICE']._serialized_end=2368
 # @@protoc_insertion_point(module_scope)
@@ -44,6 +44,36 @@ class McpServiceStub(object):
                 request_serializer=mcp__pb2.QueryRequest.SerializeToString,
                 response_deserializer=mcp__pb2.QueryResult.FromString,
                 _registered_method=True)
+        self.BatchQuery = channel.unary_unary(
+                '/mcp.McpService/BatchQuery',
+                request_serializer=mcp__pb2.BatchQueryRequest.SerializeToString,
+                response_deserializer=mcp__pb2.BatchQueryResult.FromString,
+                _registered_method=True)
+        self.GetNodes = channel.unary_unary(
+                '/mcp.McpService/GetNodes',
+                request_serializer=mcp__pb2.GetNodesRequest.SerializeToString,
+                response_deserializer=mcp__pb2.QueryResult.FromString,
+                _registered_method=True)
+        self.GetEdges = channel.unary_unary(
+                '/mcp.McpService/GetEdges',
+                request_serializer=mcp__pb2.GetEdgesRequest.SerializeToString,
+                response_deserializer=mcp__pb2.QueryResult.FromString,
+                _registered_method=True)
+        self.GetHyperedges = channel.unary_unary(
+                '/mcp.McpService/GetHyperedges',
+                request_serializer=mcp__pb2.GetHyperedgesRequest.SerializeToString,
+                response_deserializer=mcp__pb2.QueryResult.FromString,
+                _registered_method=True)
+        self.Suggest = channel.unary_unary(
+                '/mcp.McpService/Suggest',
+                request_serializer=mcp__pb2.SuggestRequest.SerializeToString,
+                response_deserializer=mcp__pb2.SuggestResult.FromString,
+                _registered_method=True)
+        self.Similar = channel.unary_unary(
+                '/mcp.McpService/Similar',
+                request_serializer=mcp__pb2.SimilarRequest.SerializeToString,
+                response_deserializer=mcp__pb2.SimilarResult.FromString,
+                _registered_method=True)
         self.UpsertNodes = channel.unary_unary(
                 '/mcp.McpService/UpsertNodes',
                 request_serializer=mcp__pb2.UpsertNodesRequest.SerializeToString,
@@ -76,6 +106,42 @@ class McpServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchQuery(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetNodes(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetEdges(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetHyperedges(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Suggest(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def Similar(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def UpsertNodes(self, request, context):
         """Missing associated documentation comment in .proto file."""
         context.set_code(grpc.StatusCode.UNIMPLEMENTED)
@@ -107,6 +173,36 @@ def add_McpServiceServicer_to_server(servicer, server):
                     request_deserializer=mcp__pb2.QueryRequest.FromString,
                     response_serializer=mcp__pb2.QueryResult.SerializeToString,
             ),
+            'BatchQuery': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchQuery,
+                    request_deserializer=mcp__pb2.BatchQueryRequest.FromString,
+                    response_serializer=mcp__pb2.BatchQueryResult.SerializeToString,
+            ),
+            'GetNodes': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetNodes,
+                    request_deserializer=mcp__pb2.GetNodesRequest.FromString,
+                    response_serializer=mcp__pb2.QueryResult.SerializeToString,
+            ),
+            'GetEdges': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetEdges,
+                    request_deserializer=mcp__pb2.GetEdgesRequest.FromString,
+                    response_serializer=mcp__pb2.QueryResult.SerializeToString,
+            ),
+            'GetHyperedges': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetHyperedges,
+                    request_deserializer=mcp__pb2.GetHyperedgesRequest.FromString,
+                    response_serializer=mcp__pb2.QueryResult.SerializeToString,
+            ),
+            'Suggest': grpc.unary_unary_rpc_method_handler(
+                    servicer.Suggest,
+                    request_deserializer=mcp__pb2.SuggestRequest.FromString,
+                    response_serializer=mcp__pb2.SuggestResult.SerializeToString,
+            ),
+            'Similar': grpc.unary_unary_rpc_method_handler(
+                    servicer.Similar,
+                    request_deserializer=mcp__pb2.SimilarRequest.FromString,
+                    response_serializer=mcp__pb2.SimilarResult.SerializeToString,
+            ),
             'UpsertNodes': grpc.unary_unary_rpc_method_handler(
                     servicer.UpsertNodes,
                     request_deserializer=mcp__pb2.UpsertNodesRequest.FromString,
@@ -187,6 +283,168 @@ class McpService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchQuery(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/BatchQuery',
+            mcp__pb2.BatchQueryRequest.SerializeToString,
+            mcp__pb2.BatchQueryResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetNodes(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/GetNodes',
+            mcp__pb2.GetNodesRequest.SerializeToString,
+            mcp__pb2.QueryResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetEdges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/GetEdges',
+            mcp__pb2.GetEdgesRequest.SerializeToString,
+            mcp__pb2.QueryResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetHyperedges(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/GetHyperedges',
+            mcp__pb2.GetHyperedgesRequest.SerializeToString,
+            mcp__pb2.QueryResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Suggest(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/Suggest',
+            mcp__pb2.SuggestRequest.SerializeToString,
+            mcp__pb2.SuggestResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def Similar(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/mcp.McpService/Similar',
+            mcp__pb2.SimilarRequest.SerializeToString,
+            mcp__pb2.SimilarResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def UpsertNodes(request,
             target,
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import json as _json
+import json
 import logging
+import os
 import sqlite3
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Generator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -11,10 +12,22 @@ from typing import Any
 import grpc
 
 from . import mcp_pb2, mcp_pb2_grpc
-from .query import QueryOpts, run_query
+from .adjacency import get_adjacency, note_write
+from .cache import query_key, result_cache, result_version
+from .embeddings import UnknownNode, VectorsUnavailable, get_vectors, similar
+from .hyperedges import HYPEREDGE_BATCH, HyperedgeRow, ParticipantRow, write_hyperedge_batch
+from .lanes import DbLanes
+from .lookup import MAX_IDS, get_edges, get_hyperedges, get_nodes
+from .pool import read_connection
+from .query import InvalidQuery, QueryOpts, iter_query, run_batch
+from .snapshot import ensure_snapshot, mark_changed, snapshot_version
+from .suggest import suggest
 
 logger = logging.getLogger("mcp.grpc")
 
+QUERY_CHUNK_SIZE = int(os.getenv("GRPC_QUERY_CHUNK_SIZE", "100"))
+BATCH_MAX_QUERIES = int(os.getenv("MCP_BATCH_MAX_QUERIES", "50"))
+
 
 @dataclass
 class QueryOptions:
@@ -32,74 +45,302 @@ def _row_to_node(row: sqlite3.Row) -> Any:
     )
 
 
+def _result_message(chunk: dict[str, Any]) -> Any:
+    """Build a ``QueryResult`` from a raw ``iter_query`` chunk."""
+    pb2_any: Any = mcp_pb2
+    nodes = [
+        pb2_any.Node(id=n["id"], type=n["type"], data=pb2_any.Json(raw=n["data"]))
+        for n in chunk["nodes"]
+    ]
+    edges = [
+        pb2_any.Edge(
+            id=e["id"],
+            type=e["type"],
+            source=e["source"],
+            target=e["target"],
+            data=pb2_any.Json(raw=e["data"]),
+        )
+        for e in chunk["edges"]
+    ]
+    return pb2_any.QueryResult(nodes=nodes, edges=edges, next_cursor=chunk.get("next_cursor") or "")
+
+
+def _hyperedge_message(h: dict[str, Any]) -> Any:
+    pb2_any: Any = mcp_pb2
+    return pb2_any.Hyperedge(
+        id=h["id"],
+        type=h["type"],
+        data=pb2_any.Json(raw=h["data"]),
+        participants=[
+            pb2_any.HyperedgeEntity(
+                entity_id=p["entity_id"], role=p["role"] or "", ordinal=int(p["ordinal"] or 0)
+            )
+            for p in h["participants"]
+        ],
+    )
+
+
+def _filter_value(value: Any) -> Any:
+    """Return a ``google.protobuf.Value`` filter as the Python value HTTP would pass."""
+    kind = value.WhichOneof("kind")
+    if kind == "number_value":
+        number = value.number_value
+        # Integral numbers compare against JSON integers as ints
+        return int(number) if number.is_integer() else number
+    if kind in ("string_value", "bool_value"):
+        return getattr(value, kind)
+    return None  # null, list or struct; _filter_sql rejects it
+
+
+def _request_opts(request: Any) -> QueryOpts:
+    return QueryOpts(
+        term=str(request.query or ""),
+        limit=request.limit or 10,
+        expand_neighbors=bool(getattr(request, "expand_neighbors", False)),
+        neighbor_budget=int(getattr(request, "neighbor_budget", 0) or 0),
+        cursor=str(getattr(request, "cursor", "") or "") or None,
+        fuzzy=bool(getattr(request, "fuzzy", False)),
+        types=list(getattr(request, "types", ())),
+        where={k: _filter_value(v) for k, v in getattr(request, "where", {}).items()},
+        mode=str(getattr(request, "mode", "") or "") or "lexical",
+    )
+
+
 class McpService(mcp_pb2_grpc.McpServiceServicer):
-    def __init__(self, db_path: Path) -> None:
+    """gRPC handlers; all SQLite work runs on the read or write lane, never the loop."""
+
+    def __init__(self, db_path: Path, lanes: DbLanes | None = None) -> None:
         self.db_path = db_path
+        self.lanes = lanes or DbLanes()
 
     def _connect(self) -> sqlite3.Connection:
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def _health_sync(self) -> str:
+        # Simple check: borrow a pooled connection and query sqlite version
+        with read_connection(self.db_path) as conn:
+            conn.execute("SELECT sqlite_version()")
+        state = ensure_snapshot(self.db_path)
+        return "ok" if state.ready else f"not ready: {state.message}"
+
     async def Health(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
         try:
-            # Simple check: try to open a connection and query sqlite version
-            conn = self._connect()
-            conn.execute("SELECT sqlite_version()")
-            return mcp_pb2.HealthStatus(ok=True, message="ok")  # type: ignore[attr-defined]
+            message = await self.lanes.run_read(self._health_sync)
+            return mcp_pb2.HealthStatus(ok=True, message=message)  # type: ignore[attr-defined]
         except Exception as exc:  # pragma: no cover
             return mcp_pb2.HealthStatus(ok=False, message=str(exc))  # type: ignore[attr-defined]
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
-    async def Query(self, request: Any, context: grpc.aio.ServicerContext) -> AsyncIterator[Any]:
-        # Very simple baseline: search nodes by LIKE on JSON data
-        limit = request.limit or 10
-        # opts retained for future expansion (neighbors/FTS), avoid unused for now
-        try:
-            conn = self._connect()
-            result = run_query(
+    def _query_chunks(self, request: Any) -> Generator[Any]:
+        """Yield ``QueryResult`` chunks; ``Query`` steps it on the read lane."""
+        opts = _request_opts(request)
+        chunk_size = int(getattr(request, "chunk_size", 0) or 0) or QUERY_CHUNK_SIZE
+        version = result_version(self.db_path)
+        key = ("grpc", chunk_size, *query_key(opts))
+        cached = result_cache.get(self.db_path, version, key)
+        if cached is not None:
+            yield from cached
+            return
+        # Keep the chunks for the cache only while they fit in one entry, so a
+        # large stream holds no more than max_entry_bytes beyond its chunk
+        kept: list[Any] | None = []
+        size = 0
+        with read_connection(self.db_path) as conn:
+            chunks = iter_query(
                 conn,
-                QueryOpts(
-                    term=str(request.query or ""),
-                    limit=limit,
-                    expand_neighbors=bool(getattr(request, "expand_neighbors", False)),
-                    neighbor_budget=int(getattr(request, "neighbor_budget", 0) or 0),
-                ),
+                opts,
+                adjacency=get_adjacency(self.db_path, conn) if opts.expand_neighbors else None,
+                raw=True,
+                chunk_size=chunk_size,
+                vectors=get_vectors(self.db_path) if opts.mode == "hybrid" else None,
+                executor=self.lanes.read,
             )
-            pb2_any: Any = mcp_pb2
-            nodes = [
-                pb2_any.Node(
-                    id=n["id"], type=n["type"], data=pb2_any.Json(raw=_json.dumps(n["data"]))
+            for chunk in chunks:
+                message = _result_message(chunk)
+                if kept is not None:
+                    size += message.ByteSize()
+                    if size <= result_cache.max_entry_bytes:
+                        kept.append(message)
+                    else:
+                        kept = None
+                yield message
+        if kept == []:
+            # Always answer with at least one (empty) result
+            kept = [_result_message({"nodes": [], "edges": []})]
+            yield kept[0]
+        if kept is not None:
+            result_cache.put(self.db_path, version, key, kept, size)
+
+    async def Query(self, request: Any, context: grpc.aio.ServicerContext) -> AsyncIterator[Any]:
+        chunks = self._query_chunks(request)
+        try:
+            while True:
+                message = await self.lanes.run_read(next, chunks, None)
+                if message is None:
+                    break
+                yield message
+        except InvalidQuery as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(exc))
+        except Exception as exc:  # pragma: no cover - mapped to gRPC status
+            logger.exception("grpc_query_error")
+            await context.abort(grpc.StatusCode.INTERNAL, str(exc))
+        finally:
+            # Returns the pooled connection if the client went away mid-stream
+            chunks.close()
+
+    def _batch_query_sync(self, request: Any) -> Any:
+        all_opts = [_request_opts(q) for q in request.queries]
+        version = result_version(self.db_path)
+        keys = [("grpc-batch", *query_key(opts)) for opts in all_opts]
+        results = [result_cache.get(self.db_path, version, key) for key in keys]
+        pending = [i for i, r in enumerate(results) if r is None]
+        if pending:
+            todo = [all_opts[i] for i in pending]
+            with read_connection(self.db_path) as conn:
+                expand = any(opts.expand_neighbors for opts in todo)
+                hybrid = any(opts.mode == "hybrid" for opts in todo)
+                rows = run_batch(
+                    conn,
+                    todo,
+                    adjacency=get_adjacency(self.db_path, conn) if expand else None,
+                    raw=True,
+                    vectors=get_vectors(self.db_path) if hybrid else None,
+                    executor=self.lanes.read,
                 )
-                for n in result["nodes"]
-            ]
-            edges = [
-                pb2_any.Edge(
-                    id=e["id"],
-                    type=e["type"],
-                    source=e["source"],
-                    target=e["target"],
-                    data=pb2_any.Json(raw=_json.dumps(e["data"])),
+            for i, result in zip(pending, rows, strict=True):
+                message = _result_message(result)
+                result_cache.put(self.db_path, version, keys[i], message, message.ByteSize())
+                results[i] = message
+        return mcp_pb2.BatchQueryResult(results=results)  # type: ignore[attr-defined]
+
+    async def BatchQuery(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        if len(request.queries) > BATCH_MAX_QUERIES:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"batch holds {len(request.queries)} queries, max {BATCH_MAX_QUERIES}",
+            )
+        try:
+            return await self.lanes.run_read(self._batch_query_sync, request)
+        except InvalidQuery as exc:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(exc))
+        except Exception as exc:  # pragma: no cover - mapped to gRPC status
+            logger.exception("grpc_batch_query_error")
+            await context.abort(grpc.StatusCode.INTERNAL, str(exc))
+
+    def _lookup_sync(self, kind: str, ids: list[str]) -> Any:
+        fetch = {"nodes": get_nodes, "edges": get_edges, "hyperedges": get_hyperedges}[kind]
+        with read_connection(self.db_path) as conn:
+            rows = fetch(conn, ids, raw=True)
+        if kind == "hyperedges":
+            return mcp_pb2.QueryResult(  # type: ignore[attr-defined]
+                hyperedges=[_hyperedge_message(h) for h in rows]
+            )
+        return _result_message({"nodes": [], "edges": [], kind: rows})
+
+    async def _lookup(self, kind: str, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        ids = [i.id for i in request.ids]
+        if len(ids) > MAX_IDS:
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT, f"request holds {len(ids)} ids, max {MAX_IDS}"
+            )
+        try:
+            return await self.lanes.run_read(self._lookup_sync, kind, ids)
+        except Exception as exc:  # pragma: no cover - mapped to gRPC status
+            logger.exception("grpc_lookup_error", extra={"kind": kind})
+            await context.abort(grpc.StatusCode.INTERNAL, str(exc))
+
+    async def GetNodes(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        return await self._lookup("nodes", request, context)
+
+    async def GetEdges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        return await self._lookup("edges", request, context)
+
+    async def GetHyperedges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        return await self._lookup("hyperedges", request, context)
+
+    def _suggest_sync(self, request: Any) -> Any:
+        text, limit = str(request.prefix or ""), request.limit or 10
+        version = result_version(self.db_path)
+        key = ("grpc-suggest", text, limit)
+        cached = result_cache.get(self.db_path, version, key)
+        if cached is not None:
+            return cached
+        with read_connection(self.db_path) as conn:
+            rows = suggest(conn, text, limit)
+        pb2_any: Any = mcp_pb2
+        message = pb2_any.SuggestResult(suggestions=[pb2_any.Suggestion(**r) for r in rows])
+        result_cache.put(self.db_path, version, key, message, message.ByteSize())
+        return message
+
+    async def Suggest(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        try:
+            return await self.lanes.run_read(self._suggest_sync, request)
+        except Exception as exc:  # pragma: no cover - mapped to gRPC status
+            logger.exception("grpc_suggest_error")
+            await context.abort(grpc.StatusCode.INTERNAL, str(exc))
+
+    def _similar_sync(self, request: Any) -> Any:
+        node_id, text = str(request.id or "") or None, str(request.text or "") or None
+        k, nprobe = request.k or 10, request.nprobe
+        version = result_version(self.db_path)
+        key = ("grpc-similar", node_id, text, k, nprobe)
+        cached = result_cache.get(self.db_path, version, key)
+        if cached is not None:
+            return cached
+        with read_connection(self.db_path) as conn:
+            rows = similar(
+                conn, get_vectors(self.db_path), node_id=node_id, text=text, k=k, nprobe=nprobe
+            )
+        pb2_any: Any = mcp_pb2
+        message = pb2_any.SimilarResult(
+            nodes=[
+                pb2_any.ScoredNode(
+                    node=pb2_any.Node(
+                        id=r["id"], type=r["type"], data=pb2_any.Json(raw=json.dumps(r["data"]))
+                    ),
+                    score=r["score"],
                 )
-                for e in result["edges"]
+                for r in rows
             ]
-            yield pb2_any.QueryResult(nodes=nodes, edges=edges)
+        )
+        result_cache.put(self.db_path, version, key, message, message.ByteSize())
+        return message
+
+    async def Similar(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        if bool(request.id) == bool(request.text):
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "pass exactly one of id or text")
+        try:
+            return await self.lanes.run_read(self._similar_sync, request)
+        except UnknownNode as exc:
+            await context.abort(grpc.StatusCode.NOT_FOUND, str(exc))
+        except VectorsUnavailable as exc:
+            await context.abort(grpc.StatusCode.FAILED_PRECONDITION, str(exc))
         except Exception as exc:  # pragma: no cover - mapped to gRPC status
-            logger.exception("grpc_query_error")
+            logger.exception("grpc_similar_error")
             await context.abort(grpc.StatusCode.INTERNAL, str(exc))
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
-    async def UpsertNodes(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+    def _commit_write(
+        self, conn: sqlite3.Connection, before: tuple[int, ...] | None, edge_ids: list[str]
+    ) -> None:
+        """Commit, bump the in-process version and patch the adjacency index in place."""
+        rows = []
+        if edge_ids:
+            rows = conn.execute(
+                """
+                SELECT e.rowid, e.id, e.source, e.target
+                FROM json_each(?) AS j JOIN edges e ON e.id = j.value
+                """,
+                (json.dumps(edge_ids),),
+            ).fetchall()
+        conn.commit()
+        mark_changed(self.db_path)
+        note_write(self.db_path, before, [tuple(r) for r in rows])
+
+    def _upsert_nodes_sync(self, request: Any) -> int:
+        before = snapshot_version(self.db_path)
+        conn = self._connect()
         try:
-            conn = self._connect()
             cur = conn.cursor()
             for n in request.nodes:
                 cur.execute(
@@ -112,23 +353,24 @@ class McpService(mcp_pb2_grpc.McpServiceServicer):
                     """,
                     (n.id, n.type, n.data.raw or "{}"),
                 )
-            conn.commit()
+            self._commit_write(conn, before, [])
+            return len(request.nodes)
+        finally:
+            conn.close()
+
+    async def UpsertNodes(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        try:
+            count = await self.lanes.run_write(self._upsert_nodes_sync, request)
             # mypy: generated module has dynamic attributes
-            return mcp_pb2.Ack(  # type: ignore[attr-defined]
-                ok=True, message=f"upserted {len(request.nodes)} nodes"
-            )
+            return mcp_pb2.Ack(ok=True, message=f"upserted {count} nodes")  # type: ignore[attr-defined]
         except Exception as exc:  # pragma: no cover
             logger.exception("grpc_upsert_nodes_error")
             await context.abort(grpc.StatusCode.INTERNAL, str(exc))
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
-    async def UpsertEdges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+    def _upsert_edges_sync(self, request: Any) -> int:
+        before = snapshot_version(self.db_path)
+        conn = self._connect()
         try:
-            conn = self._connect()
             cur = conn.cursor()
             for e in request.edges:
                 cur.execute(
@@ -143,76 +385,71 @@ class McpService(mcp_pb2_grpc.McpServiceServicer):
                     """,
                     (e.id, e.type, e.source, e.target, e.data.raw or "{}"),
                 )
-            conn.commit()
-            return mcp_pb2.Ack(  # type: ignore[attr-defined]
-                ok=True, message=f"upserted {len(request.edges)} edges"
-            )
+            self._commit_write(conn, before, [e.id for e in request.edges])
+            return len(request.edges)
+        finally:
+            conn.close()
+
+    async def UpsertEdges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        try:
+            count = await self.lanes.run_write(self._upsert_edges_sync, request)
+            return mcp_pb2.Ack(ok=True, message=f"upserted {count} edges")  # type: ignore[attr-defined]
         except Exception as exc:  # pragma: no cover
             logger.exception("grpc_upsert_edges_error")
             await context.abort(grpc.StatusCode.INTERNAL, str(exc))
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
-    async def UpsertHyperedges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+    def _upsert_hyperedges_sync(self, request: Any) -> int:
+        before = snapshot_version(self.db_path)
+        conn = self._connect()
         try:
-            conn = self._connect()
-            cur = conn.cursor()
+            replace = bool(request.replace_participants)
+            replaced: set[str] = set()
+            he_rows: list[HyperedgeRow] = []
+            part_rows: list[ParticipantRow] = []
+            clear_ids: list[str] = []
             for he in request.hyperedges:
-                cur.execute(
-                    """
-                    INSERT INTO hyperedges (id, type, data)
-                    VALUES (?, ?, json(?))
-                    ON CONFLICT(id) DO UPDATE SET
-                        type = excluded.type,
-                        data = excluded.data
-                    """,
-                    (he.id, he.type, he.data.raw or "{}"),
+                he_rows.append((he.id, he.type, he.data.raw or "{}"))
+                part_rows.extend(
+                    (he.id, p.entity_id, p.role or "", int(p.ordinal or 0), "{}")
+                    for p in he.participants
                 )
-                for p in he.participants:
-                    cur.execute(
-                        """
-                        INSERT INTO hyperedge_entities (
-                            hyperedge_id, entity_id, role, ordinal, data
-                        )
-                        VALUES (?, ?, ?, ?, json(?))
-                        ON CONFLICT(hyperedge_id, entity_id, role, ordinal) DO UPDATE SET
-                            data = excluded.data
-                        """,
-                        (
-                            he.id,
-                            p.entity_id,
-                            p.role or "",
-                            int(getattr(p, "ordinal", 0) or 0),
-                            (
-                                p.data.raw
-                                if getattr(p, "data", None) and hasattr(p.data, "raw")
-                                else "{}"
-                            ),
-                        ),
-                    )
-            conn.commit()
+                if replace and he.id not in replaced:
+                    replaced.add(he.id)
+                    clear_ids.append(he.id)
+                if len(he_rows) >= HYPEREDGE_BATCH:
+                    write_hyperedge_batch(conn, he_rows, part_rows, replace_ids=clear_ids)
+                    he_rows, part_rows, clear_ids = [], [], []
+            write_hyperedge_batch(conn, he_rows, part_rows, replace_ids=clear_ids)
+            self._commit_write(conn, before, [])
+            return len(request.hyperedges)
+        finally:
+            conn.close()
+
+    async def UpsertHyperedges(self, request: Any, context: grpc.aio.ServicerContext) -> Any:
+        try:
+            count = await self.lanes.run_write(self._upsert_hyperedges_sync, request)
             return mcp_pb2.Ack(  # type: ignore[attr-defined]
-                ok=True, message=f"upserted {len(request.hyperedges)} hyperedges"
+                ok=True, message=f"upserted {count} hyperedges"
             )
         except Exception as exc:  # pragma: no cover
             logger.exception("grpc_upsert_hyperedges_error")
             await context.abort(grpc.StatusCode.INTERNAL, str(exc))
-        finally:
-            try:
-                conn.close()
-            except Exception:
-                pass
 
 
 async def serve_grpc(
-    db_path: Path, host: str = "0.0.0.0", port: int = 50051
+    db_path: Path,
+    host: str = "0.0.0.0",
+    port: int = 50051,
+    lanes: DbLanes | None = None,
 ) -> tuple[grpc.aio.Server, int]:
+    lanes = lanes or DbLanes()
+    await lanes.run_read(ensure_snapshot, db_path)
     server = grpc.aio.server()
-    mcp_pb2_grpc.add_McpServiceServicer_to_server(McpService(db_path), server)
+    mcp_pb2_grpc.add_McpServiceServicer_to_server(McpService(db_path, lanes), server)
     bound_port = server.add_insecure_port(f"{host}:{port}")
     await server.start()
-    logger.info("grpc_server_started", extra={"host": host, "port": bound_port})
+    logger.info(
+        "grpc_server_started",
+        extra={"host": host, "port": bound_port, "lanes": lanes.stats()},
+    )
     return server, bound_port
@@ -0,0 +1,198 @@
+"""Bounded pool of read-only SQLite connections shared by HTTP and gRPC.
+
+Connections are opened lazily up to ``DB_POOL_SIZE``, tuned once with read
+PRAGMAs, and reused so the parsed schema, page cache, mmap window and
+prepared statement cache survive across requests. Each checkout is owned by
+one request (thread or task) until it is returned.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from .snapshot import ensure_snapshot, snapshot_version
+
+logger = logging.getLogger("mcp.pool")
+
+DEFAULT_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+DEFAULT_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5.0"))
+MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", "134217728"))  # 128 MiB
+CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-20000"))  # ~20MB per connection
+CACHED_STATEMENTS = 256
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled connection becomes free within the timeout."""
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        max_size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_POOL_TIMEOUT,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.max_size = max(1, int(max_size))
+        self.timeout = timeout
+        version = snapshot_version(self.db_path)
+        self.file_id = version[0] if version else None
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _open(self) -> sqlite3.Connection:
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA query_only=ON;")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE};")
+            conn.execute(f"PRAGMA cache_size={CACHE_SIZE};")
+        except sqlite3.DatabaseError:
+            # Pragmas may be unavailable depending on build; ignore safely
+            pass
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._created < self.max_size
+            if grow:
+                self._created += 1
+        if grow:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(
+                f"no SQLite connection available within {self.timeout}s (pool size {self.max_size})"
+            ) from None
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._created -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the duration of the ``with`` block."""
+        start = time.perf_counter()
+        conn = self._acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._release(conn)
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed on return."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                "size": self.max_size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "wait_ms_avg": round(self._wait_total * 1000 / checkouts, 3) if checkouts else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
+
+
+_pools: dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path) -> ConnectionPool:
+    """Return the shared pool for ``db_path``, replacing it if the file was swapped."""
+    key = Path(db_path)
+    version = snapshot_version(key)
+    file_id = version[0] if version else None
+    pool = _pools.get(key)
+    if pool is not None and pool.file_id == file_id:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.file_id != file_id:
+            if pool is not None:
+                pool.close()
+                logger.info("db_pool_recycled", extra={"db_path": str(key)})
+            pool = ConnectionPool(key)
+            _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def read_connection(db_path: Path) -> Iterator[sqlite3.Connection]:
+    """Check out a pooled read-only connection to a ready snapshot."""
+    ensure_snapshot(db_path)
+    with get_pool(db_path).connection() as conn:
+        yield conn
+
+
+def pool_stats(db_path: Path) -> dict[str, Any] | None:
+    pool = _pools.get(Path(db_path))
+    return pool.stats() if pool is not None else None
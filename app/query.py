@@ -1,9 +1,32 @@
 from __future__ import annotations
 
+import base64
+import functools
+import hashlib
+import heapq
 import json
+import logging
+import os
 import sqlite3
-from dataclasses import dataclass
-from typing import Any
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .adjacency import HUB_DEGREE
+from .embeddings import EMBEDDINGS_TABLE, embed_text
+from .fts_query import compile_fts_query, compile_trigram_query, fuzzy_match, fuzzy_words
+from .indexes import TRIGRAM_TABLE, attribute_expr
+
+if TYPE_CHECKING:
+    from .adjacency import AdjacencyIndex
+    from .embeddings import VectorIndex
+
+logger = logging.getLogger("mcp.query")
+
+QUERY_MODES = ("lexical", "hybrid")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
 
 
 @dataclass
@@ -13,220 +36,660 @@ class QueryOpts:
     expand_neighbors: bool = False
     neighbor_budget: int = 0
     neighbor_ranking: str = "degree"  # "degree" or "none"
+    cursor: str | None = None  # next_cursor of the previous page
+    fuzzy: bool = False  # substring / typo-tolerant matching via the trigram table
+    types: list[str] = field(default_factory=list)  # keep nodes of these types only
+    where: dict[str, Any] = field(default_factory=dict)  # data attribute -> required value
+    mode: str = "lexical"  # "lexical" (FTS only) or "hybrid" (FTS fused with vectors)
 
 
-def _ensure_fts(conn: sqlite3.Connection) -> None:
-    cur = conn.cursor()
-    # Create FTS table if missing
-    cur.execute(
-        """
-        CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts
-        USING fts5(id, content, tokenize='porter');
-        """
-    )
-    # Triggers to keep FTS in sync
-    cur.execute(
-        """
-        CREATE TRIGGER IF NOT EXISTS nodes_ai AFTER INSERT ON nodes BEGIN
-            INSERT INTO nodes_fts (id, content)
-            VALUES (
-              NEW.id,
-              coalesce(json_extract(NEW.data, '$.name'), '') || ' ' ||
-              coalesce(json_extract(NEW.data, '$.about'), '') || ' ' ||
-              NEW.type
-            );
-        END;
-        """
+def _fts_unavailable(exc: sqlite3.OperationalError) -> bool:
+    msg = str(exc)
+    return "no such table" in msg or "no such module" in msg
+
+
+class InvalidQuery(ValueError):
+    """The query options cannot be run as given; maps to 400 / ``INVALID_ARGUMENT``."""
+
+
+class InvalidCursor(InvalidQuery):
+    """The continuation token is malformed or was issued for another query."""
+
+
+class InvalidFilter(InvalidQuery):
+    """A ``where`` attribute name or value is not usable as a filter."""
+
+
+def _filter_sql(opts: QueryOpts) -> tuple[str, list[Any]]:
+    """Return ``AND ...`` predicates on ``nodes n`` for the type and attribute filters.
+
+    The type filter reads ``idx_nodes_type``; attribute filters use the same
+    ``json_extract`` text as the expression indexes the writer creates.
+    """
+    sql = ""
+    params: list[Any] = []
+    if opts.types:
+        sql += f" AND n.type IN ({','.join('?' * len(opts.types))})"
+        params.extend(opts.types)
+    for name, value in sorted(opts.where.items()):
+        if isinstance(value, bool):
+            value = int(value)  # json_extract returns JSON booleans as 1 / 0
+        if not isinstance(value, str | int | float):
+            raise InvalidFilter(f"filter value for {name!r} must be a string, number or boolean")
+        try:
+            sql += f" AND {attribute_expr(name, 'n.')} = ?"
+        except ValueError as exc:
+            raise InvalidFilter(str(exc)) from exc
+        params.append(value)
+    return sql, params
+
+
+def _cursor_scope(opts: QueryOpts) -> str:
+    # Pages of differently ranked or filtered queries must not mix
+    scope = f"fuzzy:{opts.term or ''}" if opts.fuzzy else opts.term or ""
+    if opts.mode == "hybrid":
+        scope = f"hybrid:{scope}"
+    if opts.types or opts.where:
+        scope += json.dumps([sorted(opts.types), opts.where], sort_keys=True)
+    return scope
+
+
+def _fingerprint(term: str) -> str:
+    return hashlib.sha1(term.encode()).hexdigest()[:12]
+
+
+def encode_cursor(term: str, rank: float, node_id: str) -> str:
+    """Return an opaque token for the page that starts after ``(rank, node_id)``."""
+    payload = json.dumps([_fingerprint(term), rank, node_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, term: str) -> tuple[float, str]:
+    """Return the ``(rank, node_id)`` a token resumes after; raises ``InvalidCursor``."""
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        fingerprint, rank, node_id = json.loads(payload)
+        position = (float(rank), str(node_id))
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+    if fingerprint != _fingerprint(term):
+        raise InvalidCursor("cursor was issued for a different query")
+    return position
+
+
+@dataclass
+class FetchMemo:
+    """Node and edge rows already fetched, shared by the queries of one batch."""
+
+    nodes: dict[str, dict[str, Any]] = field(default_factory=dict)
+    edges: dict[int, dict[str, Any]] = field(default_factory=dict)
+
+
+def _parse_data(text: str | None) -> Any:
+    return json.loads(text) if text else {}
+
+
+def _raw_data(text: str | None) -> Any:
+    # json() in SQL already returns minified, valid JSON text
+    return text or "{}"
+
+
+def data_decoder(raw: bool) -> Callable[[str | None], Any]:
+    """Return how ``data`` columns are read: stored JSON text when ``raw``, else dicts."""
+    return _raw_data if raw else _parse_data
+
+
+def _fetch_edges_by_rowid(
+    cur: sqlite3.Cursor,
+    rowids: list[int],
+    decode: Callable[[str | None], Any] = _parse_data,
+    memo: FetchMemo | None = None,
+) -> list[dict[str, Any]]:
+    """Fetch edge rows by rowid in one statement, preserving the given order."""
+    by_rowid = memo.edges if memo is not None else {}
+    missing = [rid for rid in rowids if rid not in by_rowid]
+    if missing:
+        cur.execute(
+            """
+            SELECT rowid AS rid, id, type, source, target, json(data) as data
+            FROM edges
+            WHERE rowid IN ({qs})
+            """.format(qs=",".join(["?"] * len(missing))),
+            missing,
+        )
+        for r in cur.fetchall():
+            by_rowid[r["rid"]] = {
+                "id": r["id"],
+                "type": r["type"],
+                "source": r["source"],
+                "target": r["target"],
+                "data": decode(r["data"]),
+            }
+    return [by_rowid[rid] for rid in rowids if rid in by_rowid]
+
+
+# One leg per seed and direction, each an index range scan of at most ``budget`` rows
+_RANK_LEG_SQL = """
+    SELECT * FROM (
+        SELECT rank, id FROM edge_ranks WHERE {col} = ? ORDER BY rank DESC, id LIMIT ?
     )
+"""
+_RANK_LEGS_SQL = """
+    SELECT e.rowid, c.rank, c.id
+    FROM ({legs}) c
+    JOIN edges e ON e.id = c.id
+    ORDER BY c.rank DESC, c.id
+    LIMIT ?
+"""
+# Seeds per statement; SQLite caps a compound SELECT at 500 terms
+_RANK_SEEDS_PER_STATEMENT = 200
+
+# Snapshots without edge_ranks: rank every incident edge, so cost grows with degree
+_RANKED_EDGES_SQL = """
+    SELECT c.rid
+    FROM (
+        SELECT rowid AS rid FROM edges WHERE source IN ({qs})
+        UNION
+        SELECT rowid AS rid FROM edges WHERE target IN ({qs})
+    ) c
+    JOIN edges e ON e.rowid = c.rid
+    {joins}
+    ORDER BY {degree} DESC, e.id
+    LIMIT ?
+"""
+
+# node_stats is built at finalize/export time and kept current by triggers
+_STATS_JOINS = """
+    LEFT JOIN node_stats s ON s.id = e.source
+    LEFT JOIN node_stats t ON t.id = e.target
+"""
+_STATS_DEGREE = "coalesce(s.degree, 0) + coalesce(t.degree, 0)"
+
+# Snapshots without node_stats: count degrees per candidate through the edge indexes
+_COUNTED_DEGREE = """(
+    (SELECT COUNT(*) FROM edges x WHERE x.source = e.source)
+    + (SELECT COUNT(*) FROM edges x WHERE x.target = e.source)
+    + (SELECT COUNT(*) FROM edges x WHERE x.source = e.target)
+    + (SELECT COUNT(*) FROM edges x WHERE x.target = e.target)
+)"""
+
+
+def _top_ranked_edges(cur: sqlite3.Cursor, seed_ids: set[str], budget: int) -> list[int]:
+    """Select the top ``budget`` edges from ``edge_ranks``, reading ``budget`` rows per leg."""
+    seeds = sorted(seed_ids)
+    best: list[tuple[int, str, int]] = []
+    for i in range(0, len(seeds), _RANK_SEEDS_PER_STATEMENT):
+        chunk = seeds[i : i + _RANK_SEEDS_PER_STATEMENT]
+        legs = " UNION ".join(
+            _RANK_LEG_SQL.format(col=col) for _ in chunk for col in ("source", "target")
+        )
+        params: list[Any] = []
+        for seed in chunk:
+            params += [seed, budget, seed, budget]
+        cur.execute(_RANK_LEGS_SQL.format(legs=legs), [*params, budget])
+        best += [(-r[1], r[2], r[0]) for r in cur.fetchall()]
+    # Chunks are each sorted; merge them (and drop edges seen from two seeds)
+    return [rid for _, _, rid in heapq.nsmallest(budget, set(best))]
+
+
+def _ranked_edge_rowids(cur: sqlite3.Cursor, seed_ids: set[str], budget: int) -> list[int]:
+    """Return rowids of the top ``budget`` incident edges by endpoint degree."""
+    if budget <= 0 or not seed_ids:
+        return []
+    try:
+        return _top_ranked_edges(cur, seed_ids, budget)
+    except sqlite3.OperationalError:
+        pass  # older snapshot without edge_ranks
+    qs = ",".join(["?"] * len(seed_ids))
+    params = [*seed_ids, *seed_ids, budget]
+    try:
+        cur.execute(
+            _RANKED_EDGES_SQL.format(qs=qs, joins=_STATS_JOINS, degree=_STATS_DEGREE), params
+        )
+    except sqlite3.OperationalError:
+        cur.execute(_RANKED_EDGES_SQL.format(qs=qs, joins="", degree=_COUNTED_DEGREE), params)
+    return [r[0] for r in cur.fetchall()]
+
+
+def _node(r: sqlite3.Row, decode: Callable[[str | None], Any]) -> dict[str, Any]:
+    return {"id": r["id"], "type": r["type"], "data": decode(r["data"])}
+
+
+def _iter_edges(
+    cur: sqlite3.Cursor,
+    seed_ids: set[str],
+    opts: QueryOpts,
+    adjacency: AdjacencyIndex | None,
+    decode: Callable[[str | None], Any],
+    size: int,
+    memo: FetchMemo | None,
+) -> Iterator[list[dict[str, Any]]]:
+    """Yield the selected neighbor edges in chunks of at most ``size``."""
+    budget = int(opts.neighbor_budget)
+    ranked = opts.neighbor_ranking != "none"
+    if adjacency is not None and not (ranked and adjacency.max_degree(seed_ids) > HUB_DEGREE):
+        rowids = adjacency.top_edges(seed_ids, budget, opts.neighbor_ranking)
+    elif not ranked:
+        # Simple limit without ranking
+        cur.execute(
+            """
+            SELECT id, type, source, target, json(data) as data
+            FROM edges
+            WHERE source IN ({qs}) OR target IN ({qs})
+            LIMIT ?
+            """.format(qs=",".join(["?"] * len(seed_ids))),
+            [*seed_ids, *seed_ids, budget],
+        )
+        while rows := cur.fetchmany(size):
+            yield [
+                {
+                    "id": r["id"],
+                    "type": r["type"],
+                    "source": r["source"],
+                    "target": r["target"],
+                    "data": decode(r["data"]),
+                }
+                for r in rows
+            ]
+        return
+    else:
+        # Degree-based ranking: top-k selected in SQL from materialized degrees;
+        # hub seeds come here too, as edge_ranks reads budget rows per seed
+        rowids = _ranked_edge_rowids(cur, seed_ids, budget)
+    for i in range(0, len(rowids), size):
+        yield _fetch_edges_by_rowid(cur, rowids[i : i + size], decode, memo)
+
+
+def _seed_rows(
+    cur: sqlite3.Cursor,
+    term: str,
+    after: tuple[float, str] | None,
+    limit: int,
+    size: int,
+    *,
+    fuzzy: bool = False,
+    filters: tuple[str, list[Any]] = ("", []),
+) -> Iterator[list[sqlite3.Row]]:
+    """Yield batches of at most ``size`` seed rows ordered by ``(rank, id)``, ``limit`` in total."""
+    where, params = filters
+    if fuzzy:
+        match = compile_trigram_query(term)
+        if match is not None:
+            cols = [r[1] for r in cur.execute(f"PRAGMA table_info({TRIGRAM_TABLE})")][1:]
+            if cols:
+                yield from _fuzzy_rows(cur, term, match, cols, after, limit, size, filters)
+                return
+            logger.warning("query_trigram_unavailable", extra={"table": TRIGRAM_TABLE})
+        # Words under three characters have no trigrams; exact search handles them
+
+    match = compile_fts_query(term)
+    if match is None:
+        if not where:
+            return  # nothing searchable: an empty result, never a full scan
+        # Filters only: browse the matching nodes through their indexes, by id
+        cur.execute(
+            f"""
+            SELECT n.id, n.type, json(n.data) as data, 0.0 AS rank
+            FROM nodes n
+            WHERE 1 {where} {"AND n.id > ?" if after else ""}
+            ORDER BY n.id
+            LIMIT ?
+            """,
+            (*params, *((after[1],) if after else ()), limit),
+        )
+        while rows := cur.fetchmany(size):
+            yield rows
+        return
+    try:
+        # rank is bm25() with the per-column weights stored at build time;
+        # (rank, id) is the keyset that cursors resume from
+        keyset = "AND (f.rank > ? OR (f.rank = ? AND n.id > ?))" if after else ""
+        cur.execute(
+            f"""
+            SELECT n.id, n.type, json(n.data) as data, f.rank AS rank
+            FROM nodes_fts f
+            JOIN nodes n ON n.id = f.id
+            WHERE nodes_fts MATCH ? {keyset} {where}
+            ORDER BY f.rank, n.id
+            LIMIT ?
+            """,
+            (match, *((after[0], after[0], after[1]) if after else ()), *params, limit),
+        )
+    except sqlite3.OperationalError as exc:
+        # The compiled expression is always valid, so only a missing FTS
+        # table or module gets here; anything else is a real error
+        if not _fts_unavailable(exc):
+            raise
+        logger.warning("query_fts_unavailable_degraded", extra={"error": str(exc)})
+        # Degraded mode: unranked LIKE scan, so the keyset is the id
+        cur.execute(
+            f"""
+            SELECT n.id, n.type, json(n.data) as data, 0.0 AS rank
+            FROM nodes n
+            WHERE (json(n.data) LIKE ? OR n.type LIKE ?) {"AND n.id > ?" if after else ""} {where}
+            ORDER BY n.id
+            LIMIT ?
+            """,
+            (f"%{term}%", f"%{term}%", *((after[1],) if after else ()), *params, limit),
+        )
+    while rows := cur.fetchmany(size):
+        yield rows
+
+
+def _fuzzy_rows(
+    cur: sqlite3.Cursor,
+    term: str,
+    match: str,
+    cols: list[str],
+    after: tuple[float, str] | None,
+    limit: int,
+    size: int,
+    filters: tuple[str, list[Any]],
+) -> Iterator[list[sqlite3.Row]]:
+    # Any shared trigram makes a candidate; candidates come off the index in
+    # rank order and are kept only if they share enough of every word
+    haystack = " || ' ' || ".join(f"coalesce(f.{c}, '')" for c in cols)
+    keyset = "AND (f.rank > ? OR (f.rank = ? AND n.id > ?))" if after else ""
     cur.execute(
-        """
-        CREATE TRIGGER IF NOT EXISTS nodes_au AFTER UPDATE ON nodes BEGIN
-            DELETE FROM nodes_fts WHERE id = OLD.id;
-            INSERT INTO nodes_fts (id, content)
-            VALUES (
-              NEW.id,
-              coalesce(json_extract(NEW.data, '$.name'), '') || ' ' ||
-              coalesce(json_extract(NEW.data, '$.about'), '') || ' ' ||
-              NEW.type
-            );
-        END;
-        """
+        f"""
+        SELECT n.id, n.type, json(n.data) as data, f.rank AS rank, {haystack} AS haystack
+        FROM {TRIGRAM_TABLE} f
+        JOIN nodes n ON n.id = f.id
+        WHERE {TRIGRAM_TABLE} MATCH ? {keyset} {filters[0]}
+        ORDER BY f.rank, n.id
+        """,
+        (match, *((after[0], after[0], after[1]) if after else ()), *filters[1]),
     )
+    words = fuzzy_words(term)
+    left = limit
+    while left and (rows := cur.fetchmany(size)):
+        kept = [r for r in rows if fuzzy_match(words, r["haystack"])][:left]
+        left -= len(kept)
+        if kept:
+            yield kept
+
+
+def rrf_fuse(rankings: Iterable[Sequence[str]], k: int = HYBRID_RRF_K) -> list[tuple[str, float]]:
+    """Reciprocal-rank fusion: ``(id, score)`` best first, ``score = sum(1 / (k + rank))``.
+
+    Ranks are 1-based within each ranking; ties break by id.
+    """
+    scores: dict[str, float] = {}
+    for ranking in rankings:
+        for rank, node_id in enumerate(ranking, 1):
+            scores[node_id] = scores.get(node_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _hybrid_rows(
+    cur: sqlite3.Cursor,
+    term: str,
+    after: tuple[float, str] | None,
+    limit: int,
+    size: int,
+    *,
+    fuzzy: bool,
+    filters: tuple[str, list[Any]],
+    vectors: VectorIndex | None,
+    executor: Executor | None,
+) -> Iterator[list[sqlite3.Row]]:
+    # Both retrievers return their top candidates; the vector scan runs on
+    # the executor while FTS runs here (both release the GIL), then ranks
+    # are fused. Without an executor the scan runs here after FTS.
+    where, params = filters
+    pool = max(HYBRID_CANDIDATES, limit)
+    scan = None
+    if vectors is None:
+        logger.warning("query_vectors_unavailable", extra={"mode": "hybrid"})
+    elif (query := embed_text(term, vectors.dim)).any():
+        scan = functools.partial(vectors.search, query, pool)
+    future = executor.submit(scan) if scan is not None and executor is not None else None
+    lexical = [
+        r["id"]
+        for rows in _seed_rows(cur, term, None, pool, pool, fuzzy=fuzzy, filters=filters)
+        for r in rows
+    ]
+    hits: list[tuple[int, float]] = []
+    if scan is not None:
+        # A scan still queued behind busy workers runs here instead: waiting
+        # for it from a worker of the same executor could deadlock
+        hits = future.result() if future is not None and not future.cancel() else scan()
+    semantic: list[str] = []
+    if hits:
+        # Unrelated vectors (cosine <= 0) are no candidates; filters apply too
+        cur.execute(
+            f"""
+            SELECT n.id
+            FROM json_each(?) AS j
+            CROSS JOIN {EMBEDDINGS_TABLE} AS e ON e.pos = j.value
+            JOIN nodes n ON n.id = e.id
+            WHERE 1 {where}
+            ORDER BY j.key
+            """,
+            (json.dumps([p for p, score in hits if score > 0]), *params),
+        )
+        semantic = [r[0] for r in cur.fetchall()]
+
+    # rank is the negated fused score so (rank, id) ascends like bm25 pages
+    fused = [(-score, node_id) for node_id, score in rrf_fuse([lexical, semantic])]
+    page = [item for item in fused if after is None or item > after][:limit]
+    if not page:
+        return
     cur.execute(
         """
-        CREATE TRIGGER IF NOT EXISTS nodes_ad AFTER DELETE ON nodes BEGIN
-            DELETE FROM nodes_fts WHERE id = OLD.id;
-        END;
-        """
+        SELECT n.id, n.type, json(n.data) as data, json_extract(j.value, '$[0]') AS rank
+        FROM json_each(?) AS j
+        CROSS JOIN nodes n ON n.id = json_extract(j.value, '$[1]')
+        ORDER BY j.key
+        """,
+        (json.dumps(page),),
     )
-    # Backfill existing rows if FTS is empty
-    cur.execute("SELECT COUNT(*) FROM nodes_fts")
-    (count,) = cur.fetchone() or (0,)
-    if count == 0:
-        cur.execute(
-            """
-            INSERT INTO nodes_fts (id, content)
-            SELECT id,
-                   coalesce(json_extract(data, '$.name'), '') || ' ' ||
-                   coalesce(json_extract(data, '$.about'), '') || ' ' ||
-                   type
-            FROM nodes
-            """
-        )
-    conn.commit()
+    while rows := cur.fetchmany(size):
+        yield rows
+
 
+def iter_query(
+    conn: sqlite3.Connection,
+    opts: QueryOpts,
+    *,
+    adjacency: AdjacencyIndex | None = None,
+    raw: bool = False,
+    chunk_size: int = 1000,
+    memo: FetchMemo | None = None,
+    vectors: VectorIndex | None = None,
+    executor: Executor | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield a query result as ``{"nodes": [...], "edges": [...]}`` chunks.
 
-def run_query(conn: sqlite3.Connection, opts: QueryOpts) -> dict[str, Any]:
+    Seed nodes come first, read from the cursor with ``fetchmany``; then each
+    chunk of expanded edges is followed by the neighbor nodes it introduces.
+    No chunk holds more than ``chunk_size`` rows, so a consumer that forwards
+    chunks as they arrive keeps memory bounded by the chunk size. Expanded
+    edges and neighbor nodes already present in ``memo`` are not fetched again.
+
+    Seeds are ordered by ``(rank, id)``. When a page is full, its last seed
+    chunk carries ``next_cursor``; passing it back as ``opts.cursor`` resumes
+    with a keyset predicate instead of an offset. With ``opts.fuzzy`` seeds
+    come from the trigram table when the snapshot has one. ``opts.types`` and
+    ``opts.where`` restrict seeds; with no search words they browse the
+    matching nodes by id. ``opts.mode="hybrid"`` fuses the FTS and ``vectors``
+    top candidates with reciprocal-rank fusion before expanding the seeds;
+    the vector scan runs on ``executor`` when given, alongside the FTS query.
+    """
+    if opts.mode not in QUERY_MODES:
+        raise InvalidQuery(f"mode must be one of {', '.join(QUERY_MODES)}")
     term = opts.term or ""
     limit = int(opts.limit or 10)
-
-    nodes: list[dict[str, Any]] = []
-    edges: list[dict[str, Any]] = []
+    size = max(1, int(chunk_size))
+    decode = data_decoder(raw)
+    scope = _cursor_scope(opts)
+    after = decode_cursor(opts.cursor, scope) if opts.cursor else None
+    filters = _filter_sql(opts)
 
     cur = conn.cursor()
-
+    node_cur = conn.cursor()
     try:
-        # Prefer FTS if available
-        try:
-            _ensure_fts(conn)
-            cur.execute(
-                """
-                SELECT n.id, n.type, json(n.data) as data
-                FROM nodes n
-                JOIN nodes_fts f ON f.id = n.id
-                WHERE nodes_fts MATCH ?
-                LIMIT ?
-                """,
-                (term, limit),
-            )
-        except sqlite3.DatabaseError:
-            # Fallback to LIKE if FTS not available
-            cur.execute(
-                """
-                SELECT id, type, json(data) as data
-                FROM nodes
-                WHERE json(data) LIKE ? OR type LIKE ?
-                LIMIT ?
-                """,
-                (f"%{term}%", f"%{term}%", limit),
+        seed_ids: set[str] = set()
+        if opts.mode == "hybrid":
+            seeds = _hybrid_rows(
+                cur,
+                term,
+                after,
+                limit,
+                size,
+                fuzzy=opts.fuzzy,
+                filters=filters,
+                vectors=vectors,
+                executor=executor,
             )
+        else:
+            seeds = _seed_rows(cur, term, after, limit, size, fuzzy=opts.fuzzy, filters=filters)
+        for rows in seeds:
+            chunk: dict[str, Any] = {"nodes": [_node(r, decode) for r in rows], "edges": []}
+            seed_ids.update(n["id"] for n in chunk["nodes"])
+            if len(seed_ids) == limit:
+                # A full page: the next one resumes after its last row
+                chunk["next_cursor"] = encode_cursor(scope, rows[-1]["rank"], rows[-1]["id"])
+            yield chunk
 
-        rows = cur.fetchall()
-        nodes = [
-            {"id": r["id"], "type": r["type"], "data": json.loads(r["data"]) if r["data"] else {}}
-            for r in rows
-        ]
-
-        if opts.expand_neighbors and opts.neighbor_budget and nodes:
-            seed_ids = {n["id"] for n in nodes}
-            if opts.neighbor_ranking == "none":
-                # Simple limit without ranking
-                cur.execute(
-                    """
-                    SELECT id, type, source, target, json(data) as data
-                    FROM edges
-                    WHERE source IN ({qs}) OR target IN ({qs})
-                    LIMIT ?
-                    """.format(qs=",".join(["?"] * len(seed_ids))),
-                    [*seed_ids, *seed_ids, int(opts.neighbor_budget)],
-                )
-                e_rows = cur.fetchall()
-                edges = [
-                    {
-                        "id": r["id"],
-                        "type": r["type"],
-                        "source": r["source"],
-                        "target": r["target"],
-                        "data": json.loads(r["data"]) if r["data"] else {},
-                    }
-                    for r in e_rows
-                ]
-            else:
-                # Degree-based ranking of neighbor edges
-                cur.execute(
-                    """
-                    SELECT id, type, source, target, json(data) as data
-                    FROM edges
-                    WHERE source IN ({qs}) OR target IN ({qs})
-                    """.format(qs=",".join(["?"] * len(seed_ids))),
-                    [*seed_ids, *seed_ids],
-                )
-                e_rows = cur.fetchall()
-
-                if e_rows:
-                    candidate_nodes: set[str] = set()
-                    for r in e_rows:
-                        candidate_nodes.add(r["source"])  # type: ignore[index]
-                        candidate_nodes.add(r["target"])  # type: ignore[index]
-
-                    deg_map: dict[str, int] = {nid: 0 for nid in candidate_nodes}
-                    qmarks = ",".join(["?"] * len(candidate_nodes))
-                    cur.execute(
-                        (
-                            "SELECT source AS id, COUNT(*) AS cnt FROM edges "
-                            f"WHERE source IN ({qmarks}) GROUP BY source"
-                        ),
-                        [*candidate_nodes],
-                    )
-                    for nid, cnt in cur.fetchall():
-                        if nid in deg_map:
-                            deg_map[nid] += int(cnt)
-                    cur.execute(
-                        (
-                            "SELECT target AS id, COUNT(*) AS cnt FROM edges "
-                            f"WHERE target IN ({qmarks}) GROUP BY target"
-                        ),
-                        [*candidate_nodes],
-                    )
-                    for nid, cnt in cur.fetchall():
-                        if nid in deg_map:
-                            deg_map[nid] += int(cnt)
-
-                    ranked = sorted(
-                        e_rows,
-                        key=lambda r: (
-                            -(deg_map.get(r["source"], 0) + deg_map.get(r["target"], 0)),  # type: ignore[index]
-                            r["id"],
-                        ),
-                    )
-                    e_rows = ranked[: int(opts.neighbor_budget)]
-
-                    edges = [
-                        {
-                            "id": r["id"],
-                            "type": r["type"],
-                            "source": r["source"],
-                            "target": r["target"],
-                            "data": json.loads(r["data"]) if r["data"] else {},
-                        }
-                        for r in e_rows
-                    ]
+        if not (opts.expand_neighbors and opts.neighbor_budget and seed_ids):
+            return
 
+        seen = set(seed_ids)
+        for edges in _iter_edges(cur, seed_ids, opts, adjacency, decode, size, memo):
+            yield {"nodes": [], "edges": edges}
             # Fetch neighbor nodes not already included
-            neighbor_ids: set[str] = set()
+            new_ids: list[str] = []
             for e in edges:
-                if e["source"] not in seed_ids:
-                    neighbor_ids.add(e["source"])
-                if e["target"] not in seed_ids:
-                    neighbor_ids.add(e["target"])
-            if neighbor_ids:
-                cur.execute(
+                for nid in (e["source"], e["target"]):
+                    if nid not in seen:
+                        seen.add(nid)
+                        new_ids.append(nid)
+            by_id = memo.nodes if memo is not None else {}
+            missing = [nid for nid in new_ids if nid not in by_id]
+            if missing:
+                node_cur.execute(
                     """
                     SELECT id, type, json(data) as data
                     FROM nodes
                     WHERE id IN ({qs})
-                    """.format(qs=",".join(["?"] * len(neighbor_ids))),
-                    [*neighbor_ids],
+                    """.format(qs=",".join(["?"] * len(missing))),
+                    missing,
                 )
-                for r in cur.fetchall():
-                    nodes.append(
-                        {
-                            "id": r["id"],
-                            "type": r["type"],
-                            "data": json.loads(r["data"]) if r["data"] else {},
-                        }
-                    )
-
-        return {"nodes": nodes, "edges": edges}
+                by_id.update((r["id"], _node(r, decode)) for r in node_cur.fetchall())
+            nodes = [by_id[nid] for nid in new_ids if nid in by_id]
+            # Up to two new endpoints per edge; keep node chunks within size too
+            for i in range(0, len(nodes), size):
+                yield {"nodes": nodes[i : i + size], "edges": []}
     finally:
+        node_cur.close()
         cur.close()
+
+
+def run_query(
+    conn: sqlite3.Connection,
+    opts: QueryOpts,
+    *,
+    adjacency: AdjacencyIndex | None = None,
+    raw: bool = False,
+    memo: FetchMemo | None = None,
+    vectors: VectorIndex | None = None,
+    executor: Executor | None = None,
+) -> dict[str, Any]:
+    """Search nodes and optionally expand their neighbors.
+
+    When an ``adjacency`` index is given, neighbor selection runs in memory
+    and only the chosen edges and nodes are fetched from SQLite. With
+    ``raw=True`` each ``data`` value is the stored JSON text instead of a
+    parsed dict, ready to be passed through to a response unchanged.
+    Hybrid queries need the snapshot's ``vectors`` and scan them on
+    ``executor`` when one is given.
+    """
+    nodes: list[dict[str, Any]] = []
+    edges: list[dict[str, Any]] = []
+    next_cursor: str | None = None
+    for chunk in iter_query(
+        conn, opts, adjacency=adjacency, raw=raw, memo=memo, vectors=vectors, executor=executor
+    ):
+        nodes.extend(chunk["nodes"])
+        edges.extend(chunk["edges"])
+        next_cursor = chunk.get("next_cursor", next_cursor)
+    return {"nodes": nodes, "edges": edges, "next_cursor": next_cursor}
+
+
+def run_batch(
+    conn: sqlite3.Connection,
+    queries: list[QueryOpts],
+    *,
+    adjacency: AdjacencyIndex | None = None,
+    raw: bool = False,
+    vectors: VectorIndex | None = None,
+    executor: Executor | None = None,
+) -> list[dict[str, Any]]:
+    """Run several queries inside one read transaction and return their results in order.
+
+    All queries see the same snapshot. Identical queries run once, and edge
+    and neighbor node rows are fetched at most once across the batch.
+    """
+    memo = FetchMemo()
+    done: dict[str, dict[str, Any]] = {}
+    began = not conn.in_transaction
+    if began:
+        conn.execute("BEGIN")
+    try:
+        for opts in queries:
+            key = repr(opts)
+            if key not in done:
+                done[key] = run_query(
+                    conn,
+                    opts,
+                    adjacency=adjacency,
+                    raw=raw,
+                    memo=memo,
+                    vectors=vectors,
+                    executor=executor,
+                )
+        return [done[repr(opts)] for opts in queries]
+    finally:
+        if began and conn.in_transaction:
+            conn.commit()
+
+
+def json_string(value: Any) -> str:
+    """Encode ``value`` as a JSON string literal."""
+    return json.dumps("" if value is None else str(value), ensure_ascii=False)
+
+
+def node_json(n: dict[str, Any]) -> str:
+    return f'{{"id":{json_string(n["id"])},"type":{json_string(n["type"])},"data":{n["data"]}}}'
+
+
+def edge_json(e: dict[str, Any]) -> str:
+    return (
+        f'{{"id":{json_string(e["id"])},"type":{json_string(e["type"])},'
+        f'"source":{json_string(e["source"])},"target":{json_string(e["target"])},'
+        f'"data":{e["data"]}}}'
+    )
+
+
+def encode_graph_json(result: dict[str, Any]) -> bytes:
+    """Encode a ``run_query(..., raw=True)`` result as the ``GraphResponse`` JSON body.
+
+    The ``data`` texts are spliced in as-is; only ids and types are escaped.
+    """
+    nodes = ",".join(node_json(n) for n in result["nodes"])
+    edges = ",".join(edge_json(e) for e in result["edges"])
+    cursor = result.get("next_cursor")
+    next_cursor = json_string(cursor) if cursor else "null"
+    return f'{{"nodes":[{nodes}],"edges":[{edges}],"next_cursor":{next_cursor}}}'.encode()
+
+
+def encode_ndjson_lines(chunk: dict[str, Any]) -> bytes:
+    """Encode a raw ``iter_query`` chunk as NDJSON, one ``{"node": ...}`` or
+    ``{"edge": ...}`` object per line, plus a ``{"next_cursor": ...}`` line
+    when the chunk ends a full page."""
+    lines = [f'{{"node":{node_json(n)}}}\n' for n in chunk["nodes"]]
+    lines.extend(f'{{"edge":{edge_json(e)}}}\n' for e in chunk["edges"])
+    if chunk.get("next_cursor"):
+        lines.append(f'{{"next_cursor":{json_string(chunk["next_cursor"])}}}\n')
+    return "".join(lines).encode()
@@ -0,0 +1,185 @@
+"""Snapshot readiness: check or build search structures once per snapshot.
+
+A snapshot is the SQLite file at ``DB_PATH`` as it exists on disk. Its version
+is derived from the file (and WAL) stat, so an export or an upsert produces a
+new version and triggers exactly one re-check. Queries then run over
+read-only connections and never pay for schema setup.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from .indexes import (
+    DEFAULT_FTS_FIELDS,
+    build_fts,
+    build_node_stats,
+    build_suggest,
+    fts_fields,
+    fts_present,
+    node_stats_present,
+    suggest_present,
+    table_exists,
+    trigram_present,
+)
+
+logger = logging.getLogger("mcp.snapshot")
+
+
+@dataclass(frozen=True)
+class SnapshotState:
+    db_path: Path
+    version: tuple[int, ...]
+    ready: bool
+    fts: bool
+    message: str = "ok"
+    node_stats: bool = False
+    suggest: bool = False
+    trigram: bool = False  # optional; fuzzy queries fall back to exact FTS without it
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "fts": self.fts,
+            "node_stats": self.node_stats,
+            "suggest": self.suggest,
+            "trigram": self.trigram,
+            "message": self.message,
+        }
+
+
+_states: dict[Path, SnapshotState] = {}
+_lock = threading.Lock()
+_generations: dict[Path, int] = {}
+
+
+def mark_changed(db_path: Path) -> None:
+    """Record an in-process write so the next version differs even within one mtime tick."""
+    key = Path(db_path)
+    with _lock:
+        _generations[key] = _generations.get(key, 0) + 1
+
+
+def snapshot_version(db_path: Path) -> tuple[int, ...] | None:
+    """Return a cheap identity for the snapshot file, or None if it is missing."""
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    version: tuple[int, ...] = (st.st_ino, st.st_size, st.st_mtime_ns)
+    try:
+        wal = os.stat(f"{db_path}-wal")
+        version += (wal.st_size, wal.st_mtime_ns)
+    except OSError:
+        pass
+    return version + (_generations.get(Path(db_path), 0),)
+
+
+def open_readonly(db_path: Path) -> sqlite3.Connection:
+    """Open a read-only connection with ``sqlite3.Row`` rows."""
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_snapshot(db_path: Path) -> SnapshotState:
+    """Return the readiness of the snapshot, checking it once per version."""
+    key = Path(db_path)
+    version = snapshot_version(key)
+    cached = _states.get(key)
+    if cached is not None and cached.version == version:
+        return cached
+    with _lock:
+        cached = _states.get(key)
+        if cached is not None and cached.version == version:
+            return cached
+        if version is None:
+            state = SnapshotState(key, (), ready=False, fts=False, message="snapshot missing")
+        else:
+            state = _check(key, version)
+        _states[key] = state
+    logger.info(
+        "snapshot_checked",
+        extra={"db_path": str(key), "ready": state.ready, "fts": state.fts},
+    )
+    return state
+
+
+def reset_snapshots() -> None:
+    """Forget all cached readiness results."""
+    with _lock:
+        _states.clear()
+
+
+def _check(db_path: Path, version: tuple[int, ...]) -> SnapshotState:
+    try:
+        conn = open_readonly(db_path)
+        try:
+            if not table_exists(conn, "nodes"):
+                return SnapshotState(
+                    db_path, version, ready=False, fts=False, message="nodes table missing"
+                )
+            has_edges = table_exists(conn, "edges")
+            present = {
+                "fts": fts_present(conn),
+                "node_stats": has_edges and node_stats_present(conn),
+                "suggest": suggest_present(conn),
+            }
+            # Not built here: the trigram table is large and only the pipeline creates it
+            trigram = trigram_present(conn)
+            # The search fields live in the pipeline's schema; reuse the ones the
+            # outdated table was built with
+            fields = None if present["fts"] else fts_fields(conn)
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as exc:
+        return SnapshotState(db_path, version, ready=False, fts=False, message=str(exc))
+
+    builders: dict[str, Callable[[sqlite3.Connection], None]] = {
+        "fts": partial(build_fts, fields=fields or DEFAULT_FTS_FIELDS),
+        "node_stats": build_node_stats,
+        "suggest": build_suggest,
+    }
+    missing = [name for name, ok in present.items() if not ok]
+    if not has_edges:
+        missing.remove("node_stats")
+    if "fts" in missing and fields is None:
+        logger.warning(
+            "snapshot_fts_default_fields",
+            extra={"fields": [f.name for f in DEFAULT_FTS_FIELDS]},
+        )
+    message = "ok"
+    if missing:
+        # Older snapshot: build what is missing once over a writable connection.
+        try:
+            conn = sqlite3.connect(db_path)
+            try:
+                for name in missing:
+                    builders[name](conn)
+                    present[name] = True
+                    logger.info("snapshot_index_built", extra={"index": name})
+            finally:
+                conn.close()
+        except sqlite3.DatabaseError as exc:
+            logger.warning("snapshot_index_build_failed", extra={"error": str(exc)})
+            message = str(exc)
+        version = snapshot_version(db_path) or version
+    return SnapshotState(
+        db_path,
+        version,
+        ready=True,
+        fts=present["fts"],
+        message=message,
+        node_stats=present["node_stats"],
+        suggest=present["suggest"],
+        trigram=trigram,
+    )
@@ -0,0 +1,42 @@
+"""Typeahead suggestions from the prefix-indexed ``nodes_suggest`` table.
+
+Every word of the typed text becomes a quoted prefix term (``"gra"*``), so
+user input never reaches the FTS5 query parser as syntax, and prefixes of two
+to four characters are answered from the table's prefix indexes.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from typing import Any
+
+MAX_LIMIT = 50
+_WORD = re.compile(r"\w+")
+
+
+def suggest_match(text: str) -> str | None:
+    """Return the FTS5 expression for ``text``, or None if it has no words."""
+    words = _WORD.findall(text or "")
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def suggest(conn: sqlite3.Connection, text: str, limit: int = 10) -> list[dict[str, Any]]:
+    """Return up to ``limit`` (max ``MAX_LIMIT``) nodes whose label starts with the typed words."""
+    match = suggest_match(text)
+    if match is None:
+        return []
+    limit = max(1, min(int(limit or 10), MAX_LIMIT))
+    rows = conn.execute(
+        """
+        SELECT id, type, label
+        FROM nodes_suggest
+        WHERE nodes_suggest MATCH ?
+        ORDER BY rank
+        LIMIT ?
+        """,
+        (match, limit),
+    ).fetchall()
+    return [{"id": r[0], "type": r[1], "label": r[2]} for r in rows]
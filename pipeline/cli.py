@@ -2,16 +2,51 @@ from __future__ import annotations
 
 import argparse
 import logging
+import os
+import sqlite3
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
+from app.embeddings import EMBEDDINGS_TABLE, build_embeddings, export_vectors
+from app.indexes import (
+    FtsField,
+    build_node_stats,
+    build_suggest,
+    build_trigram,
+    fts_present,
+    node_stats_present,
+    suggest_present,
+    table_exists,
+    trigram_present,
+)
+
 from .ai_client import build_backend
 from .config import load_config
 from .hypergraph_writer import HypergraphWriter, Node
-from .markdown_loader import MarkdownDocument, iter_markdown
-from .schema_loader import load_schema  # new import
+from .markdown_loader import (
+    MarkdownDocument,
+    SourceFile,
+    content_hash,
+    load_markdown,
+    scan_markdown,
+)
+from .schema_loader import GraphSchema, load_schema, pk_fields
 
 logger = logging.getLogger("pipeline.cli")
 
+# Files per worker task and chunks in flight per worker for --jobs
+PARSE_CHUNK_FILES = 64
+PARSE_CHUNKS_PER_JOB = 2
+# Default nodes per upsert_nodes call (--batch-size)
+UPSERT_BATCH = 500
+# Log ingest progress every this many files
+PROGRESS_EVERY = 10000
+
+ManifestRow = tuple[str, int, int, str, str]  # path, size, mtime_ns, hash, node_id
+
 
 def main(argv: list[str] | None = None) -> None:
     logging.basicConfig(level=logging.INFO)
@@ -38,6 +73,13 @@ def main(argv: list[str] | None = None) -> None:
         parser.error(f"Unknown command {args.command!r}")
 
 
+def _non_negative_int(value: str) -> int:
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+
 def _build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Hypergraph pipeline CLI (stub implementation).")
     parser.add_argument(
@@ -48,6 +90,24 @@ def _build_parser() -> argparse.ArgumentParser:
             "This can also be toggled via CONTENT_HASH_IDS env var."
         ),
     )
+    parser.add_argument(
+        "--jobs",
+        type=_non_negative_int,
+        default=1,
+        help=(
+            "Worker processes that read and parse markdown (0 = one per CPU). "
+            "Results are applied in file order, so output does not depend on it."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help=(
+            f"Nodes written per executemany batch (default {UPSERT_BATCH}); "
+            "ingest memory is bounded by it."
+        ),
+    )
     subparsers = parser.add_subparsers(dest="command")
 
     p_init = subparsers.add_parser(
@@ -114,26 +174,41 @@ def cmd_init_from_markdown(args: argparse.Namespace | None = None) -> None:
         extra={"entities": [e.label for e in schema.entities]},
     )
 
-    docs = list(iter_markdown(profile_root))
-    logger.info("markdown_documents_found", extra={"count": len(docs)})
-
-    # Stub: just creates the DB and logs nodes that would be created.
-    # Use build_mode for faster bulk ingestion, then finalize FTS
-    with HypergraphWriter(cfg.hypergraph_db_path, build_mode=True) as writer:
-        for doc in docs:
-            node_id = _stable_markdown_id(doc)
-            node_type = doc.metadata.get("type") or "Document"
-            node = Node(id=node_id, type=node_type, data=doc.metadata)
-            writer.upsert_node(node)
-        # Prepare FTS for fast text search at runtime
-        writer.finalize_fts()
-        logger.info("init_from_markdown_done", extra={"nodes": len(docs)})
+    # A fresh database (first run or --rebuild) loads into bare tables and
+    # indexes once at the end; appending keeps indexes and triggers live
+    bulk = not cfg.hypergraph_db_path.exists()
+    with _open_writer(cfg.hypergraph_db_path, schema, bulk_load=bulk) as writer:
+        # discover -> read and parse -> Node -> batched writes; nothing holds the whole tree
+        parsed = _parse_sources(scan_markdown(profile_root), _jobs(args))
+        items = (
+            ((src.rel, src.size, src.mtime_ns, digest, node.id), node)
+            for src, digest, node in parsed
+        )
+        # Later update runs only re-read files that differ from the manifest rows
+        counts = _write_batches(writer, items, _batch_size(args))
+        logger.info("markdown_documents_found", extra={"count": counts["documents"]})
+        if bulk:
+            # FK check, indexes, then FTS and the other derived tables; logs bulk_load_done
+            writer.finish_bulk_load()
+        else:
+            # Prepare FTS for fast text search at runtime
+            writer.finalize_fts()
+        # Vectors for similarity search; export writes them as a mmap-able matrix
+        writer.finalize_embeddings()
+        logger.info("init_from_markdown_done", extra=counts)
 
     # backend.complete is not used yet, but it is built so the interface is tested.
     _ = backend
 
 
 def cmd_update_from_markdown(args: argparse.Namespace | None = None) -> None:
+    """Apply only the markdown changes since the last run, in one transaction.
+
+    The tree is compared against ``source_manifest`` by size and mtime; only
+    files that differ are read, and only those whose content hash changed are
+    parsed and upserted. Nodes whose source file disappeared are deleted. A
+    database without a manifest gets every file upserted once, as init does.
+    """
     cfg = load_config()
     logger.info(
         "update_from_markdown_start",
@@ -143,15 +218,182 @@ def cmd_update_from_markdown(args: argparse.Namespace | None = None) -> None:
             "profile_name": cfg.profile_name,
         },
     )
+    if not cfg.hypergraph_db_path.exists():
+        # Nothing to update yet: build it
+        if args is None:
+            args = argparse.Namespace(rebuild=False, append=True)
+        else:
+            args.rebuild = False
+        cmd_init_from_markdown(args)
+        logger.info("update_from_markdown_done", extra={"initialized": True})
+        return
 
-    # For now, this does the same as init and can be refined later.
-    # Force append semantics on update
-    if args is None:
-        args = argparse.Namespace(rebuild=False, append=True)
-    else:
-        args.rebuild = False
-    cmd_init_from_markdown(args)
-    logger.info("update_from_markdown_done")
+    with _open_writer(cfg.hypergraph_db_path, load_schema()) as writer:
+        conn = writer.conn
+        if not (fts_present(conn) and trigram_present(conn) and suggest_present(conn)):
+            # Older layout: rebuild once so the triggers below delete by rowid
+            writer.finalize_fts()
+            logger.info("update_derived_tables_rebuilt")
+        counts = _apply_markdown_changes(writer, cfg.profile_root, _jobs(args), _batch_size(args))
+    logger.info("update_from_markdown_done", extra=counts)
+
+
+def _open_writer(db_path: Path, schema: GraphSchema, bulk_load: bool = False) -> HypergraphWriter:
+    return HypergraphWriter(
+        db_path,
+        build_mode=True,
+        bulk_load=bulk_load,
+        search_fields=[FtsField(f.name, f.weight) for f in schema.search_fields],
+        attribute_fields=pk_fields(schema),
+    )
+
+
+def _markdown_node(doc: MarkdownDocument) -> Node:
+    node_type = doc.metadata.get("type") or "Document"
+    return Node(id=_stable_markdown_id(doc), type=node_type, data=doc.metadata)
+
+
+def _jobs(args: argparse.Namespace | None) -> int:
+    # Only 0 means auto; the parser rejects negative values
+    return int(getattr(args, "jobs", 1)) or os.cpu_count() or 1
+
+
+def _batch_size(args: argparse.Namespace | None) -> int:
+    return max(1, int(getattr(args, "batch_size", None) or UPSERT_BATCH))
+
+
+def _write_batches(
+    writer: HypergraphWriter,
+    items: Iterable[tuple[ManifestRow, Node | None]],
+    batch_size: int,
+) -> dict[str, int]:
+    """Write ``(manifest row, node)`` items in batches; returns document and batch counts.
+
+    Each batch is one ``upsert_nodes`` and one ``record_sources``
+    ``executemany``; a ``None`` node only refreshes its manifest row. Items
+    are consumed lazily, so memory is bounded by ``batch_size``.
+    """
+    counts = {"documents": 0, "nodes": 0, "batches": 0}
+    started = time.perf_counter()
+    rows: list[ManifestRow] = []
+    nodes: list[Node] = []
+
+    def flush() -> None:
+        writer.upsert_nodes(nodes)
+        writer.record_sources(rows)
+        counts["nodes"] += len(nodes)
+        counts["batches"] += 1
+        rows.clear()
+        nodes.clear()
+
+    for row, node in items:
+        rows.append(row)
+        if node is not None:
+            nodes.append(node)
+        counts["documents"] += 1
+        if len(rows) >= batch_size:
+            flush()
+        if counts["documents"] % PROGRESS_EVERY == 0:
+            logger.info(
+                "ingest_progress",
+                extra={**counts, "seconds": round(time.perf_counter() - started, 2)},
+            )
+    if rows:
+        flush()
+    return counts
+
+
+def _parse_chunk(sources: list[SourceFile]) -> list[tuple[SourceFile, str, Node]]:
+    """Read, hash and parse files into nodes; the unit of work of a ``--jobs`` worker."""
+    out = []
+    for src in sources:
+        raw = src.path.read_bytes()
+        out.append((src, content_hash(raw), _markdown_node(load_markdown(src.path, raw))))
+    return out
+
+
+def _parse_sources(
+    sources: Iterable[SourceFile], jobs: int = 1
+) -> Iterator[tuple[SourceFile, str, Node]]:
+    """Yield ``(source, hash, node)`` for every source, in input order.
+
+    With ``jobs > 1`` chunks of ``PARSE_CHUNK_FILES`` files are parsed in a
+    process pool. At most ``PARSE_CHUNKS_PER_JOB`` chunks per worker are in
+    flight and results are taken in submission order, so memory stays
+    bounded and the caller sees the same sequence as a serial run.
+    """
+    if jobs <= 1:
+        for src in sources:
+            yield from _parse_chunk([src])
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending: deque[Future[list[tuple[SourceFile, str, Node]]]] = deque()
+        chunk: list[SourceFile] = []
+        for src in sources:
+            chunk.append(src)
+            if len(chunk) == PARSE_CHUNK_FILES:
+                pending.append(pool.submit(_parse_chunk, chunk))
+                chunk = []
+                if len(pending) >= jobs * PARSE_CHUNKS_PER_JOB:
+                    yield from pending.popleft().result()
+        if chunk:
+            pending.append(pool.submit(_parse_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _apply_markdown_changes(
+    writer: HypergraphWriter, profile_root: Path, jobs: int = 1, batch_size: int = UPSERT_BATCH
+) -> dict[str, int]:
+    """Sync nodes and the manifest with the files under ``profile_root``; returns counts.
+
+    Runs inside the writer's transaction, which commits on exit. FTS,
+    trigram, suggest and degree tables follow through their triggers;
+    embeddings of touched nodes are refreshed here. Files whose stat data
+    changed stream through ``jobs`` parse workers into batched writes.
+    """
+    manifest = writer.source_manifest()
+    current: dict[str, str] = {}  # path -> node_id after this run
+    upserted: set[str] = set()
+    counts = {"scanned": 0, "unchanged": 0, "touched": 0, "changed": 0, "added": 0}
+
+    def candidates() -> Iterator[SourceFile]:
+        for src in scan_markdown(profile_root):
+            counts["scanned"] += 1
+            old = manifest.get(src.rel)
+            if old is not None and old[:2] == (src.size, src.mtime_ns):
+                counts["unchanged"] += 1
+                current[src.rel] = old[3]
+            else:
+                yield src
+
+    def changes() -> Iterator[tuple[ManifestRow, Node | None]]:
+        for src, digest, node in _parse_sources(candidates(), jobs):
+            old = manifest.get(src.rel)
+            if old is not None and old[2] == digest:
+                # Only the stat data moved (copy, touch); remember it to skip the read next time
+                counts["touched"] += 1
+                current[src.rel] = old[3]
+                yield (src.rel, src.size, src.mtime_ns, digest, old[3]), None
+                continue
+            upserted.add(node.id)
+            counts["changed" if old is not None else "added"] += 1
+            current[src.rel] = node.id
+            yield (src.rel, src.size, src.mtime_ns, digest, node.id), node
+
+    _write_batches(writer, changes(), batch_size)
+
+    removed = [path for path in manifest if path not in current]
+    writer.forget_sources(removed)
+    # Drop nodes no current file produces: deleted files and ids that changed
+    live = set(current.values())
+    stale = {old[3] for old in manifest.values()} - live
+    writer.delete_nodes(sorted(stale))
+    if upserted or stale:
+        writer.refresh_embeddings(upserted | stale)
+    counts["removed"] = len(removed)
+    counts["deleted_nodes"] = len(stale)
+    return counts
 
 
 def cmd_export_sqlite() -> None:
@@ -171,12 +413,45 @@ def cmd_export_sqlite() -> None:
 
     runtime_db.parent.mkdir(parents=True, exist_ok=True)
     runtime_db.write_bytes(source.read_bytes())
+    _ensure_runtime_indexes(runtime_db)
+    _export_vectors(runtime_db)
     logger.info(
         "export_sqlite_done",
         extra={"source": str(source), "runtime_db": str(runtime_db)},
     )
 
 
+def _ensure_runtime_indexes(runtime_db: Path) -> None:
+    """Build degrees and the suggest and trigram tables if the source snapshot predates them."""
+    conn = sqlite3.connect(runtime_db)
+    try:
+        if table_exists(conn, "edges") and not node_stats_present(conn):
+            build_node_stats(conn)
+            logger.info("export_node_stats_built", extra={"runtime_db": str(runtime_db)})
+        if table_exists(conn, "nodes") and not suggest_present(conn):
+            build_suggest(conn)
+            logger.info("export_suggest_built", extra={"runtime_db": str(runtime_db)})
+        if table_exists(conn, "nodes") and not trigram_present(conn):
+            fields = [FtsField(f.name, f.weight) for f in load_schema().search_fields]
+            build_trigram(conn, fields)
+            logger.info("export_trigram_built", extra={"runtime_db": str(runtime_db)})
+    finally:
+        conn.close()
+
+
+def _export_vectors(runtime_db: Path) -> None:
+    """Write the snapshot's embeddings as the memory-mapped sidecars the runtime scans."""
+    conn = sqlite3.connect(runtime_db)
+    try:
+        if table_exists(conn, "nodes") and not table_exists(conn, EMBEDDINGS_TABLE):
+            build_embeddings(conn)
+            logger.info("export_embeddings_built", extra={"runtime_db": str(runtime_db)})
+        count = export_vectors(conn, runtime_db)
+        logger.info("export_vectors_written", extra={"runtime_db": str(runtime_db), "count": count})
+    finally:
+        conn.close()
+
+
 if __name__ == "__main__":
     main()
 
@@ -2,11 +2,31 @@ from __future__ import annotations
 
 import logging
 import sqlite3
-from collections.abc import Iterable
+import time
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from app.embeddings import EMBEDDINGS_TABLE, build_embeddings, update_embeddings
+from app.hyperedges import (
+    HYPEREDGE_BATCH,
+    HyperedgeRow,
+    ParticipantRow,
+    write_hyperedge_batch,
+)
+from app.indexes import (
+    DEFAULT_FTS_FIELDS,
+    FtsField,
+    build_attribute_indexes,
+    build_fts,
+    build_node_stats,
+    build_suggest,
+    build_trigram,
+    drop_derived_triggers,
+    table_exists,
+)
+
 logger = logging.getLogger("pipeline.hypergraph")
 
 
@@ -42,6 +62,21 @@ class Hyperedge:
     participants: list[HyperedgeParticipant] = field(default_factory=list)
 
 
+def _hyperedge_row(hyperedge: Hyperedge) -> HyperedgeRow:
+    return (hyperedge.id, hyperedge.type, json_dumps(hyperedge.data))
+
+
+def _participant_rows(hyperedge: Hyperedge) -> Iterator[ParticipantRow]:
+    for p in hyperedge.participants:
+        yield (
+            hyperedge.id,
+            p.entity_id,
+            p.role or "",
+            int(p.ordinal or 0),
+            json_dumps(p.data or {}),
+        )
+
+
 class HypergraphWriter:
     """Tiny wrapper around a SQLite based hypergraph.
 
@@ -49,16 +84,32 @@ class HypergraphWriter:
     this to use a SQLite graph extension and richer schema.
     """
 
-    def __init__(self, db_path: Path, *, build_mode: bool = False) -> None:
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        build_mode: bool = False,
+        bulk_load: bool = False,
+        search_fields: Iterable[FtsField] | None = None,
+        attribute_fields: Iterable[str] = (),
+    ) -> None:
         self.db_path = db_path
         self.build_mode = build_mode
+        # Load into bare tables; see finish_bulk_load
+        self.bulk_load = bulk_load
+        self.search_fields = tuple(search_fields or DEFAULT_FTS_FIELDS)
+        # Data attributes that get a json_extract expression index for query filters
+        self.attribute_fields = tuple(attribute_fields)
         self._conn: sqlite3.Connection | None = None
+        self._dropped_indexes: list[tuple[str, str]] = []
+        self._bulk_started: float | None = None
 
     def __enter__(self) -> HypergraphWriter:
         # Detect whether this is a brand new database file before connecting
         is_new_db = not self.db_path.exists()
         self._conn = sqlite3.connect(self.db_path)
-        self._conn.execute("PRAGMA foreign_keys = ON;")
+        # Bulk loads check foreign keys once at the end instead of per row
+        self._conn.execute(f"PRAGMA foreign_keys = {'OFF' if self.bulk_load else 'ON'};")
         # Page and cache tuning: set page size before initializing schema on new DBs
         try:
             if is_new_db:
@@ -69,7 +120,7 @@ class HypergraphWriter:
         except sqlite3.DatabaseError:
             # Pragmas may be unavailable depending on build; ignore safely
             pass
-        if self.build_mode:
+        if self.build_mode or self.bulk_load:
             # Speed up batch ingestion while keeping durability reasonable.
             self._conn.execute("PRAGMA journal_mode=WAL;")
             self._conn.execute("PRAGMA synchronous=NORMAL;")
@@ -78,20 +129,31 @@ class HypergraphWriter:
         # self._conn.enable_load_extension(True)
         # self._conn.load_extension("mod_graph")  # example name
         self._ensure_schema()
-        if self.build_mode:
+        if self.bulk_load:
+            self._begin_bulk_load()
+        elif self.build_mode:
             self.ensure_indexes()
         logger.info("hypergraph_opened", extra={"db_path": str(self.db_path)})
         return self
 
     def __exit__(self, exc_type, exc, tb) -> None:
-        if self._conn is not None:
+        if self._conn is None:
+            return
+        try:
+            if exc is None and self._bulk_started is not None:
+                # Never leave a bulk-loaded file without its indexes
+                self.finish_bulk_load()
             if exc is None:
                 self._conn.commit()
             else:
                 self._conn.rollback()
+        except Exception:
+            self._conn.rollback()
+            raise
+        finally:
             self._conn.close()
+            self._conn = None
             logger.info("hypergraph_closed", extra={"db_path": str(self.db_path)})
-        self._conn = None
 
     @property
     def conn(self) -> sqlite3.Connection:
@@ -146,6 +208,18 @@ class HypergraphWriter:
             );
             """
         )
+        # One row per ingested source file; update runs compare against it
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS source_manifest (
+                path      TEXT PRIMARY KEY,
+                size      INTEGER NOT NULL,
+                mtime_ns  INTEGER NOT NULL,
+                hash      TEXT NOT NULL,
+                node_id   TEXT NOT NULL
+            );
+            """
+        )
         self.conn.commit()
 
     def ensure_indexes(self) -> None:
@@ -160,7 +234,73 @@ class HypergraphWriter:
         )
         cur.execute("CREATE INDEX IF NOT EXISTS idx_he_by_entity ON hyperedge_entities(entity_id);")
         cur.execute("CREATE INDEX IF NOT EXISTS idx_hyperedges_type ON hyperedges(type);")
+        build_attribute_indexes(self.conn, self.attribute_fields)
+        self.conn.commit()
+
+    def _begin_bulk_load(self) -> None:
+        """Drop secondary indexes and derived-table triggers before loading rows.
+
+        The drops open the load transaction, so a failed load rolls them back too.
+        """
+        self.conn.execute("BEGIN;")
+        rows = self.conn.execute(
+            """
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND sql IS NOT NULL
+              AND tbl_name IN ('nodes', 'edges', 'hyperedges', 'hyperedge_entities')
+            """
+        ).fetchall()
+        for name, _ in rows:
+            self.conn.execute(f'DROP INDEX "{name}";')
+        # Kept so indexes created outside ensure_indexes come back too
+        self._dropped_indexes = [(name, sql) for name, sql in rows]
+        drop_derived_triggers(self.conn)
+        self._bulk_started = time.perf_counter()
+        logger.info("bulk_load_started", extra={"dropped_indexes": len(rows)})
+
+    def finish_bulk_load(self) -> dict[str, float]:
+        """End a bulk load: check foreign keys, create indexes, rebuild derived tables.
+
+        The rows loaded since ``__enter__`` are one transaction. One
+        ``PRAGMA foreign_key_check`` pass validates them all; on violations
+        ``sqlite3.IntegrityError`` is raised and the writer rolls the load
+        back on exit. Then indexes are created once and the FTS, trigram,
+        suggest and degree tables are rebuilt with their triggers. Returns
+        per-phase timings in seconds; ``__exit__`` calls it if not done.
+        """
+        if self._bulk_started is None:
+            return {}
+        timings = {"load_s": time.perf_counter() - self._bulk_started}
+
+        started = time.perf_counter()
+        violations = self.conn.execute("PRAGMA foreign_key_check;").fetchall()
+        if violations:
+            table, rowid, parent, _ = violations[0]
+            raise sqlite3.IntegrityError(
+                f"bulk load has {len(violations)} foreign key violations, "
+                f"first: {table} rowid {rowid} references missing {parent} row"
+            )
+        timings["fk_check_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.ensure_indexes()
+        present = {
+            r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        for name, sql in self._dropped_indexes:
+            if name not in present:
+                self.conn.execute(sql)
+        timings["indexes_s"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.finalize_fts()
+        timings["fts_s"] = time.perf_counter() - started
+
         self.conn.commit()
+        self.conn.execute("PRAGMA foreign_keys = ON;")
+        self._bulk_started = None
+        logger.info("bulk_load_done", extra={k: round(v, 3) for k, v in timings.items()})
+        return timings
 
     def upsert_node(self, node: Node) -> None:
         logger.info("upsert_node", extra={"id": node.id, "type": node.type})
@@ -232,99 +372,117 @@ class HypergraphWriter:
 
     def upsert_hyperedge(self, hyperedge: Hyperedge) -> None:
         logger.info("upsert_hyperedge", extra={"id": hyperedge.id, "type": hyperedge.type})
-        self.conn.execute(
-            """
-            INSERT INTO hyperedges (id, type, data)
-            VALUES (?, ?, json(?))
-            ON CONFLICT(id) DO UPDATE SET
-                type = excluded.type,
-                data = excluded.data;
-            """,
-            (hyperedge.id, hyperedge.type, json_dumps(hyperedge.data)),
+        write_hyperedge_batch(
+            self.conn, [_hyperedge_row(hyperedge)], list(_participant_rows(hyperedge))
         )
-        if hyperedge.participants:
-            part_batch = [
-                (
-                    hyperedge.id,
-                    p.entity_id,
-                    p.role or "",
-                    int(p.ordinal or 0),
-                    json_dumps(p.data or {}),
-                )
-                for p in hyperedge.participants
-            ]
-            self.conn.executemany(
-                """
-                INSERT INTO hyperedge_entities (hyperedge_id, entity_id, role, ordinal, data)
-                VALUES (?, ?, ?, ?, json(?))
-                ON CONFLICT(hyperedge_id, entity_id, role, ordinal) DO UPDATE SET
-                    data = excluded.data;
-                """,
-                part_batch,
+
+    def upsert_hyperedges(
+        self,
+        hyperedges: Iterable[Hyperedge],
+        *,
+        replace_participants: bool = False,
+        batch_size: int = HYPEREDGE_BATCH,
+    ) -> dict[str, int]:
+        """Upsert many hyperedges with two ``executemany`` calls per batch.
+
+        With ``replace_participants`` each hyperedge's stored participants are
+        replaced by the ones given here instead of merged with them; a
+        hyperedge listed more than once keeps the participants of every entry.
+        """
+        batch_size = max(1, batch_size)
+        counts = {"hyperedges": 0, "participants": 0, "cleared": 0, "batches": 0}
+        replaced: set[str] = set()
+        he_rows: list[HyperedgeRow] = []
+        part_rows: list[ParticipantRow] = []
+        clear_ids: list[str] = []
+
+        def flush() -> None:
+            counts["cleared"] += write_hyperedge_batch(
+                self.conn, he_rows, part_rows, replace_ids=clear_ids
             )
+            counts["hyperedges"] += len(he_rows)
+            counts["participants"] += len(part_rows)
+            counts["batches"] += 1
+            he_rows.clear()
+            part_rows.clear()
+            clear_ids.clear()
 
-    def upsert_hyperedges(self, hyperedges: Iterable[Hyperedge]) -> None:
         for he in hyperedges:
-            self.upsert_hyperedge(he)
+            he_rows.append(_hyperedge_row(he))
+            part_rows.extend(_participant_rows(he))
+            if replace_participants and he.id not in replaced:
+                replaced.add(he.id)
+                clear_ids.append(he.id)
+            if len(he_rows) >= batch_size:
+                flush()
+        if he_rows:
+            flush()
+        logger.info("upsert_hyperedges", extra=counts)
+        return counts
 
-    def finalize_fts(self) -> None:
-        """Create and backfill FTS indexes for text search on nodes."""
-        cur = self.conn.cursor()
-        cur.execute(
-            """
-            CREATE VIRTUAL TABLE IF NOT EXISTS nodes_fts
-            USING fts5(id, content, tokenize='porter');
-            """
-        )
-        # Full refresh
-        cur.execute("DELETE FROM nodes_fts;")
-        cur.execute(
-            """
-            INSERT INTO nodes_fts (id, content)
-            SELECT id,
-                   coalesce(json_extract(data, '$.name'), '') || ' ' ||
-                   coalesce(json_extract(data, '$.about'), '') || ' ' ||
-                   type
-            FROM nodes;
-            """
-        )
-        # Keep in sync after build
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS nodes_ai AFTER INSERT ON nodes BEGIN
-                INSERT INTO nodes_fts (id, content)
-                VALUES (
-                  NEW.id,
-                  coalesce(json_extract(NEW.data, '$.name'), '') || ' ' ||
-                  coalesce(json_extract(NEW.data, '$.about'), '') || ' ' ||
-                  NEW.type
-                );
-            END;
-            """
-        )
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS nodes_au AFTER UPDATE ON nodes BEGIN
-                DELETE FROM nodes_fts WHERE id = OLD.id;
-                INSERT INTO nodes_fts (id, content)
-                VALUES (
-                  NEW.id,
-                  coalesce(json_extract(NEW.data, '$.name'), '') || ' ' ||
-                  coalesce(json_extract(NEW.data, '$.about'), '') || ' ' ||
-                  NEW.type
-                );
-            END;
-            """
-        )
-        cur.execute(
-            """
-            CREATE TRIGGER IF NOT EXISTS nodes_ad AFTER DELETE ON nodes BEGIN
-                DELETE FROM nodes_fts WHERE id = OLD.id;
-            END;
+    def delete_nodes(self, ids: Iterable[str]) -> None:
+        """Delete nodes by id; their edges and hyperedge memberships cascade."""
+        self.conn.executemany("DELETE FROM nodes WHERE id = ?", ((i,) for i in ids))
+
+    def source_manifest(self) -> dict[str, tuple[int, int, str, str]]:
+        """Return ``path -> (size, mtime_ns, hash, node_id)`` for every recorded source file."""
+        rows = self.conn.execute(
+            "SELECT path, size, mtime_ns, hash, node_id FROM source_manifest"
+        ).fetchall()
+        return {r[0]: (r[1], r[2], r[3], r[4]) for r in rows}
+
+    def record_sources(self, rows: Iterable[tuple[str, int, int, str, str]]) -> None:
+        """Upsert ``(path, size, mtime_ns, hash, node_id)`` manifest rows."""
+        self.conn.executemany(
             """
+            INSERT INTO source_manifest (path, size, mtime_ns, hash, node_id)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size     = excluded.size,
+                mtime_ns = excluded.mtime_ns,
+                hash     = excluded.hash,
+                node_id  = excluded.node_id;
+            """,
+            rows,
         )
+
+    def forget_sources(self, paths: Iterable[str]) -> None:
+        self.conn.executemany("DELETE FROM source_manifest WHERE path = ?", ((p,) for p in paths))
+
+    def finalize_fts(self) -> None:
+        """Create and backfill FTS indexes and materialized node degrees.
+
+        The FTS table gets one column per configured search field, ranked by
+        BM25 with the configured weights (see ``search.fields`` in
+        ``config/graph_schema.yaml``); a trigram-tokenized twin over the same
+        fields serves fuzzy and substring queries. A separate prefix-indexed
+        table serves typeahead suggestions.
+        """
+        build_fts(self.conn, self.search_fields)
+        build_trigram(self.conn, self.search_fields)
+        build_suggest(self.conn)
+        # Degrees for neighbor ranking; triggers keep them current on edge upserts
+        build_node_stats(self.conn)
         self.conn.commit()
 
+    def finalize_embeddings(self) -> int:
+        """Embed every node with the local hashing embedder into ``node_embeddings``.
+
+        Export turns the table into the memory-mapped matrix that
+        ``/mcp/similar`` scans. Returns the number of vectors.
+        """
+        count = build_embeddings(self.conn)
+        logger.info("embeddings_built", extra={"count": count})
+        return count
+
+    def refresh_embeddings(self, ids: Iterable[str]) -> int:
+        """Re-embed just ``ids`` after an incremental update; no-op before the first build."""
+        if not table_exists(self.conn, EMBEDDINGS_TABLE):
+            return 0
+        count = update_embeddings(self.conn, ids)
+        logger.info("embeddings_refreshed", extra={"count": count})
+        return count
+
 
 def json_dumps(data: dict[str, Any]) -> str:
     # Avoid adding a hard dependency on orjson here, plain json is fine.
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from collections.abc import Iterable
+import os
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -22,6 +24,52 @@ class MarkdownDocument:
     body: str
 
 
+@dataclass
+class SourceFile:
+    """A markdown file found by ``scan_markdown``, before it is read.
+
+    rel       path relative to the scanned root, with ``/`` separators
+    size      size in bytes
+    mtime_ns  modification time in nanoseconds
+    """
+
+    path: Path
+    rel: str
+    size: int
+    mtime_ns: int
+
+
+def scan_markdown(root: Path) -> Iterator[SourceFile]:
+    """Yield the markdown files under ``root`` with their ``stat`` data, sorted by path.
+
+    Directories are walked one at a time with their entries sorted, which
+    gives the same order as ``sorted(root.rglob("*.md"))`` without holding
+    the whole tree in memory. Only directory entries are read, so scanning
+    an unchanged tree costs one ``stat`` per file and no file reads.
+    """
+    if not root.exists():
+        logger.info("markdown_root_missing", extra={"root": str(root)})
+        return
+    yield from _scan_dir(root, "")
+
+
+def _scan_dir(directory: Path, prefix: str) -> Iterator[SourceFile]:
+    with os.scandir(directory) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        rel = prefix + entry.name
+        if entry.is_dir(follow_symlinks=False):
+            yield from _scan_dir(Path(entry.path), rel + "/")
+        elif entry.name.endswith(".md") and entry.is_file():
+            st = entry.stat()
+            yield SourceFile(Path(entry.path), rel, st.st_size, st.st_mtime_ns)
+
+
+def content_hash(raw: bytes) -> str:
+    """Return the hex SHA-256 of a file's bytes, as stored in the source manifest."""
+    return hashlib.sha256(raw).hexdigest()
+
+
 def iter_markdown(root: Path) -> Iterable[MarkdownDocument]:
     """Yield all markdown documents under a given root.
 
@@ -35,21 +83,21 @@ def iter_markdown(root: Path) -> Iterable[MarkdownDocument]:
 
     Anything that is not front matter is treated as body.
     """
-    if not root.exists():
-        logger.info("markdown_root_missing", extra={"root": str(root)})
-        return
-
-    for path in sorted(root.rglob("*.md")):
-        doc = _load_single(path)
+    for src in scan_markdown(root):
+        doc = load_markdown(src.path)
         logger.info(
             "markdown_loaded",
-            extra={"path": str(path), "has_metadata": bool(doc.metadata)},
+            extra={"path": str(src.path), "has_metadata": bool(doc.metadata)},
         )
         yield doc
 
 
-def _load_single(path: Path) -> MarkdownDocument:
-    text = path.read_text(encoding="utf8")
+def load_markdown(path: Path, raw: bytes | None = None) -> MarkdownDocument:
+    """Parse one markdown file; pass ``raw`` when its bytes were already read."""
+    if raw is None:
+        raw = path.read_bytes()
+    # Same newline handling as read_text
+    text = raw.decode("utf8").replace("\r\n", "\n").replace("\r", "\n")
     metadata: dict[str, Any] = {}
     body = text
 
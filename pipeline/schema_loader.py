@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import logging
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
+from app.indexes import DEFAULT_FTS_FIELDS
+
 logger = logging.getLogger("pipeline.schema")
 
 try:
@@ -20,12 +22,34 @@ class EntitySchema:
     examples: list[str]
 
 
+@dataclass
+class SearchField:
+    """A node field indexed for full text search and its BM25 weight."""
+
+    name: str
+    weight: float = 1.0
+
+
+def default_search_fields() -> list[SearchField]:
+    # The runtime builds FTS for older snapshots with the same defaults
+    return [SearchField(name=f.name, weight=f.weight) for f in DEFAULT_FTS_FIELDS]
+
+
 @dataclass
 class GraphSchema:
     name: str
     version: str
     description: str
     entities: list[EntitySchema]
+    search_fields: list[SearchField] = field(default_factory=default_search_fields)
+
+
+def pk_fields(schema: GraphSchema) -> list[str]:
+    """Return the data attributes named in entity primary keys, in first-seen order.
+
+    ``id`` is the node's own key and already indexed, so it is left out.
+    """
+    return list(dict.fromkeys(f for e in schema.entities for f in e.pk if f != "id"))
 
 
 def _default_schema() -> GraphSchema:
@@ -109,11 +133,19 @@ def load_schema(schema_path: Path | None = None) -> GraphSchema:
         examples = [str(v) for v in item.get("examples", [])]
         entities.append(EntitySchema(label=label, pk=pk, examples=examples))
 
+    search_raw = (data.get("search", {}) or {}).get("fields", []) or []
+    search_fields = [
+        SearchField(name=str(item.get("name", "")), weight=float(item.get("weight", 1.0)))
+        for item in search_raw
+        if item.get("name")
+    ]
+
     schema = GraphSchema(
         name=str(meta.get("name", "graph")),
         version=str(meta.get("version", "1.0")),
         description=str(meta.get("description", "")),
         entities=entities,
+        search_fields=search_fields or default_search_fields(),
     )
 
     logger.info(
@@ -123,6 +155,7 @@ def load_schema(schema_path: Path | None = None) -> GraphSchema:
             "name": schema.name,
             "version": schema.version,
             "entities": [e.label for e in schema.entities],
+            "search_fields": {f.name: f.weight for f in schema.search_fields},
         },
     )
     return schema
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Measure IVF recall@k and latency against exact vector search.
+
+Generates ``--vectors`` clustered unit vectors, builds the IVF index the way
+``export-sqlite`` does, then runs ``--queries`` perturbed copies of stored
+vectors through ``VectorIndex.search`` once exactly and once per ``--nprobe``
+value. Recall@k is the share of the exact top-k that the IVF search returns.
+
+Usage: python scripts/bench_ann_recall.py --vectors 200000 --nprobe 1 4 8 16 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.ann import IvfIndex  # noqa: E402
+from app.embeddings import VectorIndex  # noqa: E402
+
+
+def make_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def run(index: VectorIndex, queries: np.ndarray, k: int, nprobe: int) -> tuple[list, float]:
+    index.search(queries[0], k, nprobe=nprobe)  # warm up
+    start = time.perf_counter()
+    results = [[p for p, _ in index.search(q, k, nprobe=nprobe)] for q in queries]
+    return results, (time.perf_counter() - start) / len(queries)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--vectors", type=int, default=100000)
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--clusters", type=int, default=500)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    vectors = make_vectors(args.vectors, args.dim, args.clusters, rng)
+    positions = np.arange(1, args.vectors + 1, dtype=np.int64)
+
+    start = time.perf_counter()
+    ivf = IvfIndex.build(vectors, seed=args.seed)
+    print(
+        f"build: {args.vectors} vectors, {ivf.nlist} lists in {time.perf_counter() - start:.1f} s"
+    )
+
+    picks = rng.choice(args.vectors, args.queries, replace=False)
+    queries = vectors[picks] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(
+        np.float32
+    )
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    exact, t_exact = run(VectorIndex(vectors, positions), queries, args.k, 0)
+    print(f"exact: {t_exact * 1e3:.2f} ms/query")
+    approx = VectorIndex(vectors, positions, ivf)
+    for nprobe in args.nprobe:
+        found, t_ivf = run(approx, queries, args.k, nprobe)
+        recall = np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact, strict=True)])
+        print(
+            f"nprobe={nprobe}: recall@{args.k}={recall:.3f} "
+            f"{t_ivf * 1e3:.2f} ms/query ({t_exact / t_ivf:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
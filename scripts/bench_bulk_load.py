@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Compare bulk load with loading into live indexes and triggers.
+
+Generates ``--nodes`` nodes and ``--edges`` edges between them and loads
+them into a new database twice, in ``--batch-size`` ``executemany`` batches:
+
+- live: ``build_mode`` writer whose indexes and FTS, trigram, suggest and
+  degree triggers already exist (``finalize_fts`` on the empty database), so
+  every row maintains them and foreign keys are checked per row
+- bulk: ``HypergraphWriter(bulk_load=True)`` into bare tables, then
+  ``finish_bulk_load()`` checks foreign keys and builds everything once
+
+Usage: python scripts/bench_bulk_load.py --nodes 200000 --edges 400000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.hypergraph_writer import Edge, HypergraphWriter, Node  # noqa: E402
+
+
+def nodes(n: int) -> Iterator[Node]:
+    for i in range(n):
+        yield Node(
+            id=f"n{i}",
+            type="Doc" if i % 3 else "Person",
+            data={"name": f"Node {i}", "about": f"topic {i % 97} bench"},
+        )
+
+
+def edges(m: int, n: int, seed: int) -> Iterator[Edge]:
+    rng = random.Random(seed)
+    for i in range(m):
+        src, dst = rng.randrange(n), rng.randrange(n)
+        yield Edge(id=f"e{i}", type="LINKS", source=f"n{src}", target=f"n{dst}", data={})
+
+
+def load(writer: HypergraphWriter, args: argparse.Namespace) -> None:
+    node_iter = nodes(args.nodes)
+    while node_batch := list(islice(node_iter, args.batch_size)):
+        writer.upsert_nodes(node_batch)
+    edge_iter = edges(args.edges, args.nodes, args.seed)
+    while edge_batch := list(islice(edge_iter, args.batch_size)):
+        writer.upsert_edges(edge_batch)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--nodes", type=int, default=200000)
+    ap.add_argument("--edges", type=int, default=400000)
+    ap.add_argument("--batch-size", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        with HypergraphWriter(Path(tmp) / "live.db", build_mode=True) as writer:
+            writer.finalize_fts()
+            load(writer, args)
+        t_live = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with HypergraphWriter(Path(tmp) / "bulk.db", bulk_load=True) as writer:
+            load(writer, args)
+            phases = writer.finish_bulk_load()
+        t_bulk = time.perf_counter() - start
+
+    print(f"{args.nodes} nodes, {args.edges} edges")
+    print(f"live: {t_live:.1f} s")
+    print(
+        f"bulk: {t_bulk:.1f} s ({t_live / t_bulk:.1f}x faster; "
+        + ", ".join(f"{k} {v:.1f}" for k, v in phases.items())
+        + ")"
+    )
+
+
+if __name__ == "__main__":
+    main()
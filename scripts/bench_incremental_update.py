@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Time incremental ``update-from-markdown`` against a full re-ingest.
+
+Generates ``--files`` small markdown files (front matter plus a short body)
+in a throwaway profile, builds the hypergraph with ``init-from-markdown``,
+then times:
+
+- a no-op update (every file matches its ``source_manifest`` row)
+- an update after ``--changed`` files were rewritten
+- ``init-from-markdown --rebuild``, the full re-ingest an update avoids
+
+Usage: python scripts/bench_incremental_update.py --files 50000 --changed 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.cli import main as pipeline_main  # noqa: E402
+
+FILES_PER_DIR = 500
+
+
+def write_doc(root: Path, i: int, revision: int = 0) -> None:
+    path = root / f"d{i // FILES_PER_DIR:04d}" / f"doc{i}.md"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        f"---\nid: doc{i}\nname: Document {i}\nabout: revision {revision}\n---\n"
+        f"Body of document {i}.\n",
+        encoding="utf8",
+    )
+
+
+def timed(argv: list[str]) -> float:
+    start = time.perf_counter()
+    pipeline_main(argv)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, default=50000)
+    ap.add_argument("--changed", type=int, default=100)
+    args = ap.parse_args()
+    # Keep the pipeline's INFO logs out of the timings
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "md" / "profile"
+        for i in range(args.files):
+            write_doc(root, i)
+        os.environ["HYPERGRAPH_DB_PATH"] = str(Path(tmp) / "hypergraph.db")
+        os.environ["MARKDOWN_ROOT"] = str(root.parent)
+        os.environ["PROFILE_NAME"] = root.name
+
+        t_init = timed(["init-from-markdown"])
+        t_noop = timed(["update-from-markdown"])
+        for i in range(0, args.files, max(1, args.files // max(1, args.changed))):
+            write_doc(root, i, revision=1)
+        t_changed = timed(["update-from-markdown"])
+        t_rebuild = timed(["init-from-markdown", "--rebuild"])
+
+    print(f"{args.files} files: init {t_init:.1f} s, rebuild {t_rebuild:.1f} s")
+    print(f"update, no changes: {t_noop:.2f} s ({t_rebuild / t_noop:.0f}x faster than rebuild)")
+    print(f"update, {args.changed} changed: {t_changed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
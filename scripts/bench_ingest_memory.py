@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Measure the Python heap peak of ``init-from-markdown`` per corpus and batch size.
+
+For every ``--files`` count a throwaway profile of small markdown files is
+generated, then ``init-from-markdown --rebuild`` runs once per
+``--batch-size`` under ``tracemalloc``. Streaming ingest keeps the peak tied
+to the batch size, so it should stay flat as the corpus grows.
+
+Usage: python scripts/bench_ingest_memory.py --files 10000 50000 --batch-size 500 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.cli import main as pipeline_main  # noqa: E402
+
+FILES_PER_DIR = 500
+
+
+def write_profile(root: Path, files: int) -> None:
+    for i in range(files):
+        path = root / f"d{i // FILES_PER_DIR:04d}" / f"doc{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            f"---\nid: doc{i}\nname: Document {i}\nabout: {'topic ' * 20}\n---\n"
+            f"{'Body text. ' * 40}\n",
+            encoding="utf8",
+        )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, nargs="+", default=[10000, 50000])
+    ap.add_argument("--batch-size", type=int, nargs="+", default=[500, 5000])
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "md" / "profile"
+            write_profile(root, files)
+            os.environ["HYPERGRAPH_DB_PATH"] = str(Path(tmp) / "hypergraph.db")
+            os.environ["MARKDOWN_ROOT"] = str(root.parent)
+            os.environ["PROFILE_NAME"] = root.name
+            for batch_size in args.batch_size:
+                tracemalloc.start()
+                start = time.perf_counter()
+                pipeline_main(["--batch-size", str(batch_size), "init-from-markdown", "--rebuild"])
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(
+                    f"{files} files, batch {batch_size}: "
+                    f"peak {peak / 2**20:.1f} MB in {elapsed:.1f} s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Compare parsed vs raw-JSON passthrough result encoding.
+
+Builds a throwaway snapshot with ``--nodes`` matching nodes, then times one
+query plus response encoding per mode:
+
+- parsed: ``run_query`` decodes every ``data`` value, HTTP validates through
+  ``GraphResponse`` and gRPC re-encodes with ``json.dumps``
+- raw: ``run_query(raw=True)`` keeps the stored JSON text, HTTP splices it into
+  the body and gRPC copies it into ``Json.raw``
+
+Usage: python scripts/bench_raw_json.py --nodes 500 --repeat 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import mcp_pb2  # noqa: E402
+from app.indexes import build_fts  # noqa: E402
+from app.main import GraphEdge, GraphNode, GraphResponse  # noqa: E402
+from app.query import QueryOpts, encode_graph_json, run_query  # noqa: E402
+from app.snapshot import open_readonly  # noqa: E402
+
+
+def build_db(path: Path, nodes: int) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+        conn.execute(
+            "CREATE TABLE edges (id TEXT PRIMARY KEY, type TEXT, source TEXT, target TEXT, "
+            "data TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO nodes (id, type, data) VALUES (?, 'Doc', json(?))",
+            (
+                (
+                    f"n{i}",
+                    json.dumps(
+                        {
+                            "name": f"bench node {i}",
+                            "about": "benchmark " * 20,
+                            "tags": [f"t{j}" for j in range(10)],
+                            "meta": {"rank": i, "score": i / 7, "source": f"docs/{i}.md"},
+                        }
+                    ),
+                )
+                for i in range(nodes)
+            ),
+        )
+        conn.commit()
+        build_fts(conn)
+    finally:
+        conn.close()
+
+
+def timed(fn: Callable[[], Any], repeat: int) -> float:
+    fn()  # warm up statement cache and page cache
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--nodes", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    pb2: Any = mcp_pb2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        build_db(db_path, args.nodes)
+        conn = open_readonly(db_path)
+        opts = QueryOpts(term="bench", limit=args.nodes)
+
+        def http_parsed() -> bytes:
+            result = run_query(conn, opts)
+            return (
+                GraphResponse(
+                    nodes=[GraphNode(**n) for n in result["nodes"]],
+                    edges=[GraphEdge(**e) for e in result["edges"]],
+                )
+                .model_dump_json()
+                .encode()
+            )
+
+        def http_raw() -> bytes:
+            return encode_graph_json(run_query(conn, opts, raw=True))
+
+        def grpc_parsed() -> bytes:
+            result = run_query(conn, opts)
+            nodes = [
+                pb2.Node(id=n["id"], type=n["type"], data=pb2.Json(raw=json.dumps(n["data"])))
+                for n in result["nodes"]
+            ]
+            return pb2.QueryResult(nodes=nodes).SerializeToString()
+
+        def grpc_raw() -> bytes:
+            result = run_query(conn, opts, raw=True)
+            nodes = [
+                pb2.Node(id=n["id"], type=n["type"], data=pb2.Json(raw=n["data"]))
+                for n in result["nodes"]
+            ]
+            return pb2.QueryResult(nodes=nodes).SerializeToString()
+
+        pairs = [("http", http_parsed, http_raw), ("grpc", grpc_parsed, grpc_raw)]
+        try:
+            for name, parsed, raw in pairs:
+                t_parsed = timed(parsed, args.repeat)
+                t_raw = timed(raw, args.repeat)
+                print(
+                    f"{name}: {args.nodes} nodes/result "
+                    f"parsed={t_parsed * 1e3:.2f} ms raw={t_raw * 1e3:.2f} ms "
+                    f"saved={(t_parsed - t_raw) * 1e3:.2f} ms/result "
+                    f"({(t_parsed - t_raw) / args.nodes * 1e6:.1f} us/node, "
+                    f"{t_parsed / t_raw:.1f}x)"
+                )
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
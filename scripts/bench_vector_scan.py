@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Time the exact block-wise vector scan behind ``/mcp/similar``.
+
+Writes ``--vectors`` random unit vectors as the ``.npy`` sidecars that
+``export-sqlite`` produces, memory-maps them with ``VectorIndex.load`` like
+the runtime does, then times ``--queries`` exact top-``--k`` searches. The
+first query pages the matrix in and is reported separately.
+
+Usage: python scripts/bench_vector_scan.py --vectors 1000000 --dim 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.embeddings import VectorIndex, sidecar_paths  # noqa: E402
+
+
+def write_sidecars(db_path: Path, n: int, dim: int, rng: np.random.Generator) -> None:
+    matrix_path, rows_path = sidecar_paths(db_path)
+    matrix = np.lib.format.open_memmap(matrix_path, mode="w+", dtype=np.float32, shape=(n, dim))
+    for start in range(0, n, 65536):
+        block = rng.standard_normal((min(65536, n - start), dim)).astype(np.float32)
+        matrix[start : start + len(block)] = block / np.linalg.norm(block, axis=1, keepdims=True)
+    matrix.flush()
+    del matrix
+    np.save(rows_path, np.arange(1, n + 1, dtype=np.int64))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--vectors", type=int, default=1000000)
+    ap.add_argument("--dim", type=int, default=256)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        write_sidecars(db_path, args.vectors, args.dim, rng)
+        index = VectorIndex.load(db_path)
+        queries = rng.standard_normal((args.queries + 1, args.dim)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        start = time.perf_counter()
+        index.search(queries[0], args.k)
+        t_cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for q in queries[1:]:
+            index.search(q, args.k)
+        t_warm = (time.perf_counter() - start) / args.queries
+        print(
+            f"{args.vectors} x {args.dim}: first query {t_cold * 1e3:.0f} ms, "
+            f"then {t_warm * 1e3:.1f} ms/query (top-{args.k})"
+        )
+        del index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import sqlite3
+from pathlib import Path
+
+import app.adjacency as A
+from app.adjacency import AdjacencyIndex, adjacency_stats, get_adjacency
+from app.query import QueryOpts, run_query
+
+
+def _make_graph(tmp_path: Path) -> Path:
+    db_path = tmp_path / "g.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+        conn.execute(
+            "CREATE TABLE edges (id TEXT PRIMARY KEY, type TEXT, source TEXT, target TEXT, "
+            "data TEXT)"
+        )
+        for nid, name in [("a", "Alice"), ("b", "Bob"), ("c", "Carol"), ("hub", "Hub")]:
+            conn.execute(
+                "INSERT INTO nodes (id, type, data) VALUES (?, 'Person', json(?))",
+                (nid, f'{{"name": "{name}"}}'),
+            )
+        edges = [
+            ("e1", "a", "b"),
+            ("e2", "a", "hub"),
+            ("e3", "hub", "b"),
+            ("e4", "hub", "c"),
+            ("e5", "c", "a"),
+        ]
+        for eid, s, t in edges:
+            conn.execute(
+                "INSERT INTO edges (id, type, source, target, data) "
+                "VALUES (?, 'Knows', ?, ?, '{}')",
+                (eid, s, t),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_index_builds_csr_in_both_directions(tmp_path: Path):
+    conn = _connect(_make_graph(tmp_path))
+    try:
+        index = AdjacencyIndex.load(conn)
+    finally:
+        conn.close()
+    assert index.node_count == 4
+    assert index.edge_count == 5
+    hub = index.node_index["hub"]
+    assert index.out_offsets[hub + 1] - index.out_offsets[hub] == 2
+    assert index.in_offsets[hub + 1] - index.in_offsets[hub] == 1
+    assert index.degree(hub) == 3
+    assert index.memory_bytes() > 0
+
+
+def test_index_expansion_matches_sql(tmp_path: Path):
+    conn = _connect(_make_graph(tmp_path))
+    try:
+        index = AdjacencyIndex.load(conn)
+        for budget in (1, 2, 10):
+            opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=budget)
+            via_sql = run_query(conn, opts)
+            via_index = run_query(conn, opts, adjacency=index)
+            assert [e["id"] for e in via_index["edges"]] == [e["id"] for e in via_sql["edges"]]
+            assert {n["id"] for n in via_index["nodes"]} == {n["id"] for n in via_sql["nodes"]}
+
+        opts = QueryOpts(
+            term="Alice", expand_neighbors=True, neighbor_budget=10, neighbor_ranking="none"
+        )
+        result = run_query(conn, opts, adjacency=index)
+        assert {e["id"] for e in result["edges"]} == {"e1", "e2", "e5"}
+    finally:
+        conn.close()
+
+
+def test_get_adjacency_falls_back_to_sql_when_too_large(monkeypatch, tmp_path: Path):
+    db_path = _make_graph(tmp_path)
+    conn = _connect(db_path)
+    try:
+        monkeypatch.setattr(A, "MAX_EDGES", 2)
+        assert get_adjacency(db_path, conn) is None
+        stats = adjacency_stats(db_path)
+        assert stats is not None and stats["enabled"] is False
+
+        monkeypatch.setattr(A, "MAX_EDGES", 100)
+        conn.execute("INSERT INTO nodes (id, type, data) VALUES ('d', 'Person', '{}')")
+        conn.commit()  # new snapshot version triggers a reload
+        index = get_adjacency(db_path, conn)
+        assert index is not None
+        assert get_adjacency(db_path, conn) is index
+
+        monkeypatch.setattr(A, "ADJACENCY_MODE", "off")
+        assert get_adjacency(db_path, conn) is None
+    finally:
+        conn.close()
+
+
+def test_grpc_writes_patch_the_index_instead_of_reloading(monkeypatch, tmp_path: Path):
+    from typing import Any
+
+    from app import mcp_pb2
+    from app.mcp_service import McpService
+
+    db_path = _make_graph(tmp_path)
+    pb2: Any = mcp_pb2
+    service = McpService(db_path)
+    conn = _connect(db_path)
+    try:
+        index = get_adjacency(db_path, conn)
+        assert index is not None
+
+        # Node writes leave edges alone: the same index serves the new version
+        service._upsert_nodes_sync(
+            pb2.UpsertNodesRequest(nodes=[pb2.Node(id="d", type="Person", data=pb2.Json())])
+        )
+        assert get_adjacency(db_path, conn) is index
+
+        # New edge d -> a and e5 re-pointed from c -> a to c -> d
+        service._upsert_edges_sync(
+            pb2.UpsertEdgesRequest(
+                edges=[
+                    pb2.Edge(id="e6", type="Knows", source="d", target="a", data=pb2.Json()),
+                    pb2.Edge(id="e5", type="Knows", source="c", target="d", data=pb2.Json()),
+                ]
+            )
+        )
+        assert get_adjacency(db_path, conn) is index
+        assert index.edge_count == 6 and index.patched_edges == 2
+        assert index.degree(index.node_index["d"]) == 2
+        for budget in (1, 3, 10):
+            opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=budget)
+            via_sql = run_query(conn, opts)
+            via_index = run_query(conn, opts, adjacency=index)
+            assert [e["id"] for e in via_index["edges"]] == [e["id"] for e in via_sql["edges"]]
+        assert {e["id"] for e in run_query(conn, opts, adjacency=index)["edges"]} == {
+            "e1",
+            "e2",
+            "e6",
+        }
+
+        # Past the patch budget the next read reloads the CSR
+        monkeypatch.setattr(A, "MAX_PATCHED_EDGES", 0)
+        service._upsert_edges_sync(
+            pb2.UpsertEdgesRequest(
+                edges=[pb2.Edge(id="e7", type="Knows", source="b", target="c", data=pb2.Json())]
+            )
+        )
+        reloaded = get_adjacency(db_path, conn)
+        assert reloaded is not index and reloaded is not None
+        assert reloaded.patched_edges == 0 and reloaded.edge_count == 7
+    finally:
+        conn.close()
+        service.lanes.shutdown()
+
+
+def test_degree_ranking_after_writes_matches_adjacency(tmp_path: Path):
+    from app.indexes import build_node_stats
+
+    db_path = _make_graph(tmp_path)
+    conn = _connect(db_path)
+    try:
+        build_node_stats(conn)
+        opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=1)
+        assert [e["id"] for e in run_query(conn, opts)["edges"]] == ["e2"]
+
+        # Writes after the build turn c, reached through e5, into the top hub
+        conn.executemany(
+            "INSERT INTO edges (id, type, source, target, data) VALUES (?, 'Knows', 'c', ?, '{}')",
+            [(f"x{i}", f"n{i}") for i in range(4)],
+        )
+        conn.execute("UPDATE edges SET target = 'c' WHERE id = 'e3'")
+        conn.execute("DELETE FROM edges WHERE id = 'x0'")
+        conn.commit()
+
+        fresh = conn.execute(
+            """
+            SELECT e.id, coalesce(s.degree, 0) + coalesce(t.degree, 0)
+            FROM edges e
+            LEFT JOIN node_stats s ON s.id = e.source
+            LEFT JOIN node_stats t ON t.id = e.target
+            ORDER BY e.id
+            """
+        ).fetchall()
+        assert [tuple(r) for r in fresh] == [
+            tuple(r) for r in conn.execute("SELECT id, rank FROM edge_ranks ORDER BY id")
+        ]
+        index = AdjacencyIndex.load(conn)
+        for budget in (1, 2, 3):
+            opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=budget)
+            via_sql = [e["id"] for e in run_query(conn, opts)["edges"]]
+            via_index = [e["id"] for e in run_query(conn, opts, adjacency=index)["edges"]]
+            assert via_sql == via_index
+        assert via_sql[0] == "e5"
+    finally:
+        conn.close()
+
+
+def test_top_edges_matches_a_full_sort_on_a_hub(tmp_path: Path):
+    conn = _connect(tmp_path / "hub.db")
+    try:
+        conn.execute(
+            "CREATE TABLE edges (id TEXT PRIMARY KEY, type TEXT, source TEXT, target TEXT, "
+            "data TEXT)"
+        )
+        # hub -> x{i}; x{i} also links to i % 5 other nodes, so ranks tie in groups
+        rows = [(f"h{i:04d}", "hub", f"x{i}") for i in range(1000)]
+        rows += [(f"o{i}-{j}", f"x{i}", f"y{j}") for i in range(1000) for j in range(i % 5)]
+        conn.executemany("INSERT INTO edges VALUES (?, 'K', ?, ?, '{}')", rows)
+        index = AdjacencyIndex.load(conn)
+    finally:
+        conn.close()
+    index.apply_edges([(10**6, "late", "x7", "hub")])
+
+    slots = list(index.incident_slots({"hub", "x3"}))
+    src, dst, ids = index.edge_src, index.edge_dst, index.edge_ids
+    ranked = sorted(slots, key=lambda s: (-(index.degree(src[s]) + index.degree(dst[s])), ids[s]))
+    for budget in (0, 1, 7, 50, 5000):
+        assert (
+            index.top_edges({"hub", "x3"}, budget)
+            == [index.edge_rowids[s] for s in ranked][:budget]
+        )
+        assert index.top_edges({"hub", "x3"}, budget, "none") == [
+            index.edge_rowids[s] for s in slots[:budget]
+        ]
+
+
+def test_hub_seeds_rank_through_edge_ranks(tmp_path: Path, monkeypatch):
+    from app import query as Q
+    from app.indexes import build_node_stats
+
+    conn = _connect(_make_graph(tmp_path))
+    try:
+        build_node_stats(conn)
+        index = AdjacencyIndex.load(conn)
+        opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=2)
+        expected = [e["id"] for e in run_query(conn, opts, adjacency=index)["edges"]]
+
+        # Alice has degree 3: above the threshold the index is not asked to rank
+        monkeypatch.setattr(Q, "HUB_DEGREE", 2)
+        monkeypatch.setattr(index, "top_edges", None)
+        assert [e["id"] for e in run_query(conn, opts, adjacency=index)["edges"]] == expected
+    finally:
+        conn.close()
@@ -0,0 +1,71 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+from app.ann import IvfIndex, ivf_paths
+from app.embeddings import VectorIndex, export_vectors, get_vectors, similar
+from pipeline.hypergraph_writer import HypergraphWriter, Node
+
+
+def _vectors(n: int, dim: int = 16) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivf_search_matches_exact_when_probing_enough_lists():
+    vectors = _vectors(2000)
+    positions = np.arange(1, 2001, dtype=np.int64)
+    ivf = IvfIndex.build(vectors, seed=0)
+    assert ivf.nlist == 45 and int(ivf.offsets[-1]) == 2000
+    assert sorted(ivf.order.tolist()) == list(range(2000))
+
+    exact = VectorIndex(vectors, positions)
+    approx = VectorIndex(vectors, positions, ivf)
+    for q in vectors[:20]:
+        assert approx.search(q, 5, nprobe=ivf.nlist) == exact.search(q, 5)
+        # The query's own list is always probed, so its own vector comes first
+        assert approx.search(q, 1, nprobe=1) == exact.search(q, 1)
+    # Fewer probes score fewer rows
+    assert len(ivf.candidates(vectors[0], 2)) < len(ivf.candidates(vectors[0], 40))
+
+
+def test_default_nprobe_scales_with_list_count(monkeypatch):
+    from app import ann
+
+    small = IvfIndex.build(_vectors(400), seed=0)
+    large = IvfIndex.build(_vectors(2000), seed=0)
+    assert (small.nlist, small.default_nprobe) == (20, 3)
+    assert (large.nlist, large.default_nprobe) == (45, 6)
+    monkeypatch.setattr(ann, "DEFAULT_NPROBE", 4)
+    assert small.default_nprobe == large.default_nprobe == 4
+
+
+def test_export_writes_ivf_sidecars_above_threshold(tmp_path: Path):
+    db_path = tmp_path / "ivf.db"
+    with HypergraphWriter(db_path) as writer:
+        for i in range(40):
+            writer.upsert_node(Node(id=f"n{i}", type="Doc", data={"name": f"topic {i % 4} x{i}"}))
+        writer.finalize_embeddings()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert export_vectors(conn, db_path, ivf_min_vectors=10) == 40
+        index = get_vectors(db_path)
+        assert index is not None and index.ivf is not None
+        assert index.stats()["ivf_lists"] == 6
+        full = similar(conn, index, node_id="n1", k=3, nprobe=index.ivf.nlist)
+        assert [r["id"] for r in full] == [
+            r["id"]
+            for r in similar(conn, VectorIndex(index.matrix, index.positions), node_id="n1", k=3)
+        ]
+
+        # Sidecars for another matrix are ignored rather than trusted
+        np.save(ivf_paths(db_path)[2], np.arange(39, dtype=np.int64))
+        assert IvfIndex.load(db_path, 40, index.dim) is None
+
+        # Dropping below the threshold removes stale sidecars
+        assert export_vectors(conn, db_path) == 40
+        assert not any(p.exists() for p in ivf_paths(db_path))
+    finally:
+        conn.close()
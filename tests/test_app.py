@@ -1,4 +1,5 @@
 import importlib
+import json
 import sqlite3
 from pathlib import Path
 
@@ -54,6 +55,7 @@ def test_health_ok(tmp_path: Path):
     resp = client.get("/health")
     assert resp.status_code == 200
     assert resp.json().get("status") == "ok"
+    assert "ready" in resp.json().get("snapshot", {})
 
 
 def test_mcp_query_returns_results(tmp_path: Path):
@@ -144,6 +146,21 @@ def test_connect_and_health_direct(tmp_path: Path):
     assert out.get("status") == "ok"
 
 
+def test_lifespan_runs_at_info_level(tmp_path: Path, monkeypatch):
+    import logging
+
+    from app import main as app_main
+
+    monkeypatch.setattr(app_main, "DB_PATH", make_temp_db(tmp_path))
+    monkeypatch.setattr(app_main.logger, "level", logging.INFO)
+    TestClient = _get_testclient()
+    # Entering the client runs the lifespan, which logs the snapshot state
+    with TestClient(app_main.app) as client:
+        resp = client.post("/mcp/query", json={"query": "hello"})
+        assert [n["id"] for n in resp.json()["nodes"]] == ["n1"]
+        assert client.get("/health").json()["snapshot"]["message"] == "ok"
+
+
 def test_mcp_query_direct_success(tmp_path: Path):
     from app import main as app_main
 
@@ -151,7 +168,8 @@ def test_mcp_query_direct_success(tmp_path: Path):
     db_path = make_temp_db(tmp_path)
     app_main.DB_PATH = db_path
 
-    result = app_main.mcp_query(app_main.Query(query="hello")).model_dump()
+    response = app_main.mcp_query(app_main.Query(query="hello"))
+    result = json.loads(bytes(response.body))
     assert "nodes" in result and isinstance(result["nodes"], list)
     assert any("hello" in n["data"].get("name", "") for n in result["nodes"])
 
@@ -167,3 +185,191 @@ def test_mcp_query_direct_error(tmp_path: Path):
 
     with pytest.raises(HTTPException):
         app_main.mcp_query(app_main.Query(query="anything"))
+
+
+def test_mcp_query_serves_cached_body_until_snapshot_changes(tmp_path: Path):
+    from app import main as app_main
+    from app.cache import result_cache
+
+    db_path = make_temp_db(tmp_path)
+    app_main.DB_PATH = db_path
+    TestClient = _get_testclient()
+    client = TestClient(app_main.app)
+
+    before = result_cache.stats()["hits"]
+    first = client.post("/mcp/query", json={"query": "hello"})
+    second = client.post("/mcp/query", json={"query": "hello"})
+    assert first.status_code == second.status_code == 200
+    assert first.content == second.content
+    assert result_cache.stats()["hits"] == before + 1
+    assert client.get("/health").json()["cache"]["hits"] == before + 1
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ("n3", "Doc", '{"name": "hello again"}'),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    third = client.post("/mcp/query", json={"query": "hello"})
+    assert {n["id"] for n in third.json()["nodes"]} == {"n1", "n3"}
+
+
+def test_mcp_query_streams_ndjson(tmp_path: Path):
+    from app import main as app_main
+
+    db_path = make_temp_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO edges (id, type, source, target, data) VALUES (?, ?, ?, ?, json(?))",
+            ("e1", "Link", "n1", "n2", '{"w": 1}'),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    app_main.DB_PATH = db_path
+    TestClient = _get_testclient()
+    client = TestClient(app_main.app)
+
+    body = {"query": "hello", "expand_neighbors": True, "neighbor_budget": 5}
+    whole = client.post("/mcp/query", json=body).json()
+    resp = client.post("/mcp/query", json=body, headers={"Accept": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [x["node"] for x in lines if "node" in x] == whole["nodes"]
+    assert [x["edge"] for x in lines if "edge" in x] == whole["edges"]
+
+    bad_db = tmp_path / "bad.db"
+    bad_db.touch()
+    app_main.DB_PATH = bad_db
+    resp = client.post(
+        "/mcp/query", json={"query": "x"}, headers={"Accept": "application/x-ndjson"}
+    )
+    assert resp.status_code == 500
+
+
+def test_mcp_query_stream_returns_connection_on_disconnect(tmp_path: Path, monkeypatch):
+    import asyncio
+
+    from app import main as app_main
+    from app.pool import pool_stats
+
+    db_path = make_temp_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO nodes (id, type, data) VALUES (?, 'Doc', json(?))",
+            [(f"h{i}", '{"name": "hello"}') for i in range(20)],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    app_main.DB_PATH = db_path
+    monkeypatch.setattr(app_main, "STREAM_CHUNK_SIZE", 1)
+    body = json.dumps({"query": "hello", "limit": 20}).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/mcp/query",
+        "raw_path": b"/mcp/query",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"accept", b"application/x-ndjson"),
+        ],
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+    held = []
+
+    async def run():
+        streaming = asyncio.Event()
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await streaming.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message.get("more_body"):
+                held.append(pool_stats(db_path)["in_use"])
+                streaming.set()
+                await asyncio.sleep(0.05)
+
+        await app_main.app(scope, receive, send)
+        # Returned before the response finishes, not when the loop shuts down
+        return pool_stats(db_path)["in_use"]
+
+    assert asyncio.run(run()) == 0
+    # The client went away after the first chunk, mid-stream
+    assert held and held[0] == 1
+    assert len(held) < 20
+
+
+def test_mcp_query_batch(tmp_path: Path, monkeypatch):
+    from app import main as app_main
+
+    app_main.DB_PATH = make_temp_db(tmp_path)
+    TestClient = _get_testclient()
+    client = TestClient(app_main.app)
+
+    queries = [{"query": "hello"}, {"query": "another"}, {"query": "missing"}]
+    resp = client.post("/mcp/query:batch", json={"queries": queries})
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [[n["id"] for n in r["nodes"]] for r in results] == [["n1"], ["n2"], []]
+    # Same answers as the single-query endpoint
+    single = client.post("/mcp/query", json={"query": "another"}).json()
+    assert results[1] == single
+
+    monkeypatch.setattr(app_main, "BATCH_MAX_QUERIES", 2)
+    assert client.post("/mcp/query:batch", json={"queries": queries}).status_code == 400
+
+
+def test_mcp_query_cursor_pagination(tmp_path: Path):
+    from app import main as app_main
+
+    app_main.DB_PATH = make_temp_db(tmp_path)
+    TestClient = _get_testclient()
+    client = TestClient(app_main.app)
+
+    first = client.post("/mcp/query", json={"query": "hello OR another", "limit": 1}).json()
+    assert len(first["nodes"]) == 1 and first["next_cursor"]
+    second = client.post(
+        "/mcp/query",
+        json={"query": "hello OR another", "limit": 1, "cursor": first["next_cursor"]},
+    ).json()
+    assert {first["nodes"][0]["id"], second["nodes"][0]["id"]} == {"n1", "n2"}
+    third = client.post(
+        "/mcp/query",
+        json={"query": "hello OR another", "limit": 1, "cursor": second["next_cursor"]},
+    ).json()
+    assert third["nodes"] == [] and third["next_cursor"] is None
+
+    bad = client.post("/mcp/query", json={"query": "hello", "cursor": "garbage"})
+    assert bad.status_code == 400
+
+
+def test_mcp_query_type_and_attribute_filters(tmp_path: Path):
+    from app import main as app_main
+
+    app_main.DB_PATH = make_temp_db(tmp_path)
+    TestClient = _get_testclient()
+    client = TestClient(app_main.app)
+
+    body = {"query": "hello OR another", "where": {"name": "another doc"}}
+    assert [n["id"] for n in client.post("/mcp/query", json=body).json()["nodes"]] == ["n2"]
+    body = {"query": "hello OR another", "types": ["Person"]}
+    assert client.post("/mcp/query", json=body).json()["nodes"] == []
+    bad = client.post("/mcp/query", json={"query": "hello", "where": {"a.b": "x"}})
+    assert bad.status_code == 400
@@ -0,0 +1,85 @@
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+from app.cache import ResultCache, query_key, result_version
+from app.embeddings import sidecar_paths
+from app.query import QueryOpts
+from app.snapshot import mark_changed, reset_snapshots, snapshot_version
+
+
+def test_query_key_folds_unused_neighbor_options():
+    plain = query_key(QueryOpts(term="alice", neighbor_budget=5, neighbor_ranking="none"))
+    assert plain == query_key(QueryOpts(term="alice"))
+    expanded = query_key(QueryOpts(term="alice", expand_neighbors=True, neighbor_budget=5))
+    assert expanded != query_key(QueryOpts(term="alice", expand_neighbors=True, neighbor_budget=6))
+
+
+def test_cache_evicts_by_entries_and_bytes(tmp_path: Path):
+    db = tmp_path / "x.db"
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    v = (1,)
+    cache.put(db, v, ("a",), b"aaaa", 4)
+    cache.put(db, v, ("b",), b"bbbb", 4)
+    assert cache.get(db, v, ("a",)) == b"aaaa"  # "a" is now most recent
+    cache.put(db, v, ("c",), b"cc", 2)
+    assert cache.get(db, v, ("b",)) is None
+    cache.put(db, v, ("d",), b"dddddddd", 8)  # "a" is now least recent
+    assert cache.get(db, v, ("a",)) is None
+    assert cache.get(db, v, ("d",)) == b"dddddddd"
+    cache.put(db, v, ("big",), b"x" * 11, 11)  # larger than the whole cache
+    assert cache.get(db, v, ("big",)) is None
+
+    stats = cache.stats()
+    assert stats["evictions"] == 2
+    assert stats["bytes"] == 10
+    assert stats["hits"] == 2 and stats["misses"] == 3
+
+
+def test_cache_drops_entries_on_new_snapshot_version(tmp_path: Path):
+    db = tmp_path / "v.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE t (x)")
+    conn.commit()
+    conn.close()
+
+    cache = ResultCache()
+    first = snapshot_version(db)
+    assert first is not None
+    cache.put(db, first, ("q",), b"{}", 2)
+    assert cache.get(db, first, ("q",)) == b"{}"
+
+    mark_changed(db)
+    second = snapshot_version(db)
+    assert second is not None and second != first
+    assert cache.get(db, second, ("q",)) is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_version_follows_vector_sidecars(tmp_path: Path):
+    db = tmp_path / "s.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.commit()
+    conn.close()
+    reset_snapshots()
+    without = result_version(db)
+
+    # New sidecars alone, the database untouched, give a new version
+    matrix_path, _ = sidecar_paths(db)
+    np.save(matrix_path, np.ones((2, 4), dtype=np.float32))
+    with_vectors = result_version(db)
+    assert with_vectors != without
+    np.save(matrix_path, np.ones((3, 4), dtype=np.float32))
+    assert result_version(db) != with_vectors
+
+
+def test_cache_caps_each_entry(tmp_path: Path):
+    db = tmp_path / "c.db"
+    cache = ResultCache(max_entries=10, max_bytes=100, max_entry_bytes=10)
+    cache.put(db, (1,), ("small",), b"x" * 10, 10)
+    cache.put(db, (1,), ("large",), b"x" * 11, 11)
+    assert cache.get(db, (1,), ("small",)) is not None
+    assert cache.get(db, (1,), ("large",)) is None
+    assert ResultCache(max_bytes=8, max_entry_bytes=64).max_entry_bytes == 8
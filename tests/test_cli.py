@@ -1,7 +1,12 @@
+import argparse
+import logging
+import os
 import sqlite3
 from pathlib import Path
 
-from pipeline.cli import cmd_export_sqlite, cmd_init_from_markdown
+import pytest
+from pipeline import cli as pipeline_cli
+from pipeline.cli import cmd_export_sqlite, cmd_init_from_markdown, cmd_update_from_markdown
 
 
 def write_md(root: Path, name: str, type_: str = "Document") -> None:
@@ -100,3 +105,101 @@ beta content
         assert len({r["id"] for r in rows}) == 2
     finally:
         conn.close()
+
+
+def _update_counts(caplog: pytest.LogCaptureFixture) -> dict[str, int]:
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="pipeline.cli"):
+        cmd_update_from_markdown()
+    (record,) = [r for r in caplog.records if r.getMessage() == "update_from_markdown_done"]
+    keys = ("unchanged", "touched", "changed", "added", "removed", "deleted_nodes")
+    return {k: getattr(record, k) for k in keys}
+
+
+def test_cli_update_applies_only_changed_files(
+    monkeypatch, tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    db_path = tmp_path / "hypergraph.db"
+    profile_root = tmp_path / "knowledge" / "profile"
+    for name in ("doc1", "doc2", "doc3"):
+        write_md(profile_root, name)
+    monkeypatch.setenv("HYPERGRAPH_DB_PATH", str(db_path))
+    monkeypatch.setenv("MARKDOWN_ROOT", str(tmp_path / "knowledge"))
+    monkeypatch.setenv("PROFILE_NAME", "profile")
+    cmd_init_from_markdown()
+
+    none = {"unchanged": 3, "touched": 0, "changed": 0, "added": 0, "removed": 0}
+    assert _update_counts(caplog) == {**none, "deleted_nodes": 0}
+
+    (profile_root / "doc1.md").write_text("---\nid: doc1\nname: Renamed\n---\n", encoding="utf8")
+    doc2 = profile_root / "doc2.md"
+    os.utime(doc2, ns=(doc2.stat().st_atime_ns, doc2.stat().st_mtime_ns + 10**9))
+    (profile_root / "doc3.md").unlink()
+    write_md(profile_root / "sub", "doc4", type_="Job")
+    assert _update_counts(caplog) == {
+        "unchanged": 0,
+        "touched": 1,
+        "changed": 1,
+        "added": 1,
+        "removed": 1,
+        "deleted_nodes": 1,
+    }
+
+    conn = sqlite3.connect(db_path)
+    try:
+        nodes = dict(conn.execute("SELECT id, json_extract(data, '$.name') FROM nodes"))
+        assert nodes == {"doc1": "Renamed", "doc2": None, "doc4": None}
+        # Triggers kept the search tables in step; embeddings were refreshed
+        fts = conn.execute("SELECT id FROM nodes_fts WHERE nodes_fts MATCH 'renamed'").fetchall()
+        assert fts == [("doc1",)]
+        assert {r[0] for r in conn.execute("SELECT id FROM node_embeddings")} == set(nodes)
+        manifest = dict(conn.execute("SELECT path, node_id FROM source_manifest"))
+        assert manifest == {"doc1.md": "doc1", "doc2.md": "doc2", "sub/doc4.md": "doc4"}
+    finally:
+        conn.close()
+    assert _update_counts(caplog) == {**none, "deleted_nodes": 0}
+
+
+def test_cli_jobs_parse_in_process_pool_with_same_result(
+    monkeypatch, tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    profile_root = tmp_path / "knowledge" / "profile"
+    for i in range(25):
+        write_md(profile_root / f"d{i % 3}", f"doc{i:02d}", type_=f"T{i % 4}")
+    # Two files with one id: the later path wins in every mode
+    write_md(profile_root / "z", "doc00", type_="Late")
+    monkeypatch.setenv("MARKDOWN_ROOT", str(tmp_path / "knowledge"))
+    monkeypatch.setenv("PROFILE_NAME", "profile")
+    monkeypatch.setattr(pipeline_cli, "PARSE_CHUNK_FILES", 4)
+
+    dumps = []
+    caplog.set_level(logging.INFO, logger="pipeline.cli")
+    for jobs in (1, 3):
+        db_path = tmp_path / f"jobs{jobs}.db"
+        monkeypatch.setenv("HYPERGRAPH_DB_PATH", str(db_path))
+        pipeline_cli.main(["--jobs", str(jobs), "--batch-size", "4", "init-from-markdown"])
+        conn = sqlite3.connect(db_path)
+        try:
+            dumps.append(
+                (
+                    conn.execute("SELECT * FROM nodes ORDER BY rowid").fetchall(),
+                    conn.execute("SELECT path, hash, node_id FROM source_manifest").fetchall(),
+                )
+            )
+        finally:
+            conn.close()
+    assert dumps[0] == dumps[1]
+    assert len(dumps[0][0]) == 25 and dumps[0][0][0][:2] == ("doc00", "Late")
+    done = [r for r in caplog.records if r.getMessage() == "init_from_markdown_done"]
+    # 26 files in batches of 4
+    assert [(r.__dict__["documents"], r.__dict__["batches"]) for r in done] == [(26, 7), (26, 7)]
+
+
+def test_cli_jobs_rejects_negative_values(capsys: pytest.CaptureFixture[str]):
+    with pytest.raises(SystemExit) as exc:
+        pipeline_cli.main(["--jobs", "-3", "init-from-markdown"])
+    assert exc.value.code == 2
+    assert "must be 0 or more" in capsys.readouterr().err
+    # 0 alone means one worker per CPU
+    assert pipeline_cli._jobs(argparse.Namespace(jobs=0)) == (os.cpu_count() or 1)
+    assert pipeline_cli._jobs(argparse.Namespace(jobs=2)) == 2
@@ -0,0 +1,241 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from app import embeddings
+from app.embeddings import (
+    UnknownNode,
+    VectorIndex,
+    VectorsUnavailable,
+    embed_text,
+    export_vectors,
+    get_vectors,
+    similar,
+)
+from app.lanes import Lane
+from app.query import InvalidCursor, InvalidQuery, QueryOpts, rrf_fuse, run_query
+from pipeline.cli import cmd_init_from_markdown
+from pipeline.hypergraph_writer import Edge, HypergraphWriter, Node
+
+
+def _make_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "vec.db"
+    with HypergraphWriter(db_path) as writer:
+        writer.upsert_node(Node(id="a", type="Skill", data={"name": "Graph databases"}))
+        writer.upsert_node(Node(id="b", type="Skill", data={"name": "Graph database design"}))
+        writer.upsert_node(Node(id="c", type="Skill", data={"name": "Pastry baking"}))
+        writer.upsert_node(Node(id="d", type="Doc", data={"about": "graphs and databases"}))
+        writer.finalize_embeddings()
+    conn = sqlite3.connect(db_path)
+    try:
+        assert export_vectors(conn, db_path) == 4
+    finally:
+        conn.close()
+    return db_path
+
+
+def test_embed_text_is_deterministic_unit_length():
+    v = embed_text("Graph databases", 64)
+    assert v.dtype == np.float32 and v.shape == (64,)
+    assert np.isclose(np.linalg.norm(v), 1.0)
+    assert np.array_equal(v, embed_text("graph  DATABASES", 64))
+    assert not embed_text("  !! ", 64).any()
+
+
+def test_pipeline_nodes_embed_front_matter_only(tmp_path: Path, monkeypatch):
+    root = tmp_path / "md" / "profile"
+    root.mkdir(parents=True)
+    for name, body in (("a", "pastry baking"), ("b", "graph databases")):
+        (root / f"{name}.md").write_text(
+            f"---\nid: {name}\nname: Graph databases\nabout: storage\n---\n{body}\n",
+            encoding="utf8",
+        )
+    db_path = tmp_path / "kg.db"
+    monkeypatch.setenv("HYPERGRAPH_DB_PATH", str(db_path))
+    monkeypatch.setenv("MARKDOWN_ROOT", str(tmp_path / "md"))
+    monkeypatch.setenv("PROFILE_NAME", "profile")
+    cmd_init_from_markdown()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = dict(conn.execute("SELECT id, vector FROM node_embeddings").fetchall())
+    finally:
+        conn.close()
+    expected = embed_text("Graph databases\nstorage")
+    # Bodies differ but are not stored on the node, so both vectors are the same
+    for node_id in ("a", "b"):
+        assert np.array_equal(np.frombuffer(rows[node_id], dtype=np.float32), expected)
+
+
+def test_similar_ranks_by_cosine_and_scans_in_blocks(tmp_path: Path, monkeypatch):
+    db_path = _make_db(tmp_path)
+    index = get_vectors(db_path)
+    assert index is not None and len(index) == 4
+    assert isinstance(index.matrix, np.memmap)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        by_node = similar(conn, index, node_id="a", k=2)
+        # The node itself is left out; the unrelated one ranks below both
+        assert {r["id"] for r in by_node} == {"b", "d"}
+        assert by_node[0]["score"] >= by_node[1]["score"]
+        assert similar(conn, index, node_id="a", k=3)[-1]["id"] == "c"
+        assert similar(conn, index, node_id="b", k=1)[0]["data"] == {"name": "Graph databases"}
+
+        by_text = similar(conn, index, text="baking pastry", k=1)
+        assert [r["id"] for r in by_text] == ["c"]
+
+        # Block-wise top-k gives the same answer as one full product
+        query = embed_text("graph", index.dim)
+        full = index.search(query, 3)
+        monkeypatch.setattr(embeddings, "SCAN_BLOCK_ROWS", 1)
+        assert index.search(query, 3) == full
+        expected = np.argsort(-(np.asarray(index.matrix) @ query), kind="stable")[:3]
+        assert [p for p, _ in full] == [int(index.positions[i]) for i in expected]
+
+        with pytest.raises(UnknownNode):
+            similar(conn, index, node_id="missing")
+        with pytest.raises(VectorsUnavailable):
+            similar(conn, None, text="graph")
+    finally:
+        conn.close()
+
+
+def test_similar_http_and_grpc(tmp_path: Path):
+    pytest.importorskip("httpx")
+    from app import main as app_main
+    from app import mcp_pb2
+    from app.mcp_service import McpService
+    from fastapi.testclient import TestClient
+
+    db_path = _make_db(tmp_path)
+    app_main.DB_PATH = db_path
+    client = TestClient(app_main.app)
+    resp = client.post("/mcp/similar", json={"text": "pastry", "k": 1})
+    assert resp.status_code == 200
+    assert [n["id"] for n in resp.json()["nodes"]] == ["c"]
+    assert client.post("/mcp/similar", json={"id": "a", "text": "x"}).status_code == 400
+    assert client.post("/mcp/similar", json={"id": "nope"}).status_code == 404
+    resp = client.post(
+        "/mcp/query", json={"query": "baking pastries", "mode": "hybrid", "limit": 1}
+    )
+    assert [n["id"] for n in resp.json()["nodes"]] == ["c"]
+    assert client.post("/mcp/query", json={"query": "x", "mode": "nope"}).status_code == 400
+
+    pb2: Any = mcp_pb2
+    service = McpService(db_path)
+    try:
+        result = service._similar_sync(pb2.SimilarRequest(text="pastry", k=1))
+        assert [s.node.id for s in result.nodes] == ["c"]
+        assert result.nodes[0].score > 0
+        (chunk,) = service._query_chunks(
+            pb2.QueryRequest(query="baking pastries", mode="hybrid", limit=1)
+        )
+        assert [n.id for n in chunk.nodes] == ["c"]
+    finally:
+        service.lanes.shutdown()
+
+    for path in embeddings.sidecar_paths(db_path):
+        path.unlink()
+    assert get_vectors(db_path) is None
+    assert client.post("/mcp/similar", json={"text": "graph"}).status_code == 503
+
+
+def test_vector_index_rejects_mismatched_sidecars(tmp_path: Path):
+    db_path = tmp_path / "x.db"
+    matrix_path, rows_path = embeddings.sidecar_paths(db_path)
+    np.save(matrix_path, np.zeros((3, 4), dtype=np.float32))
+    np.save(rows_path, np.arange(2, dtype=np.int64))
+    with pytest.raises(ValueError):
+        VectorIndex.load(db_path)
+
+
+def test_rrf_fuse_rewards_agreement():
+    fused = rrf_fuse([["a", "b"], ["b", "c"]], k=60)
+    assert [i for i, _ in fused] == ["b", "a", "c"]
+    assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_hybrid_query_fuses_fts_and_vectors_then_expands(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    db_path = tmp_path / "hybrid.db"
+    with HypergraphWriter(db_path) as writer:
+        writer.upsert_node(Node(id="a", type="Skill", data={"name": "Graph databases"}))
+        writer.upsert_node(Node(id="b", type="Skill", data={"name": "Graph database design"}))
+        writer.upsert_node(Node(id="c", type="Skill", data={"name": "Pastry baking"}))
+        writer.upsert_node(Node(id="d", type="Doc", data={"about": "graphs and databases"}))
+        writer.upsert_edge(Edge(id="e1", type="USES", source="a", target="c", data={}))
+        writer.finalize_fts()
+        writer.finalize_embeddings()
+    conn = sqlite3.connect(db_path)
+    try:
+        export_vectors(conn, db_path)
+    finally:
+        conn.close()
+    index = get_vectors(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        # FTS needs both words; vectors also find the nodes about graph databases
+        lexical = run_query(conn, QueryOpts(term="database design"))
+        assert [n["id"] for n in lexical["nodes"]] == ["b"]
+        opts = QueryOpts(
+            term="database design", mode="hybrid", expand_neighbors=True, neighbor_budget=5
+        )
+        hybrid = run_query(conn, opts, vectors=index)
+        ids = [n["id"] for n in hybrid["nodes"]]
+        # b is in both lists so it ranks first; c arrives through a's edge
+        assert ids[0] == "b" and set(ids[1:3]) == {"a", "d"} and ids[3:] == ["c"]
+        assert [e["id"] for e in hybrid["edges"]] == ["e1"]
+
+        # Same result with the scan on a lane, and when the lane's only worker
+        # is busy the queued scan is cancelled and runs on this thread instead
+        lane = Lane("vectors", 1)
+        release = threading.Event()
+        try:
+            assert run_query(conn, opts, vectors=index, executor=lane) == hybrid
+            blocker = lane.submit(release.wait, 5)
+            assert run_query(conn, opts, vectors=index, executor=lane) == hybrid
+            release.set()
+            blocker.result()
+            assert lane.stats()["queued"] == 0 and lane.stats()["completed"] == 2
+        finally:
+            release.set()
+            lane.shutdown()
+
+        # Pages of one seed walk the fused order
+        seen, cursor = [], None
+        while True:
+            page = run_query(
+                conn,
+                QueryOpts(term="database design", mode="hybrid", limit=1, cursor=cursor),
+                vectors=index,
+            )
+            seen += [n["id"] for n in page["nodes"]]
+            if not (cursor := page["next_cursor"]):
+                break
+        assert seen == ids[:3]
+        with pytest.raises(InvalidCursor):
+            run_query(conn, QueryOpts(term="database design", cursor=cursor or "x"))
+
+        filtered = run_query(
+            conn, QueryOpts(term="database design", mode="hybrid", types=["Doc"]), vectors=index
+        )
+        assert [n["id"] for n in filtered["nodes"]] == ["d"]
+
+        with caplog.at_level(logging.WARNING, logger="mcp.query"):
+            assert [
+                n["id"]
+                for n in run_query(conn, QueryOpts(term="database design", mode="hybrid"))["nodes"]
+            ] == ["b"]
+        assert "query_vectors_unavailable" in caplog.text
+        with pytest.raises(InvalidQuery):
+            run_query(conn, QueryOpts(term="database design", mode="semantic"))
+    finally:
+        conn.close()
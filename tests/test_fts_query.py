@@ -0,0 +1,152 @@
+import logging
+import sqlite3
+from pathlib import Path
+
+import pytest
+from app.fts_query import compile_fts_query, compile_trigram_query, fuzzy_match, fuzzy_words
+from app.indexes import build_fts
+from app.query import InvalidCursor, QueryOpts, run_query
+from pipeline.hypergraph_writer import HypergraphWriter, Node
+
+
+def test_compile_quotes_terms_and_keeps_operators():
+    assert compile_fts_query("graph db") == '"graph" "db"'
+    assert compile_fts_query("hello OR another") == '"hello" OR "another"'
+    assert compile_fts_query('"data graphs" gra*') == '"data graphs" "gra"*'
+    assert compile_fts_query('"data gr"*') == '"data gr"*'
+    assert compile_fts_query("alice -bob NOT carol") == '("alice") NOT "bob" NOT "carol"'
+    # Dangling and repeated operators are dropped; lower case is just text
+    assert compile_fts_query("AND alice OR AND bob OR") == '"alice" AND "bob"'
+    assert compile_fts_query("alice or bob") == '"alice" "or" "bob"'
+    assert compile_fts_query('say "hi') == '"say" "hi"'
+    assert compile_fts_query("type:Person (x)") == '"type:Person" "x"'
+    for empty in ["", "   ", "AND OR", '""', "***", "-bob", "( ) -"]:
+        assert compile_fts_query(empty) is None
+
+
+def _make_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "fts.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.execute("CREATE TABLE edges (id TEXT, type TEXT, source TEXT, target TEXT, data TEXT)")
+    for nid, name in [("n1", "Alice Smith"), ("n2", "Bob Smith"), ("n3", "e-mail server")]:
+        conn.execute("INSERT INTO nodes VALUES (?, 'Person', json_object('name', ?))", (nid, name))
+    build_fts(conn)
+    conn.close()
+    return db_path
+
+
+def _ids(conn: sqlite3.Connection, term: str, fuzzy: bool = False) -> set[str]:
+    return {n["id"] for n in run_query(conn, QueryOpts(term=term, fuzzy=fuzzy))["nodes"]}
+
+
+def test_malformed_input_runs_as_fts_without_like_scan(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    conn = sqlite3.connect(_make_db(tmp_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        with caplog.at_level(logging.WARNING, logger="mcp.query"):
+            assert _ids(conn, 'smith "') == {"n1", "n2"}
+            assert _ids(conn, "smith -bob") == {"n1"}
+            assert _ids(conn, "e-mail") == {"n3"}
+            assert _ids(conn, "smith AND") == {"n1", "n2"}
+            assert _ids(conn, "ali* OR bob") == {"n1", "n2"}
+            assert _ids(conn, 'NEAR( ^x: "a" ) * ') == set()
+            # Nothing searchable is an empty result, not LIKE '%%'
+            assert _ids(conn, "  ") == set()
+        assert "query_fts_unavailable_degraded" not in caplog.text
+
+        conn.execute("DROP TABLE nodes_fts")
+        with caplog.at_level(logging.WARNING, logger="mcp.query"):
+            assert _ids(conn, "Bob") == {"n2"}
+        assert "query_fts_unavailable_degraded" in caplog.text
+    finally:
+        conn.close()
+
+
+def _make_skills_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "skills.db"
+    with HypergraphWriter(db_path) as writer:
+        for nid, name in [
+            ("s1", "Kubernetes"),
+            ("s2", "PostgreSQL"),
+            ("s3", "Postfix mail"),
+            ("s4", "Kubeflow pipelines"),
+            ("s5", "Python"),
+        ]:
+            writer.upsert_node(Node(id=nid, type="Skill", data={"name": name}))
+        writer.finalize_fts()
+    return db_path
+
+
+def test_fuzzy_matches_substrings_and_typos_from_trigram_index(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+):
+    conn = sqlite3.connect(_make_skills_db(tmp_path))
+    conn.row_factory = sqlite3.Row
+    try:
+        assert _ids(conn, "kube") == set()
+        assert _ids(conn, "kube", fuzzy=True) == {"s1", "s4"}
+        assert _ids(conn, "postgr", fuzzy=True) == {"s2"}
+        assert _ids(conn, "postgrse", fuzzy=True) == {"s2"}
+        # Words too short for trigrams are skipped; alone, exact search answers
+        assert _ids(conn, "python py", fuzzy=True) == {"s5"}
+        assert _ids(conn, "py", fuzzy=True) == set()
+
+        first = run_query(conn, QueryOpts(term="kube", limit=1, fuzzy=True))
+        assert first["next_cursor"]
+        rest = run_query(
+            conn, QueryOpts(term="kube", limit=1, fuzzy=True, cursor=first["next_cursor"])
+        )
+        assert {first["nodes"][0]["id"], rest["nodes"][0]["id"]} == {"s1", "s4"}
+        with pytest.raises(InvalidCursor):
+            run_query(conn, QueryOpts(term="kube", cursor=first["next_cursor"]))
+
+        conn.execute("DROP TABLE nodes_trigram")
+        with caplog.at_level(logging.WARNING, logger="mcp.query"):
+            assert _ids(conn, "kubernetes", fuzzy=True) == {"s1"}
+        assert "query_trigram_unavailable" in caplog.text
+    finally:
+        conn.close()
+
+
+def test_compile_trigram_query_ors_trigram_pairs_per_word():
+    # "kube" needs both of its two trigrams to reach 0.6
+    assert compile_trigram_query("Kube go") == '(("kub" AND "ube"))'
+    assert compile_trigram_query("kube flow") == '(("kub" AND "ube")) AND (("flo" AND "low"))'
+    assert compile_trigram_query("kub") == '("kub")'
+    assert compile_trigram_query("kube", 0.5) == '("kub" OR "ube")'
+    # postgrse: 4 of 6 trigrams needed, so two of any 4 of them
+    assert compile_trigram_query("postgrse").count(" AND ") == 6
+    assert compile_trigram_query("go") is None
+    assert fuzzy_match(fuzzy_words("cafe"), "Café Kubernetes")
+
+
+def test_trigram_query_keeps_every_fuzzy_match():
+    import random
+
+    rng = random.Random(7)
+    alphabet = "abcdeo"
+    rows = ["".join(rng.choice(alphabet) for _ in range(rng.randrange(3, 14))) for _ in range(400)]
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(body, tokenize='trigram')")
+        conn.executemany("INSERT INTO t (rowid, body) VALUES (?, ?)", enumerate(rows, 1))
+        read_before = read_now = 0
+        for term in ["abcab", "deoed", "aaaaaaa", "abcdeoabcdeoabcdeoabcdeo", rows[3], rows[9]]:
+            words = fuzzy_words(term)
+            kept = {i for i, body in enumerate(rows, 1) if fuzzy_match(words, body)}
+            match = compile_trigram_query(term)
+            found = {r[0] for r in conn.execute("SELECT rowid FROM t WHERE t MATCH ?", (match,))}
+            assert kept <= found
+            any_gram = " AND ".join(
+                "(" + " OR ".join(f'"{g}"' for g in grams) + ")" for grams in words
+            )
+            candidates = conn.execute("SELECT count(*) FROM t WHERE t MATCH ?", (any_gram,))
+            read_before += candidates.fetchone()[0]
+            read_now += len(found)
+        # Rows sharing a single common trigram are no longer candidates
+        assert read_now < read_before / 2
+    finally:
+        conn.close()
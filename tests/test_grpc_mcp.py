@@ -128,6 +128,44 @@ async def test_grpc_upserts(tmp_path: Path):
     await server.stop(0)
 
 
+def test_grpc_upsert_hyperedges_replaces_participants(tmp_path: Path):
+    from app import mcp_pb2
+    from app.mcp_service import McpService
+    from pipeline.hypergraph_writer import HypergraphWriter
+
+    db_path = tmp_path / "he.db"
+    with HypergraphWriter(db_path):
+        pass
+    pb2: Any = mcp_pb2
+
+    def request(replace: bool, *entities: str) -> Any:
+        he = pb2.Hyperedge(
+            id="he1",
+            type="Team",
+            data=pb2.Json(raw='{"size": 2}'),
+            participants=[pb2.HyperedgeEntity(entity_id=e, role="member") for e in entities],
+        )
+        return pb2.UpsertHyperedgesRequest(hyperedges=[he], replace_participants=replace)
+
+    def participants() -> list[str]:
+        conn = sqlite3.connect(db_path)
+        try:
+            rows = conn.execute("SELECT entity_id FROM hyperedge_entities ORDER BY entity_id")
+            return [r[0] for r in rows]
+        finally:
+            conn.close()
+
+    service = McpService(db_path)
+    try:
+        assert service._upsert_hyperedges_sync(request(False, "a", "b")) == 1
+        service._upsert_hyperedges_sync(request(False, "c"))
+        assert participants() == ["a", "b", "c"]
+        service._upsert_hyperedges_sync(request(True, "b", "d"))
+        assert participants() == ["b", "d"]
+    finally:
+        service.lanes.shutdown()
+
+
 @pytest.mark.asyncio
 async def test_grpc_health(tmp_path: Path):
     db_path = tmp_path / "h.db"
@@ -145,3 +183,159 @@ async def test_grpc_health(tmp_path: Path):
         assert hs.ok
 
     await server.stop(0)
+
+
+@pytest.mark.asyncio
+async def test_grpc_query_streams_chunks(tmp_path: Path):
+    db_path = tmp_path / "data.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.execute(
+        "CREATE TABLE edges (id TEXT PRIMARY KEY, type TEXT, source TEXT, target TEXT, data TEXT)"
+    )
+    conn.execute("INSERT INTO nodes (id, type, data) VALUES ('hub', 'Topic', '{}')")
+    for i in range(5):
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, 'Person', json(?))",
+            (f"p{i}", '{"name": "Alice"}'),
+        )
+        conn.execute(
+            "INSERT INTO edges (id, type, source, target, data) "
+            "VALUES (?, 'Likes', ?, 'hub', '{}')",
+            (f"e{i}", f"p{i}"),
+        )
+    conn.commit()
+    conn.close()
+
+    from app.mcp_service import serve_grpc
+
+    server, port = await serve_grpc(db_path, host="127.0.0.1", port=0)
+
+    import grpc
+    from app import mcp_pb2, mcp_pb2_grpc
+
+    pb2: Any = mcp_pb2
+    Stub: Any = mcp_pb2_grpc.McpServiceStub
+
+    async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+        stub = Stub(channel)
+        req = pb2.QueryRequest(
+            query="Alice", limit=10, expand_neighbors=True, neighbor_budget=10, chunk_size=2
+        )
+        for _ in range(2):  # second pass is served from the result cache
+            chunks = [chunk async for chunk in stub.Query(req)]
+            assert all(len(c.nodes) + len(c.edges) <= 2 for c in chunks)
+            assert len(chunks[0].nodes) == 2 and not chunks[0].edges
+            nodes = [n.id for c in chunks for n in c.nodes]
+            assert sorted(nodes) == ["hub", "p0", "p1", "p2", "p3", "p4"]
+            assert sorted(e.id for c in chunks for e in c.edges) == [f"e{i}" for i in range(5)]
+
+        empty = [chunk async for chunk in stub.Query(pb2.QueryRequest(query="nobody"))]
+        assert len(empty) == 1 and not empty[0].nodes
+
+        batch = await stub.BatchQuery(
+            pb2.BatchQueryRequest(
+                queries=[
+                    pb2.QueryRequest(query="Alice", limit=2),
+                    pb2.QueryRequest(query="nobody"),
+                    pb2.QueryRequest(query="Alice", expand_neighbors=True, neighbor_budget=10),
+                ]
+            )
+        )
+        assert [len(r.nodes) for r in batch.results] == [2, 0, 6]
+        assert batch.results[0].next_cursor and not batch.results[1].next_cursor
+
+        page2 = [
+            chunk
+            async for chunk in stub.Query(
+                pb2.QueryRequest(query="Alice", limit=2, cursor=batch.results[0].next_cursor)
+            )
+        ]
+        assert {n.id for c in page2 for n in c.nodes}.isdisjoint(
+            {n.id for n in batch.results[0].nodes}
+        )
+        with pytest.raises(grpc.aio.AioRpcError) as err:
+            async for _ in stub.Query(pb2.QueryRequest(query="Alice", cursor="bad")):
+                pass
+        assert err.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert len(batch.results[2].edges) == 5
+
+    await server.stop(0)
+
+
+@pytest.mark.asyncio
+async def test_grpc_where_filters_match_typed_values(tmp_path: Path):
+    db_path = tmp_path / "data.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.executemany(
+        "INSERT INTO nodes (id, type, data) VALUES (?, 'Doc', json(?))",
+        [
+            ("d1", '{"name": "Report", "year": 2020, "active": true, "score": 1.5}'),
+            ("d2", '{"name": "Report", "year": 2021, "active": false, "score": 2}'),
+            ("d3", '{"name": "Report", "year": "2020", "active": "true"}'),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    import grpc
+    from app import mcp_pb2, mcp_pb2_grpc
+    from app.mcp_service import serve_grpc
+    from google.protobuf import struct_pb2
+
+    pb2: Any = mcp_pb2
+    Stub: Any = mcp_pb2_grpc.McpServiceStub
+    server, port = await serve_grpc(db_path, host="127.0.0.1", port=0)
+
+    async def ids(**where: Any) -> list[str]:
+        req = pb2.QueryRequest(query="report", limit=10)
+        for name, value in where.items():
+            req.where[name].CopyFrom(value)
+        return sorted([n.id async for chunk in stub.Query(req) for n in chunk.nodes])
+
+    try:
+        async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+            stub = Stub(channel)
+            # Numbers and booleans match JSON numbers and booleans, strings match strings
+            assert await ids(year=struct_pb2.Value(number_value=2020)) == ["d1"]
+            assert await ids(score=struct_pb2.Value(number_value=1.5)) == ["d1"]
+            assert await ids(active=struct_pb2.Value(bool_value=True)) == ["d1"]
+            assert await ids(active=struct_pb2.Value(bool_value=False)) == ["d2"]
+            assert await ids(year=struct_pb2.Value(string_value="2020")) == ["d3"]
+            with pytest.raises(grpc.aio.AioRpcError) as exc:
+                await ids(year=struct_pb2.Value(null_value=struct_pb2.NULL_VALUE))
+            assert exc.value.code() == grpc.StatusCode.INVALID_ARGUMENT
+    finally:
+        await server.stop(0)
+
+
+def test_grpc_stream_stops_buffering_past_the_entry_cap(tmp_path: Path, monkeypatch):
+    db_path = tmp_path / "data.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.executemany(
+        "INSERT INTO nodes (id, type, data) VALUES (?, 'Person', json(?))",
+        [(f"p{i}", '{"name": "Alice"}') for i in range(20)],
+    )
+    conn.commit()
+    conn.close()
+
+    from app import mcp_pb2
+    from app.cache import ResultCache
+    from app.mcp_service import McpService
+
+    pb2: Any = mcp_pb2
+    cache = ResultCache(max_entry_bytes=200)
+    monkeypatch.setattr("app.mcp_service.result_cache", cache)
+    service = McpService(db_path)
+    try:
+        big = pb2.QueryRequest(query="Alice", limit=20, chunk_size=2)
+        assert sum(len(c.nodes) for c in service._query_chunks(big)) == 20
+        # Larger than one entry: streamed in full but not kept for the cache
+        assert cache.stats()["entries"] == 0
+        small = pb2.QueryRequest(query="Alice", limit=1)
+        assert sum(len(c.nodes) for c in service._query_chunks(small)) == 1
+        assert cache.stats()["entries"] == 1
+    finally:
+        service.lanes.shutdown()
@@ -2,7 +2,13 @@ import sqlite3
 from pathlib import Path
 
 import pytest
-from pipeline.hypergraph_writer import Edge, HypergraphWriter, Node
+from pipeline.hypergraph_writer import (
+    Edge,
+    Hyperedge,
+    HyperedgeParticipant,
+    HypergraphWriter,
+    Node,
+)
 
 
 def test_writer_conn_property_outside_context_raises(tmp_path: Path):
@@ -54,9 +60,10 @@ def test_writer_finalize_fts_creates_fts_table(tmp_path: Path):
             "SELECT name FROM sqlite_master WHERE type='table' AND name='nodes_fts'"
         ).fetchone()
         assert exists is not None
-        row = conn.execute("SELECT id, content FROM nodes_fts WHERE id='n1'").fetchone()
+        row = conn.execute("SELECT id, name, about FROM nodes_fts WHERE id='n1'").fetchone()
         assert row is not None
-        assert "hello" in row[1]
+        assert row[1] == "hello"
+        assert row[2] == "world"
     finally:
         conn.close()
 
@@ -101,3 +108,112 @@ def test_writer_pragmas_error_path_is_ignored(monkeypatch, tmp_path: Path):
     with HypergraphWriter(tmp_path / "hg4.db") as writer:
         writer.upsert_node(Node(id="n1", type="Doc", data={}))
         writer.upsert_edge(Edge(id="e1", type="rel", source="n1", target="n1", data={}))
+
+
+def test_writer_finalize_materializes_node_degrees(tmp_path: Path):
+    db_path = tmp_path / "hg5.db"
+    with HypergraphWriter(db_path) as writer:
+        for nid in ("a", "b", "c"):
+            writer.upsert_node(Node(id=nid, type="Doc", data={"name": nid}))
+        writer.upsert_edge(Edge(id="e1", type="rel", source="a", target="b", data={}))
+        writer.finalize_fts()
+        # Edges written after finalize are tracked by the degree triggers
+        writer.upsert_edge(Edge(id="e2", type="rel", source="a", target="c", data={}))
+        writer.upsert_edge(Edge(id="e1", type="rel", source="c", target="b", data={}))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = dict(conn.execute("SELECT id, degree FROM node_stats").fetchall())
+        assert rows == {"a": 1, "b": 1, "c": 2}
+    finally:
+        conn.close()
+
+
+def _schema_names(conn: sqlite3.Connection, kind: str) -> set[str]:
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = ?", (kind,))}
+
+
+def test_writer_bulk_load_defers_indexes_triggers_and_fk_checks(tmp_path: Path):
+    db_path = tmp_path / "bulk.db"
+    with HypergraphWriter(db_path, build_mode=True, attribute_fields=["org"]) as writer:
+        writer.upsert_node(Node(id="a", type="Doc", data={"name": "alpha", "org": "x"}))
+        writer.finalize_fts()
+        writer.conn.execute("CREATE INDEX idx_nodes_custom ON nodes(type, id)")
+    conn = sqlite3.connect(db_path)
+    indexes, triggers = _schema_names(conn, "index"), _schema_names(conn, "trigger")
+    conn.close()
+
+    with HypergraphWriter(db_path, bulk_load=True, attribute_fields=["org"]) as writer:
+        # Bare tables while loading: no secondary indexes, no triggers, no FK checks
+        assert not {i for i in _schema_names(writer.conn, "index") if i.startswith("idx_")}
+        assert not _schema_names(writer.conn, "trigger")
+        assert writer.conn.execute("PRAGMA foreign_keys").fetchone() == (0,)
+        # Edge before its target node is fine until the final check
+        writer.upsert_edges([Edge(id="e1", type="rel", source="a", target="b", data={})])
+        writer.upsert_nodes([Node(id="b", type="Doc", data={"name": "beta"})])
+        timings = writer.finish_bulk_load()
+        assert set(timings) == {"load_s", "fk_check_s", "indexes_s", "fts_s"}
+        assert writer.conn.execute("PRAGMA foreign_keys").fetchone() == (1,)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert _schema_names(conn, "index") == indexes
+        assert _schema_names(conn, "trigger") == triggers
+        hits = conn.execute("SELECT id FROM nodes_fts WHERE nodes_fts MATCH 'beta'").fetchall()
+        assert hits == [("b",)]
+        assert dict(conn.execute("SELECT id, degree FROM node_stats")) == {"a": 1, "b": 1}
+    finally:
+        conn.close()
+
+
+def test_writer_bulk_load_rolls_back_on_fk_violation(tmp_path: Path):
+    db_path = tmp_path / "bulk_bad.db"
+    with HypergraphWriter(db_path, build_mode=True) as writer:
+        writer.upsert_node(Node(id="a", type="Doc", data={}))
+        writer.finalize_fts()
+
+    with pytest.raises(sqlite3.IntegrityError, match="1 foreign key violations"):
+        with HypergraphWriter(db_path, bulk_load=True) as writer:
+            writer.upsert_node(Node(id="c", type="Doc", data={}))
+            writer.upsert_edge(Edge(id="e1", type="rel", source="a", target="missing", data={}))
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert [r[0] for r in conn.execute("SELECT id FROM nodes")] == ["a"]
+        assert conn.execute("SELECT count(*) FROM edges").fetchone() == (0,)
+        # The dropped indexes and triggers came back with the rollback
+        assert "idx_edges_source" in _schema_names(conn, "index")
+        assert "nodes_ai" in _schema_names(conn, "trigger")
+    finally:
+        conn.close()
+
+
+def test_upsert_hyperedges_batches_and_replaces_participants(tmp_path: Path):
+    db_path = tmp_path / "he.db"
+
+    def he(i: int, *entities: str) -> Hyperedge:
+        parts = [HyperedgeParticipant(entity_id=e, role="member") for e in entities]
+        return Hyperedge(id=f"he{i}", type="Team", data={"n": i}, participants=parts)
+
+    with HypergraphWriter(db_path) as writer:
+        writer.upsert_nodes(Node(id=f"p{i}", type="Person", data={}) for i in range(4))
+        counts = writer.upsert_hyperedges((he(i, "p0", "p1") for i in range(5)), batch_size=2)
+        assert counts == {"hyperedges": 5, "participants": 10, "cleared": 0, "batches": 3}
+
+        # Merge keeps old participants; replace drops the ones not listed again
+        writer.upsert_hyperedges([he(0, "p2")])
+        counts = writer.upsert_hyperedges(
+            [he(1, "p3"), he(2, "p2"), he(1, "p0")], replace_participants=True, batch_size=2
+        )
+        assert counts["cleared"] == 4 and counts["batches"] == 2
+        rows = writer.conn.execute(
+            "SELECT hyperedge_id, group_concat(entity_id) FROM "
+            "(SELECT * FROM hyperedge_entities ORDER BY entity_id) GROUP BY hyperedge_id"
+        ).fetchall()
+    assert dict(rows) == {
+        "he0": "p0,p1,p2",
+        "he1": "p0,p3",
+        "he2": "p2",
+        "he3": "p0,p1",
+        "he4": "p0,p1",
+    }
@@ -0,0 +1,45 @@
+import asyncio
+import threading
+
+import pytest
+from app.lanes import DbLanes, lane_stats
+
+
+@pytest.mark.asyncio
+async def test_lanes_run_off_the_event_loop():
+    lanes = DbLanes(read_workers=2, write_workers=1)
+    try:
+        loop_thread = threading.current_thread().name
+        name = await lanes.run_read(lambda: threading.current_thread().name)
+        assert name != loop_thread
+        assert name.startswith("db-read")
+        assert await lanes.run_write(lambda x: x * 2, 21) == 42
+        stats = lanes.stats()
+        assert stats["read"]["completed"] == 1
+        assert stats["write"]["completed"] == 1
+        assert stats in lane_stats()
+    finally:
+        lanes.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_busy_write_lane_does_not_starve_reads():
+    lanes = DbLanes(read_workers=1, write_workers=1)
+    release = threading.Event()
+    try:
+        writes = [asyncio.ensure_future(lanes.run_write(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        # One write is running and two are queued on the write lane
+        assert lanes.stats()["write"]["active"] == 1
+        assert lanes.stats()["write"]["queued"] == 2
+        assert lanes.stats()["write"]["max_queued"] >= 2
+
+        # Reads still complete while the write lane is saturated
+        assert await asyncio.wait_for(lanes.run_read(lambda: "read"), timeout=1) == "read"
+
+        release.set()
+        await asyncio.gather(*writes)
+        assert lanes.stats()["write"]["queued"] == 0
+    finally:
+        release.set()
+        lanes.shutdown()
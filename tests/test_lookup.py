@@ -0,0 +1,106 @@
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.lookup import encode_lookup_json, get_edges, get_hyperedges, get_nodes
+from pipeline.hypergraph_writer import (
+    Edge,
+    Hyperedge,
+    HyperedgeParticipant,
+    HypergraphWriter,
+    Node,
+)
+
+
+def _make_graph(tmp_path: Path) -> Path:
+    db_path = tmp_path / "lookup.db"
+    with HypergraphWriter(db_path) as writer:
+        for i in range(5):
+            writer.upsert_node(Node(id=f"n{i}", type="Person", data={"name": f"P{i}"}))
+        writer.upsert_edge(Edge(id="e1", type="Knows", source="n0", target="n1", data={"w": 1}))
+        writer.upsert_hyperedge(
+            Hyperedge(
+                id="h1",
+                type="Meeting",
+                data={"topic": "plan"},
+                participants=[
+                    HyperedgeParticipant(entity_id="n2", role="guest", ordinal=1),
+                    HyperedgeParticipant(entity_id="n1", role="host", ordinal=0, data={"x": 1}),
+                ],
+            )
+        )
+    return db_path
+
+
+def test_get_by_id_keeps_request_order_and_skips_unknown(tmp_path: Path):
+    conn = sqlite3.connect(_make_graph(tmp_path))
+    try:
+        nodes = get_nodes(conn, ["n3", "missing", "n0", "n3"])
+        assert [n["id"] for n in nodes] == ["n3", "n0"]
+        assert nodes[0]["data"] == {"name": "P3"}
+        assert [e["id"] for e in get_edges(conn, ["e1", "e9"])] == ["e1"]
+
+        (h1,) = get_hyperedges(conn, ["h1"])
+        assert [(p["entity_id"], p["ordinal"]) for p in h1["participants"]] == [
+            ("n1", 0),
+            ("n2", 1),
+        ]
+        assert h1["participants"][0]["data"] == {"x": 1}
+        assert get_nodes(conn, []) == []
+
+        plan = " ".join(
+            str(r[-1])
+            for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT n.id FROM json_each(?) AS j "
+                "CROSS JOIN nodes AS n ON n.id = j.value",
+                ('["n1"]',),
+            )
+        )
+        assert "INDEX" in plan and "SCAN n" not in plan
+    finally:
+        conn.close()
+
+
+def test_raw_lookup_encodes_like_parsed(tmp_path: Path):
+    conn = sqlite3.connect(_make_graph(tmp_path))
+    try:
+        for kind, fetch, ids in [
+            ("nodes", get_nodes, ["n1", "n2"]),
+            ("edges", get_edges, ["e1"]),
+            ("hyperedges", get_hyperedges, ["h1"]),
+        ]:
+            body = encode_lookup_json(kind, fetch(conn, ids, raw=True))
+            assert json.loads(body) == {kind: fetch(conn, ids)}
+    finally:
+        conn.close()
+
+
+def test_http_and_grpc_lookup_endpoints(tmp_path: Path):
+    pytest.importorskip("httpx")
+    from app import main as app_main
+    from app.mcp_service import McpService
+    from fastapi.testclient import TestClient
+
+    db_path = _make_graph(tmp_path)
+    app_main.DB_PATH = db_path
+    client = TestClient(app_main.app)
+
+    resp = client.post("/mcp/nodes:get", json={"ids": ["n4", "n1"]})
+    assert resp.status_code == 200
+    assert [n["id"] for n in resp.json()["nodes"]] == ["n4", "n1"]
+    assert client.post("/mcp/edges:get", json={"ids": ["e1"]}).json()["edges"][0]["source"] == "n0"
+    hyper = client.post("/mcp/hyperedges:get", json={"ids": ["h1"]}).json()["hyperedges"]
+    assert hyper[0]["participants"][0]["role"] == "host"
+    too_many = {"ids": [str(i) for i in range(app_main.MAX_IDS + 1)]}
+    assert client.post("/mcp/nodes:get", json=too_many).status_code == 400
+
+    service = McpService(db_path)
+    try:
+        nodes: Any = service._lookup_sync("nodes", ["n2", "n0"])
+        assert [n.id for n in nodes.nodes] == ["n2", "n0"]
+        hyper_pb: Any = service._lookup_sync("hyperedges", ["h1"])
+        assert [p.entity_id for p in hyper_pb.hyperedges[0].participants] == ["n1", "n2"]
+    finally:
+        service.lanes.shutdown()
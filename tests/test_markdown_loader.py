@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from pipeline.markdown_loader import iter_markdown
+from pipeline.markdown_loader import iter_markdown, scan_markdown
 
 
 def test_iter_markdown_parses_front_matter(tmp_path: Path):
@@ -44,3 +44,16 @@ def test_iter_markdown_missing_root(tmp_path: Path):
     # Should yield nothing and not crash
     docs = list(iter_markdown(missing))
     assert docs == []
+
+
+def test_scan_markdown_streams_in_sorted_path_order(tmp_path: Path):
+    for rel in ["a.md", "a/b.md", "a-b.md", "a-b/c.md", "B.md", "z/y/x.md", "a/a.md", "c.txt"]:
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x", encoding="utf8")
+
+    scanned = scan_markdown(tmp_path)
+    first = next(scanned)
+    assert (first.rel, first.size) == ("B.md", 1)
+    expected = [p.relative_to(tmp_path).as_posix() for p in sorted(tmp_path.rglob("*.md"))]
+    assert [first.rel, *(s.rel for s in scanned)] == expected
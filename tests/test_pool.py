@@ -0,0 +1,72 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from app.pool import ConnectionPool, PoolTimeout, get_pool, read_connection
+
+
+def _make_db(path: Path) -> Path:
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+        conn.execute("INSERT INTO nodes (id, type, data) VALUES ('n1', 'Doc', '{}')")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def test_pool_reuses_connections_and_is_read_only(tmp_path: Path):
+    pool = ConnectionPool(_make_db(tmp_path / "p.db"), max_size=2)
+    with pool.connection() as first:
+        assert first.row_factory is sqlite3.Row
+        assert first.execute("PRAGMA query_only").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            first.execute("DELETE FROM nodes")
+    with pool.connection() as second:
+        assert second is first
+    stats = pool.stats()
+    assert stats["open"] == 1
+    assert stats["checkouts"] == 2
+    pool.close()
+
+
+def test_pool_is_bounded_and_times_out(tmp_path: Path):
+    pool = ConnectionPool(_make_db(tmp_path / "p.db"), max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.stats()["timeouts"] == 1
+
+    # A waiter gets the connection once it is returned
+    got: list[sqlite3.Connection] = []
+    pool.timeout = 2.0
+
+    def borrow() -> None:
+        with pool.connection() as conn:
+            got.append(conn)
+
+    with pool.connection() as held:
+        t = threading.Thread(target=borrow)
+        t.start()
+        time.sleep(0.05)
+    t.join()
+    assert got == [held]
+    assert pool.stats()["wait_ms_max"] > 0
+    pool.close()
+
+
+def test_get_pool_shared_and_recycled_on_new_file(tmp_path: Path):
+    db_path = _make_db(tmp_path / "shared.db")
+    pool = get_pool(db_path)
+    assert get_pool(db_path) is pool
+    with read_connection(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0] == 1
+
+    # Swapping the file (new inode) replaces the pool
+    replacement = _make_db(tmp_path / "next.db")
+    replacement.replace(db_path)
+    assert get_pool(db_path) is not pool
@@ -1,7 +1,20 @@
+import json
 import sqlite3
 from pathlib import Path
 
-from app.query import QueryOpts, run_query
+import pytest
+from app.indexes import build_fts
+from app.main import GraphResponse
+from app.query import (
+    InvalidCursor,
+    InvalidFilter,
+    QueryOpts,
+    encode_graph_json,
+    iter_query,
+    run_batch,
+    run_query,
+)
+from pipeline.hypergraph_writer import HypergraphWriter, Node
 
 
 def _setup_db(tmp_path: Path) -> Path:
@@ -88,3 +101,277 @@ def test_run_query_with_neighbors_no_ranking(tmp_path: Path):
         assert ("e1", "n1", "n2") in edges
     finally:
         conn.close()
+
+
+def test_run_query_degree_ranking_uses_node_stats(tmp_path: Path):
+    from app.indexes import build_node_stats
+
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        # n2 becomes a hub; e1 (n1-n2) must outrank e3 (n1-n3)
+        conn.execute("INSERT INTO nodes (id, type, data) VALUES ('n3', 'Person', '{}')")
+        for i in range(5):
+            conn.execute(
+                "INSERT INTO edges (id, type, source, target, data) VALUES (?, 'K', 'n2', ?, '{}')",
+                (f"h{i}", f"x{i}"),
+            )
+        conn.execute(
+            "INSERT INTO edges (id, type, source, target, data) "
+            "VALUES ('e3', 'K', 'n1', 'n3', '{}')"
+        )
+        build_node_stats(conn)
+        result = run_query(
+            conn,
+            QueryOpts(term="Alice", limit=10, expand_neighbors=True, neighbor_budget=1),
+        )
+        assert [e["id"] for e in result["edges"]] == ["e1"]
+        assert {n["id"] for n in result["nodes"]} == {"n1", "n2"}
+    finally:
+        conn.close()
+
+
+def test_degree_ranking_reads_a_bounded_range_per_seed(tmp_path: Path):
+    from app import query as query_mod
+    from app.indexes import build_node_stats
+
+    conn = sqlite3.connect(tmp_path / "hub.db")
+    try:
+        conn.execute(
+            "CREATE TABLE edges (id TEXT PRIMARY KEY, type TEXT, source TEXT, target TEXT, "
+            "data TEXT)"
+        )
+        # hub -> x{i}; x{i} also links to i % 7 other nodes, so neighbor degrees vary
+        rows = [(f"h{i:04d}", "hub", f"x{i}") for i in range(2000)]
+        rows += [(f"o{i}-{j}", f"x{i}", f"y{j}") for i in range(0, 2000, 50) for j in range(i % 7)]
+        rows += [(f"s{i}", f"y{i}", "seed2") for i in range(3)]
+        conn.executemany("INSERT INTO edges VALUES (?, 'K', ?, ?, '{}')", rows)
+        build_node_stats(conn)
+        cur = conn.cursor()
+        seeds = {"hub", "seed2"}
+
+        legacy = query_mod._RANKED_EDGES_SQL.format(
+            qs="?,?", joins=query_mod._STATS_JOINS, degree=query_mod._STATS_DEGREE
+        )
+        expected = [r[0] for r in cur.execute(legacy, [*seeds, *seeds, 8])]
+        assert query_mod._ranked_edge_rowids(cur, seeds, 8) == expected
+
+        # Each leg is an index range scan; nothing sorts the hub's 2000 edges
+        plan = " ".join(
+            r[3]
+            for r in cur.execute(
+                "EXPLAIN QUERY PLAN " + query_mod._RANK_LEG_SQL.format(col="source"), ("hub", 8)
+            )
+        )
+        assert "edge_ranks_by_source" in plan and "TEMP B-TREE" not in plan
+
+        # A later edge is ranked from the degrees current when it is written
+        conn.execute("INSERT INTO edges VALUES ('new', 'K', 'seed2', 'hub', '{}')")
+        top = query_mod._ranked_edge_rowids(cur, {"seed2"}, 1)
+        assert cur.execute("SELECT id FROM edges WHERE rowid = ?", top).fetchone() == ("new",)
+        conn.execute("DELETE FROM edges WHERE id = 'new'")
+        assert conn.execute("SELECT count(*) FROM edge_ranks WHERE id = 'new'").fetchone() == (0,)
+    finally:
+        conn.close()
+
+
+def test_run_query_ranks_fts_matches_by_weighted_bm25(tmp_path: Path):
+    from app.indexes import FtsField, build_fts
+
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        # "graph" only in about for many rows, in the name of the last one
+        for i in range(5):
+            conn.execute(
+                "INSERT INTO nodes (id, type, data) VALUES (?, 'Doc', json(?))",
+                (f"a{i}", '{"name": "note", "about": "graph database notes"}'),
+            )
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES ('z', 'Doc', json(?))",
+            ('{"name": "graph"}',),
+        )
+        build_fts(conn, [FtsField("name", 10.0), FtsField("about", 1.0), FtsField("type")])
+        result = run_query(conn, QueryOpts(term="graph", limit=2))
+        assert result["nodes"][0]["id"] == "z"
+        assert len(result["nodes"]) == 2
+    finally:
+        conn.close()
+
+
+def test_run_query_raw_mode_passes_stored_json_through(tmp_path: Path):
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ('n"3', "Per\\son", '{"name": "Alice \\u00e9"}'),
+        )
+        opts = QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=10)
+        parsed = run_query(conn, opts)
+        raw = run_query(conn, opts, raw=True)
+    finally:
+        conn.close()
+
+    assert all(isinstance(n["data"], str) for n in raw["nodes"])
+    assert [json.loads(n["data"]) for n in raw["nodes"]] == [n["data"] for n in parsed["nodes"]]
+    body = encode_graph_json(raw)
+    assert json.loads(body) == GraphResponse.model_validate(parsed).model_dump()
+
+
+def test_iter_query_yields_bounded_chunks_seeds_first(tmp_path: Path):
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        for i in range(5):
+            conn.execute(
+                "INSERT INTO nodes (id, type, data) VALUES (?, 'Person', json(?))",
+                (f"a{i}", '{"name": "Alice"}'),
+            )
+            conn.execute(
+                "INSERT INTO edges (id, type, source, target, data) "
+                "VALUES (?, 'Knows', ?, 'n2', '{}')",
+                (f"ea{i}", f"a{i}"),
+            )
+        opts = QueryOpts(term="Alice", limit=20, expand_neighbors=True, neighbor_budget=20)
+        chunks = list(iter_query(conn, opts, chunk_size=2, raw=True))
+        whole = run_query(conn, opts, raw=True)
+    finally:
+        conn.close()
+
+    assert all(len(c["nodes"]) + len(c["edges"]) <= 2 for c in chunks)
+    assert [n["id"] for c in chunks for n in c["nodes"]] == [n["id"] for n in whole["nodes"]]
+    assert [e["id"] for c in chunks for e in c["edges"]] == [e["id"] for e in whole["edges"]]
+    kinds = ["nodes" if c["nodes"] else "edges" for c in chunks]
+    # All six seeds stream before the first edge chunk
+    assert kinds[:3] == ["nodes"] * 3 and kinds[3] == "edges"
+
+
+def test_run_batch_matches_single_queries_and_shares_fetches(tmp_path: Path):
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute(
+            "INSERT INTO edges (id, type, source, target, data) "
+            "VALUES ('e2', 'Knows', 'n2', 'n1', '{}')"
+        )
+        conn.commit()
+        batch = [
+            QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=5),
+            QueryOpts(term="Alice OR Bob", expand_neighbors=True, neighbor_budget=5),
+            QueryOpts(term="Alice", expand_neighbors=True, neighbor_budget=5),
+            QueryOpts(term="Bob"),
+        ]
+        singles = [run_query(conn, opts) for opts in batch]
+
+        statements: list[str] = []
+        conn.set_trace_callback(statements.append)
+        results = run_batch(conn, batch)
+        conn.set_trace_callback(None)
+    finally:
+        conn.close()
+
+    assert results == singles
+    assert statements[0] == "BEGIN" and statements[-1] == "COMMIT"
+    edge_fetches = [s for s in statements if "WHERE rowid IN" in s]
+    # Both edges touch n1: the first query fetches them, the others reuse them
+    assert len(edge_fetches) == 1
+    assert len([s for s in statements if "WHERE id IN" in s]) == 1
+
+
+def test_cursor_pages_through_ranked_matches(tmp_path: Path):
+    db_path = _setup_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        for i in range(6):
+            about = "alice " * (i % 3 + 1)
+            conn.execute(
+                "INSERT INTO nodes (id, type, data) VALUES (?, 'Person', json(?))",
+                (f"a{i}", f'{{"name": "A{i}", "about": "{about}"}}'),
+            )
+        build_fts(conn)
+        everything = [n["id"] for n in run_query(conn, QueryOpts(term="alice", limit=100))["nodes"]]
+
+        paged: list[str] = []
+        cursor = None
+        for _ in range(5):
+            page = run_query(conn, QueryOpts(term="alice", limit=3, cursor=cursor))
+            paged.extend(n["id"] for n in page["nodes"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert paged == everything and len(everything) == 7
+
+        first = run_query(conn, QueryOpts(term="alice", limit=3))
+        with pytest.raises(InvalidCursor):
+            run_query(conn, QueryOpts(term="bob", cursor=first["next_cursor"]))
+        with pytest.raises(InvalidCursor):
+            run_query(conn, QueryOpts(term="alice", cursor="not-a-cursor"))
+
+        # Without FTS the LIKE fallback pages by id
+        conn.execute("DROP TABLE nodes_fts")
+        like_pages = [run_query(conn, QueryOpts(term="Alice", limit=4))]
+        like_pages.append(
+            run_query(conn, QueryOpts(term="Alice", limit=4, cursor=like_pages[0]["next_cursor"]))
+        )
+        assert [n["id"] for p in like_pages for n in p["nodes"]] == sorted(
+            n["id"] for n in run_query(conn, QueryOpts(term="Alice", limit=100))["nodes"]
+        )
+    finally:
+        conn.close()
+
+
+def test_type_and_attribute_filters_use_indexes(tmp_path: Path):
+    db_path = tmp_path / "filters.db"
+    with HypergraphWriter(db_path, build_mode=True, attribute_fields=["organization"]) as w:
+        for i, (typ, org) in enumerate(
+            [("Person", "Acme"), ("Person", "Initech"), ("Project", "Acme"), ("Person", "Acme")]
+        ):
+            w.upsert_node(
+                Node(id=f"n{i}", type=typ, data={"name": f"Ada {i}", "organization": org})
+            )
+        w.upsert_node(Node(id="n9", type="Person", data={"name": "Ada 9", "active": True}))
+        w.finalize_fts()
+
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+
+        def ids(**kw) -> list[str]:
+            return [n["id"] for n in run_query(conn, QueryOpts(**kw))["nodes"]]
+
+        assert ids(term="ada", types=["Project"]) == ["n2"]
+        assert sorted(ids(term="ada", where={"organization": "Acme"})) == ["n0", "n2", "n3"]
+        assert ids(term="ada", types=["Person"], where={"organization": "Acme"}) == ["n0", "n3"]
+        assert ids(term="ada", where={"active": True}) == ["n9"]
+        # No search words: browse the filtered nodes by id, with cursors
+        page = run_query(conn, QueryOpts(term="", limit=1, where={"organization": "Acme"}))
+        assert [n["id"] for n in page["nodes"]] == ["n0"]
+        nxt = QueryOpts(
+            term="", limit=1, where={"organization": "Acme"}, cursor=page["next_cursor"]
+        )
+        assert [n["id"] for n in run_query(conn, nxt)["nodes"]] == ["n2"]
+        with pytest.raises(InvalidCursor):
+            run_query(conn, QueryOpts(term="", types=["Person"], cursor=page["next_cursor"]))
+        with pytest.raises(InvalidFilter):
+            run_query(conn, QueryOpts(term="ada", where={"x') OR 1=1 --": "a"}))
+        with pytest.raises(InvalidFilter):
+            run_query(conn, QueryOpts(term="ada", where={"organization": ["Acme"]}))
+
+        plan = " ".join(
+            str(r[-1])
+            for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT n.id FROM nodes n "
+                "WHERE json_extract(n.data, '$.organization') = ?",
+                ("Acme",),
+            )
+        )
+        assert "idx_nodes_attr_organization" in plan
+    finally:
+        conn.close()
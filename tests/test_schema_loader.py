@@ -1,5 +1,6 @@
 import pipeline.schema_loader as S
 import pytest
+from app.indexes import DEFAULT_FTS_FIELDS
 from pipeline.schema_loader import load_schema
 
 
@@ -53,3 +54,47 @@ entities:
     schema = load_schema(schema_path=cfg)
     assert schema.name == "my_graph"
     assert [e.label for e in schema.entities] == ["X"]
+
+
+@pytest.mark.skipif(getattr(S, "yaml", None) is None, reason="PyYAML not installed")
+def test_load_schema_search_fields(tmp_path):
+    cfg = tmp_path / "graph.yaml"
+    cfg.write_text(
+        """
+meta:
+  name: weighted
+search:
+  fields:
+    - name: name
+      weight: 8
+    - name: headline
+entities: []
+        """,
+        encoding="utf8",
+    )
+    schema = load_schema(schema_path=cfg)
+    assert [(f.name, f.weight) for f in schema.search_fields] == [
+        ("name", 8.0),
+        ("headline", 1.0),
+    ]
+
+    default = load_schema(schema_path=tmp_path / "not_there.yaml")
+    assert [f.name for f in default.search_fields] == ["name", "about", "type"]
+    # Same defaults the runtime builds FTS with
+    assert [(f.name, f.weight) for f in default.search_fields] == [
+        (f.name, f.weight) for f in DEFAULT_FTS_FIELDS
+    ]
+
+
+def test_pk_fields_skip_id_and_duplicates():
+    schema = S.GraphSchema(
+        name="x",
+        version="1",
+        description="",
+        entities=[
+            S.EntitySchema(label="Doc", pk=["id"], examples=[]),
+            S.EntitySchema(label="Role", pk=["title", "organization"], examples=[]),
+            S.EntitySchema(label="Org", pk=["name", "organization"], examples=[]),
+        ],
+    )
+    assert S.pk_fields(schema) == ["title", "organization", "name"]
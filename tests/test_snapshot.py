@@ -0,0 +1,177 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+from app.query import QueryOpts, run_query
+from app.snapshot import ensure_snapshot, open_readonly, reset_snapshots
+
+
+def _make_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "snap.db"
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ("n1", "Person", '{"name": "Alice", "about": "graph person"}'),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return db_path
+
+
+def test_ensure_snapshot_builds_fts_once(tmp_path: Path):
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+
+    state = ensure_snapshot(db_path)
+    assert state.ready and state.fts
+    # Second call for the same version is served from the cache
+    assert ensure_snapshot(db_path) is state
+
+    conn = sqlite3.connect(db_path)
+    try:
+        names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+        assert {"nodes_fts", "nodes_ai", "nodes_au", "nodes_ad"}.issubset(names)
+        assert conn.execute("SELECT COUNT(*) FROM nodes_fts").fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_ensure_snapshot_rechecks_on_new_version(tmp_path: Path):
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+    first = ensure_snapshot(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ("n2", "Person", '{"name": "Bob"}'),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    second = ensure_snapshot(db_path)
+    assert second is not first
+    assert second.ready and second.fts
+
+
+def test_ensure_snapshot_missing_and_not_ready(tmp_path: Path):
+    reset_snapshots()
+    missing = ensure_snapshot(tmp_path / "missing.db")
+    assert not missing.ready
+    assert not (tmp_path / "missing.db").exists()
+
+    empty = tmp_path / "empty.db"
+    empty.touch()
+    state = ensure_snapshot(empty)
+    assert not state.ready
+    assert state.message == "nodes table missing"
+
+
+def test_queries_run_over_readonly_connection(tmp_path: Path):
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+    ensure_snapshot(db_path)
+
+    conn = open_readonly(db_path)
+    try:
+        result = run_query(conn, QueryOpts(term="Alice"))
+        assert [n["id"] for n in result["nodes"]] == ["n1"]
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM nodes")
+    finally:
+        conn.close()
+
+
+def test_ensure_snapshot_rebuilds_single_column_fts(tmp_path: Path):
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        # Layout used before per-field columns and BM25 weights
+        conn.execute("CREATE VIRTUAL TABLE nodes_fts USING fts5(id, content, tokenize='porter')")
+        for name in ("nodes_ai", "nodes_au", "nodes_ad"):
+            conn.execute(f"CREATE TRIGGER {name} AFTER DELETE ON nodes BEGIN SELECT 1; END")
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert ensure_snapshot(db_path).fts
+    conn = sqlite3.connect(db_path)
+    try:
+        cols = [r[1] for r in conn.execute("PRAGMA table_info(nodes_fts)")]
+        assert cols == ["id", "name", "about", "type"]
+    finally:
+        conn.close()
+
+
+def test_ensure_snapshot_rebuilds_id_keyed_fts(tmp_path: Path):
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        # Layout whose triggers deleted by the unindexed id, scanning the table
+        conn.execute("CREATE VIRTUAL TABLE nodes_fts USING fts5(id UNINDEXED, name, about, type)")
+        conn.execute("INSERT INTO nodes_fts (id, name) SELECT id, 'Alice' FROM nodes")
+        for name in ("nodes_ai", "nodes_au", "nodes_ad"):
+            conn.execute(
+                f"CREATE TRIGGER {name} AFTER DELETE ON nodes BEGIN "
+                "DELETE FROM nodes_fts WHERE id = OLD.id; END"
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert ensure_snapshot(db_path).fts
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ("n2", "Person", '{"name": "Bob"}'),
+        )
+        conn.execute("UPDATE nodes SET data = json('{\"name\": \"Carol\"}') WHERE id = 'n1'")
+        conn.execute("DELETE FROM nodes WHERE id = 'n2'")
+        rows = conn.execute("SELECT rowid, id, name FROM nodes_fts").fetchall()
+        node_rowid = conn.execute("SELECT rowid FROM nodes WHERE id = 'n1'").fetchone()[0]
+        assert rows == [(node_rowid, "n1", "Carol")]
+    finally:
+        conn.close()
+
+
+def test_ensure_snapshot_rebuilds_fts_over_its_own_fields(tmp_path: Path, caplog):
+    from app.indexes import FtsField, build_fts, fts_fields, fts_present
+
+    reset_snapshots()
+    db_path = _make_db(tmp_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        # Built from a schema with other search fields, then left with id-keyed triggers
+        build_fts(conn, [FtsField("title", 5.0), FtsField("about", 2.0)])
+        conn.execute("DROP TRIGGER nodes_au")
+        conn.execute("CREATE TRIGGER nodes_au AFTER UPDATE ON nodes BEGIN SELECT 1; END")
+        conn.commit()
+    finally:
+        conn.close()
+
+    with caplog.at_level("WARNING", logger="mcp.snapshot"):
+        assert ensure_snapshot(db_path).fts
+    assert not [r for r in caplog.records if r.getMessage() == "snapshot_fts_default_fields"]
+    conn = sqlite3.connect(db_path)
+    try:
+        assert fts_fields(conn) == [FtsField("title", 5.0), FtsField("about", 2.0)]
+        assert fts_present(conn)
+        conn.execute("DROP TABLE nodes_fts")
+        conn.commit()
+    finally:
+        conn.close()
+
+    # Without a table to read them from, the rebuild falls back to the defaults and says so
+    reset_snapshots()
+    with caplog.at_level("WARNING", logger="mcp.snapshot"):
+        assert ensure_snapshot(db_path).fts
+    warned = [r for r in caplog.records if r.getMessage() == "snapshot_fts_default_fields"]
+    assert warned and warned[0].__dict__["fields"] == ["name", "about", "type"]
@@ -0,0 +1,78 @@
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+import pytest
+from app.snapshot import ensure_snapshot, reset_snapshots
+from app.suggest import suggest, suggest_match
+from pipeline.hypergraph_writer import HypergraphWriter, Node
+
+
+def _make_db(tmp_path: Path) -> Path:
+    db_path = tmp_path / "suggest.db"
+    with HypergraphWriter(db_path) as writer:
+        writer.upsert_node(Node(id="g1", type="Concept", data={"name": "Graph databases"}))
+        writer.upsert_node(Node(id="g2", type="Concept", data={"name": "Grammar"}))
+        writer.upsert_node(Node(id="d1", type="Doc", data={"title": "Data graphs in practice"}))
+        writer.upsert_node(Node(id="x1", type="Concept", data={}))
+        writer.finalize_fts()
+    return db_path
+
+
+def test_suggest_matches_word_prefixes(tmp_path: Path):
+    conn = sqlite3.connect(_make_db(tmp_path))
+    try:
+        assert {s["id"] for s in suggest(conn, "gra")} == {"g1", "g2", "d1"}
+        assert {s["id"] for s in suggest(conn, "graph da")} == {"g1", "d1"}
+        assert suggest(conn, "gram")[0] == {"id": "g2", "type": "Concept", "label": "Grammar"}
+        # Nodes without name or title are labelled by id
+        assert [s["id"] for s in suggest(conn, "x1")] == ["x1"]
+        assert len(suggest(conn, "g", limit=1)) == 1
+        # FTS5 syntax in the input is treated as text
+        assert suggest(conn, 'gr" OR *(') == suggest(conn, "gr or")
+        assert suggest(conn, "  ") == []
+
+        conn.execute(
+            "INSERT INTO nodes (id, type, data) VALUES (?, ?, json(?))",
+            ("g3", "Concept", '{"name": "Gravel"}'),
+        )
+        assert "g3" in {s["id"] for s in suggest(conn, "grav")}
+    finally:
+        conn.close()
+
+
+def test_suggest_match_quotes_each_word():
+    assert suggest_match("Graph  da") == '"Graph"* "da"*'
+    assert suggest_match("***") is None
+
+
+def test_snapshot_builds_suggest_for_older_databases(tmp_path: Path):
+    reset_snapshots()
+    db_path = tmp_path / "old.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT, data TEXT)")
+    conn.execute("INSERT INTO nodes VALUES ('n1', 'Person', json('{\"name\": \"Alice\"}'))")
+    conn.commit()
+    conn.close()
+
+    assert ensure_snapshot(db_path).suggest
+
+    pytest.importorskip("httpx")
+    from app import main as app_main
+    from app.mcp_service import McpService
+    from fastapi.testclient import TestClient
+
+    app_main.DB_PATH = db_path
+    resp = TestClient(app_main.app).get("/mcp/suggest", params={"q": "al"})
+    assert resp.status_code == 200
+    assert resp.json() == {"suggestions": [{"id": "n1", "type": "Person", "label": "Alice"}]}
+
+    from app import mcp_pb2
+
+    pb2: Any = mcp_pb2
+    service = McpService(db_path)
+    try:
+        result = service._suggest_sync(pb2.SuggestRequest(prefix="ali", limit=5))
+        assert [s.label for s in result.suggestions] == ["Alice"]
+    finally:
+        service.lanes.shutdown()